@@ -0,0 +1,248 @@
+import logging
+from datetime import date as date_type, datetime
+import numpy as np
+import pandas as pd
+from analytics.nav_store import NavStore
+from db.models import connection_scope
+from db.batching import executemany_upsert
+from config.settings import STORAGE_MODE, METRICS_SOURCE, METRICS_MAX_FILL_DAYS
+
+# Point-to-point return periods in months
+RETURN_PERIODS = {
+    'return_1m': 1,
+    'return_3m': 3,
+    'return_6m': 6,
+    'return_1y': 12,
+    'return_3y': 36,
+    'return_5y': 60,
+}
+
+# Annualized returns for periods longer than a year
+CAGR_PERIODS = {
+    'cagr_3y': 36,
+    'cagr_5y': 60,
+}
+
+# Drawdowns are measured against the peak of this trailing window
+DRAWDOWN_MONTHS = 12
+
+METRIC_COLUMNS = (
+    list(RETURN_PERIODS) + list(CAGR_PERIODS) + ['drawdown_1y', 'max_drawdown_1y']
+)
+
+
+METRICS_UPSERT_SQL = """
+    INSERT INTO nav_metrics (
+        scheme_code, as_of_date, nav, {columns}
+    ) VALUES (%s, %s, %s, {placeholders})
+    ON DUPLICATE KEY UPDATE
+        nav = VALUES(nav), {updates}
+""".format(
+    columns=', '.join(METRIC_COLUMNS),
+    placeholders=', '.join(['%s'] * len(METRIC_COLUMNS)),
+    updates=', '.join(f"{column} = VALUES({column})" for column in METRIC_COLUMNS),
+)
+
+METRICS_CHECK_EXISTING_SQL = """
+    SELECT COUNT(*)
+    FROM nav_metrics
+    WHERE (scheme_code, as_of_date) IN ({})
+"""
+
+
+def business_calendar(start_date, end_date) -> np.ndarray:
+    """Weekdays from start_date to end_date inclusive, as datetime64[D]."""
+    days = np.arange(np.datetime64(start_date, 'D'), np.datetime64(end_date, 'D') + 1, dtype='datetime64[D]')
+    return days[np.is_busday(days)]
+
+
+def months_back(dates, months: int) -> np.ndarray:
+    """The same day of month, months earlier; clipped to month end (31-Mar - 1m = 29-Feb)."""
+    dates = np.asarray(dates, dtype='datetime64[D]')
+    month = dates.astype('datetime64[M]')
+    day_of_month = dates - month.astype('datetime64[D]')
+    target_month = month - months
+    month_end = (target_month + 1).astype('datetime64[D]') - 1
+    return np.minimum(target_month.astype('datetime64[D]') + day_of_month, month_end)
+
+
+def _rows_at(calendar: np.ndarray, dates: np.ndarray) -> np.ndarray:
+    """Row of the last calendar day on or before each date; -1 before the calendar starts."""
+    return np.searchsorted(calendar, dates, side='right') - 1
+
+
+def compute_metrics(matrix: np.ndarray, calendar: np.ndarray, as_of_dates) -> dict:
+    """
+    Compute every metric for all schemes at once on a date-aligned matrix.
+
+    Args:
+        matrix (np.ndarray): NAVs, shape (len(calendar), schemes), forward
+            filled over missing days, NaN where a scheme has no NAV
+        calendar (np.ndarray): Sorted datetime64[D] dates of the matrix rows
+        as_of_dates: Dates to compute metrics for
+
+    Returns:
+        dict: 'as_of_date' (K,), 'nav' (K, schemes) and one (K, schemes)
+            float64 array per name in METRIC_COLUMNS, NaN where undefined;
+            never inf, which MySQL DOUBLE columns reject
+    """
+    as_of = np.asarray(as_of_dates, dtype='datetime64[D]')
+    rows = _rows_at(calendar, as_of)
+    valid = rows >= 0
+    current = np.full((len(as_of), matrix.shape[1]), np.nan)
+    current[valid] = matrix[rows[valid]]
+    result = {'as_of_date': as_of, 'nav': current}
+    # validate_data lets a NAV of 0 through; as a base or drawdown peak it
+    # would give inf returns or a -100% drawdown, so it counts as missing
+    matrix = np.where(matrix > 0, matrix, np.nan)
+    current = np.where(current > 0, current, np.nan)
+
+    def base_values(months):
+        base_dates = months_back(as_of, months)
+        base_rows = _rows_at(calendar, base_dates)
+        # A base before the first calendar day would silently shorten the period
+        ok = (base_rows >= 0) & (calendar[np.maximum(base_rows, 0)] >= base_dates - METRICS_MAX_FILL_DAYS)
+        base = np.full_like(current, np.nan)
+        base[ok] = matrix[base_rows[ok]]
+        return base, base_dates, base_rows
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        for name, months in RETURN_PERIODS.items():
+            base, _, _ = base_values(months)
+            result[name] = current / base - 1
+
+        for name, months in CAGR_PERIODS.items():
+            base, base_dates, _ = base_values(months)
+            years = (as_of - base_dates).astype(np.float64) / 365.25
+            result[name] = (current / base) ** (1 / years[:, None]) - 1
+
+        drawdown = np.full_like(current, np.nan)
+        max_drawdown = np.full_like(current, np.nan)
+        _, _, window_starts = base_values(DRAWDOWN_MONTHS)
+        for k, (start, end) in enumerate(zip(np.maximum(window_starts, 0), rows)):
+            if end < 0:
+                continue
+            window = matrix[start:end + 1]
+            peaks = np.fmax.accumulate(window, axis=0)
+            drawdowns = window / peaks - 1
+            drawdown[k] = drawdowns[-1]
+            all_nan = np.isnan(drawdowns).all(axis=0)
+            max_drawdown[k] = np.where(all_nan, np.nan, np.nanmin(np.where(all_nan, 0, drawdowns), axis=0))
+        result['drawdown_1y'] = drawdown
+        result['max_drawdown_1y'] = max_drawdown
+
+    for name in METRIC_COLUMNS:
+        result[name] = np.where(np.isfinite(result[name]), result[name], np.nan)
+    return result
+
+
+def history_windows(as_of_dates) -> list:
+    """
+    The NAV history compute_metrics reads for as_of_dates, as sorted,
+    non-overlapping (start, end) date pairs.
+
+    That is the drawdown window up to each as-of date plus
+    METRICS_MAX_FILL_DAYS before each return base date, so the years
+    between the base dates are never read.
+    """
+    as_of = np.unique(np.asarray(as_of_dates, dtype='datetime64[D]'))
+    windows = [(months_back(as_of, DRAWDOWN_MONTHS) - METRICS_MAX_FILL_DAYS, as_of)]
+    for months in sorted(set(RETURN_PERIODS.values()) | set(CAGR_PERIODS.values())):
+        base_dates = months_back(as_of, months)
+        windows.append((base_dates - METRICS_MAX_FILL_DAYS, base_dates))
+    starts = np.concatenate([start for start, _ in windows])
+    ends = np.concatenate([end for _, end in windows])
+    order = np.argsort(starts, kind='stable')
+
+    merged = []
+    for start, end in zip(starts[order].tolist(), ends[order].tolist()):
+        if merged and (start - merged[-1][1]).days <= 1:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def build_matrix(store: NavStore, windows: list) -> tuple:
+    """
+    (matrix, calendar) for every scheme in store on the weekdays of
+    windows, forward filled up to METRICS_MAX_FILL_DAYS.
+    """
+    calendar = np.concatenate([business_calendar(start, end) for start, end in windows])
+    matrix = store.align(calendar, fill=True, tolerance_days=METRICS_MAX_FILL_DAYS)
+    return matrix, calendar
+
+
+def metrics_frame(store: NavStore, as_of_dates) -> pd.DataFrame:
+    """
+    Metrics for every scheme in store on each of as_of_dates, one row per
+    (scheme_code, as_of_date) that has a current NAV.
+    """
+    as_of = np.sort(np.asarray(as_of_dates, dtype='datetime64[D]'))
+    matrix, calendar = build_matrix(store, history_windows(as_of))
+    metrics = compute_metrics(matrix, calendar, as_of)
+
+    schemes = len(store.scheme_codes)
+    data = {
+        'scheme_code': np.tile(store.scheme_codes, len(as_of)),
+        'as_of_date': np.repeat(as_of, schemes),
+        'nav': metrics['nav'].ravel(),
+    }
+    for name in METRIC_COLUMNS:
+        data[name] = metrics[name].ravel()
+    df = pd.DataFrame(data)
+    return df[df['nav'].notna()].reset_index(drop=True)
+
+
+def _as_date(date) -> date_type:
+    return date.date() if isinstance(date, datetime) else date
+
+
+def refresh_metrics(as_of_dates, conn=None, source: str = METRICS_SOURCE, storage: str = STORAGE_MODE) -> int:
+    """
+    Recompute and upsert nav_metrics for as_of_dates only.
+
+    Only the history_windows the metrics read are fetched, so refreshing
+    after a daily load touches about a year of NAVs plus a few days around
+    each return base date instead of five years of the table.
+
+    Args:
+        as_of_dates (iterable): Dates just loaded
+        conn: Optional open connection to reuse
+        source (str): 'database' or 'archive' for the NAV history
+        storage (str): Storage mode whose NAV table is read
+
+    Returns:
+        int: Metric rows written
+    """
+    as_of_dates = sorted({_as_date(date) for date in as_of_dates})
+    if not as_of_dates:
+        return 0
+    windows = history_windows(as_of_dates)
+
+    with connection_scope(conn) as conn:
+        if source == 'archive':
+            store = NavStore.from_archive(date_ranges=windows)
+        else:
+            store = NavStore.from_database(date_ranges=windows, conn=conn, storage=storage)
+        df = metrics_frame(store, as_of_dates)
+        if df.empty:
+            logging.info("No metrics to refresh")
+            return 0
+
+        df['as_of_date'] = df['as_of_date'].dt.strftime('%Y-%m-%d')
+        values = df.astype(object).where(df.notna(), None)
+        rows = list(values.itertuples(index=False, name=None))
+
+        cursor = conn.cursor()
+        try:
+            inserted, updated, unchanged = executemany_upsert(
+                conn, cursor, rows, METRICS_UPSERT_SQL, METRICS_CHECK_EXISTING_SQL, key_columns=(0, 1)
+            )
+        finally:
+            cursor.close()
+    logging.info(
+        f"Refreshed nav_metrics for {len(as_of_dates)} dates: {len(rows)} rows "
+        f"(inserted: {inserted}, updated: {updated}, unchanged: {unchanged})"
+    )
+    return len(rows)
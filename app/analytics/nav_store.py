@@ -0,0 +1,251 @@
+import logging
+import numpy as np
+from db.models import connection_scope
+from config.settings import STORAGE_MODE
+
+# Day offsets are days since this date, stored as int32
+EPOCH = np.datetime64('1970-01-01', 'D')
+
+# Shifts int32 day offsets into the low 32 bits of the composite search keys
+_DAY_BIAS = 2 ** 31
+
+STORE_SQL = {
+    'wide': """
+        SELECT scheme_code, nav_date, nav
+        FROM nav_data
+        WHERE nav_date BETWEEN %s AND %s
+    """,
+    'normalized': """
+        SELECT d.scheme_code, f.nav_date, f.nav
+        FROM nav_fact f
+        JOIN scheme_dim d ON d.scheme_id = f.scheme_id
+        WHERE f.nav_date BETWEEN %s AND %s
+    """,
+}
+
+# Rows fetched per round trip when loading from the database
+FETCH_BATCH_ROWS = 100000
+
+# (scheme, day) pairs searched at once by align, bounding its temporary arrays
+ALIGN_BATCH_CELLS = 1000000
+
+
+def to_day_offsets(dates) -> np.ndarray:
+    """Dates (datetime64, date, datetime or 'YYYY-MM-DD') -> int32 days since EPOCH."""
+    return (np.asarray(dates, dtype='datetime64[D]') - EPOCH).astype(np.int32)
+
+
+def from_day_offsets(offsets) -> np.ndarray:
+    """int32 days since EPOCH -> datetime64[D]."""
+    return EPOCH + np.asarray(offsets, dtype=np.int64)
+
+
+class NavStore:
+    """
+    Read-only NAV time series for many schemes in three flat arrays.
+
+    Rows are sorted by (scheme, date): days holds int32 offsets from EPOCH,
+    navs float64 NAVs, and scheme i owns rows starts[i]:starts[i + 1].
+    That is 12 bytes per observation plus one entry per scheme, against
+    well over 100 for an object-dtype DataFrame row.
+
+    Batch lookups search one sorted int64 key array (scheme position in the
+    high bits, day in the low bits), so any number of (scheme, date) pairs
+    across any number of schemes resolve in a single np.searchsorted call.
+    """
+
+    def __init__(self, scheme_codes: np.ndarray, starts: np.ndarray, days: np.ndarray, navs: np.ndarray):
+        self.scheme_codes = scheme_codes
+        self.starts = starts
+        self.days = days
+        self.navs = navs
+        self.positions = {code: i for i, code in enumerate(scheme_codes.tolist())}
+        self._keys = None
+
+    @classmethod
+    def from_arrays(cls, scheme_codes, dates, navs) -> 'NavStore':
+        """
+        Build a store from parallel arrays of scheme codes, dates and NAVs.
+
+        Rows with a NaN NAV are dropped; when a (scheme, date) pair repeats,
+        the last occurrence wins.
+        """
+        codes = np.asarray(scheme_codes).astype(str)
+        days = to_day_offsets(dates)
+        navs = np.asarray(navs, dtype=np.float64)
+
+        keep = ~np.isnan(navs)
+        codes, days, navs = codes[keep], days[keep], navs[keep]
+
+        unique_codes, code_index = np.unique(codes, return_inverse=True)
+        code_index = code_index.astype(np.int64)
+        # Stable sort keeps input order among duplicates, so the last one is last
+        order = np.lexsort((days, code_index))
+        code_index, days, navs = code_index[order], days[order], navs[order]
+
+        if len(days):
+            last = np.ones(len(days), dtype=bool)
+            last[:-1] = (code_index[1:] != code_index[:-1]) | (days[1:] != days[:-1])
+            code_index, days, navs = code_index[last], days[last], navs[last]
+
+        starts = np.searchsorted(code_index, np.arange(len(unique_codes) + 1)).astype(np.int64)
+        return cls(unique_codes, starts, np.ascontiguousarray(days), np.ascontiguousarray(navs))
+
+    @classmethod
+    def from_archive(cls, start_date=None, end_date=None, scheme_codes=None, date_ranges=None) -> 'NavStore':
+        """
+        Build a store from the Parquet archive, reading only the three needed columns.
+
+        date_ranges, a list of (start, end) pairs, replaces start_date and
+        end_date when only a few windows of history are needed.
+        """
+        import pyarrow as pa
+        from archive.nav_archive import read_archive
+
+        columns = ['scheme_code', 'nav_date', 'nav']
+        table = pa.concat_tables([
+            read_archive(start, end, scheme_codes, columns=columns)
+            for start, end in date_ranges or [(start_date, end_date)]
+        ])
+        return cls.from_arrays(
+            table.column('scheme_code').to_numpy(zero_copy_only=False),
+            table.column('nav_date').to_numpy(zero_copy_only=False).astype('datetime64[D]'),
+            table.column('nav').to_numpy(zero_copy_only=False),
+        )
+
+    @classmethod
+    def from_database(cls, start_date=None, end_date=None, conn=None, storage: str = STORAGE_MODE,
+                      date_ranges=None) -> 'NavStore':
+        """
+        Build a store from the NAV table, fetching rows in FETCH_BATCH_ROWS batches.
+
+        date_ranges, a list of (start, end) pairs, replaces start_date and
+        end_date when only a few windows of history are needed; each pair
+        is one range query. Every batch is converted to arrays at once.
+        """
+        codes, dates, navs = [], [], []
+        with connection_scope(conn) as conn:
+            cursor = conn.cursor()
+            try:
+                for start, end in date_ranges or [(start_date, end_date)]:
+                    cursor.execute(STORE_SQL[storage], (start, end))
+                    while True:
+                        batch = cursor.fetchmany(FETCH_BATCH_ROWS)
+                        if not batch:
+                            break
+                        batch_codes, batch_dates, batch_navs = zip(*batch)
+                        codes.append(np.array(batch_codes, dtype=object))
+                        dates.append(np.array(batch_dates, dtype='datetime64[D]'))
+                        # Decimal NAVs convert directly, NULL becomes NaN
+                        navs.append(np.array(batch_navs, dtype=np.float64))
+            finally:
+                cursor.close()
+        if not codes:
+            codes, dates, navs = [np.empty(0, dtype=object)], [np.empty(0, dtype='datetime64[D]')], [np.empty(0)]
+        store = cls.from_arrays(np.concatenate(codes), np.concatenate(dates), np.concatenate(navs))
+        logging.info(f"NavStore: {len(store)} rows for {len(store.scheme_codes)} schemes, {store.nbytes} bytes")
+        return store
+
+    def __len__(self):
+        return len(self.days)
+
+    @property
+    def nbytes(self) -> int:
+        return self.days.nbytes + self.navs.nbytes + self.starts.nbytes
+
+    def _scheme_positions(self, scheme_codes) -> np.ndarray:
+        """Store position of each code, -1 for unknown codes."""
+        return np.array([self.positions.get(str(code), -1) for code in np.atleast_1d(scheme_codes)],
+                        dtype=np.int64)
+
+    @property
+    def keys(self) -> np.ndarray:
+        """Sorted int64 (scheme position, day) search keys, built on first use."""
+        if self._keys is None:
+            owners = np.repeat(np.arange(len(self.scheme_codes), dtype=np.int64), np.diff(self.starts))
+            self._keys = (owners << 32) | (self.days.astype(np.int64) + _DAY_BIAS)
+        return self._keys
+
+    def series(self, scheme_code: str) -> tuple:
+        """
+        (dates, navs) of one scheme, oldest first. navs is a view into the
+        store; empty arrays for unknown schemes.
+        """
+        i = self.positions.get(str(scheme_code))
+        if i is None:
+            return np.empty(0, dtype='datetime64[D]'), np.empty(0, dtype=np.float64)
+        start, stop = self.starts[i], self.starts[i + 1]
+        return from_day_offsets(self.days[start:stop]), self.navs[start:stop]
+
+    def asof(self, scheme_codes, dates, tolerance_days: int = None) -> tuple:
+        """
+        As-of join: for each (scheme_code, date) pair, the latest NAV on or
+        before date.
+
+        Args:
+            scheme_codes: One code per pair (or a single code for all dates)
+            dates: One date per pair
+            tolerance_days (int): Ignore NAVs more than this many days older
+                than the requested date; 0 means exact matches only
+
+        Returns:
+            tuple: (navs float64 with NaN where nothing matched,
+                matched dates datetime64[D] with NaT where nothing matched)
+        """
+        days = np.atleast_1d(to_day_offsets(dates)).astype(np.int64)
+        positions = self._scheme_positions(scheme_codes)
+        if len(positions) == 1 and len(days) != 1:
+            positions = np.full(len(days), positions[0], dtype=np.int64)
+        return self._asof_positions(positions, days, tolerance_days)
+
+    def _asof_positions(self, positions: np.ndarray, days: np.ndarray, tolerance_days: int = None) -> tuple:
+        if not len(self.days):
+            return np.full(len(days), np.nan), np.full(len(days), np.datetime64('NaT', 'D'))
+        query = (np.maximum(positions, 0) << 32) | (days + _DAY_BIAS)
+        index = np.searchsorted(self.keys, query, side='right') - 1
+        safe = np.maximum(index, 0)
+        found = (positions >= 0) & (index >= 0) & (index < len(self.days))
+        found &= (self.keys[safe] >> 32) == positions
+        if tolerance_days is not None:
+            found &= days - self.days[safe] <= tolerance_days
+
+        navs = np.where(found, self.navs[safe], np.nan)
+        matched = np.where(found, from_day_offsets(self.days[safe]), np.datetime64('NaT', 'D'))
+        return navs, matched
+
+    def lookup(self, scheme_codes, dates) -> np.ndarray:
+        """NAVs for exact (scheme_code, date) pairs, NaN where not stored."""
+        return self.asof(scheme_codes, dates, tolerance_days=0)[0]
+
+    def align(self, dates, scheme_codes=None, fill: bool = True, tolerance_days: int = None) -> np.ndarray:
+        """
+        NAV matrix on a calendar: one row per date, one column per scheme.
+
+        Args:
+            dates: Calendar to align to (e.g. business days)
+            scheme_codes: Columns; all schemes in store order by default
+            fill (bool): Carry the last NAV forward over days without one
+                (as-of); otherwise only exact matches are filled
+            tolerance_days (int): Longest forward fill in days
+
+        Returns:
+            np.ndarray: float64 array of shape (len(dates), len(scheme_codes)), NaN where empty
+        """
+        dates = np.asarray(dates, dtype='datetime64[D]')
+        if scheme_codes is None:
+            positions = np.arange(len(self.scheme_codes), dtype=np.int64)
+        else:
+            positions = self._scheme_positions(scheme_codes)
+        days = to_day_offsets(dates).astype(np.int64)
+        matrix = np.empty((len(days), len(positions)))
+        # Search a block of rows at a time instead of every (date, scheme) pair at once
+        step = max(1, ALIGN_BATCH_CELLS // max(1, len(positions)))
+        for start in range(0, len(days), step):
+            block = days[start:start + step]
+            navs, _ = self._asof_positions(
+                np.tile(positions, len(block)),
+                np.repeat(block, len(positions)),
+                tolerance_days=tolerance_days if fill else 0,
+            )
+            matrix[start:start + len(block)] = navs.reshape(len(block), len(positions))
+        return matrix
@@ -0,0 +1,190 @@
+import os
+import gzip
+import shutil
+import logging
+from datetime import date as date_type, datetime
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+from pyarrow import fs
+from config.settings import ARCHIVE_DIR, ARCHIVE_COMPRESSION, ARCHIVE_RAW_FILES
+
+# Parser column -> archive column
+ARCHIVE_COLUMNS = {
+    "Scheme Type": "scheme_type",
+    "Scheme Category": "scheme_category",
+    "Scheme Sub-Category": "scheme_sub_category",
+    "Scheme Code": "scheme_code",
+    "ISIN Div Payout/ISIN Growth": "isin_growth",
+    "ISIN Div Reinvestment": "isin_reinv",
+    "Scheme Name": "scheme_name",
+    "Net Asset Value": "nav",
+    "Date": "nav_date",
+    "Fund Structure": "fund_structure",
+}
+
+ARCHIVE_SCHEMA = pa.schema([
+    ("scheme_type", pa.dictionary(pa.int32(), pa.string())),
+    ("scheme_category", pa.dictionary(pa.int32(), pa.string())),
+    ("scheme_sub_category", pa.dictionary(pa.int32(), pa.string())),
+    ("scheme_code", pa.string()),
+    ("isin_growth", pa.string()),
+    ("isin_reinv", pa.string()),
+    ("scheme_name", pa.string()),
+    ("nav", pa.float64()),
+    ("nav_date", pa.date32()),
+    ("fund_structure", pa.dictionary(pa.int32(), pa.string())),
+])
+
+
+def _as_date(date) -> date_type:
+    return date.date() if isinstance(date, datetime) else date
+
+
+def archive_path(date) -> str:
+    """data/archive/year=YYYY/month=MM/navall_YYYY-MM-DD.parquet"""
+    date = _as_date(date)
+    return os.path.join(ARCHIVE_DIR, f"year={date.year}", f"month={date.month:02d}",
+                        f"navall_{date.strftime('%Y-%m-%d')}.parquet")
+
+
+def has_day(date) -> bool:
+    return os.path.exists(archive_path(date))
+
+
+def to_archive_table(df: pd.DataFrame) -> pa.Table:
+    """Convert a validated NAV frame (string or typed) into the archive schema."""
+    data = {}
+    for column, archive_column in ARCHIVE_COLUMNS.items():
+        if column not in df.columns:
+            values = pd.Series([''] * len(df), dtype=object)
+        elif archive_column == 'nav':
+            values = df[column].astype('float64')
+        elif archive_column == 'nav_date':
+            values = pd.to_datetime(df[column]).dt.date
+        else:
+            values = df[column].astype(object)
+            values = values.where(values.notna(), '')
+        data[archive_column] = values.reset_index(drop=True)
+    return pa.Table.from_pandas(pd.DataFrame(data), schema=ARCHIVE_SCHEMA, preserve_index=False)
+
+
+def write_day(date, df: pd.DataFrame) -> str:
+    """
+    Archive one validated day as compressed Parquet, replacing any earlier copy.
+
+    Returns:
+        str: Path of the archive file
+    """
+    path = archive_path(date)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    pq.write_table(to_archive_table(df), tmp_path, compression=ARCHIVE_COMPRESSION)
+    os.replace(tmp_path, path)
+    logging.info(f"Archived {len(df)} rows to {path}")
+    return path
+
+
+def retire_raw_file(file_path: str, mode: str = ARCHIVE_RAW_FILES):
+    """
+    Compress or remove a downloaded NAV file whose day is archived and loaded.
+
+    Args:
+        file_path (str): Path of the downloaded text file
+        mode (str): 'gzip' replaces it with file_path + '.gz', 'delete'
+            removes it, 'keep' leaves it in place
+
+    Returns:
+        str: Path of what is left of the file, or None once deleted
+    """
+    if mode == 'keep' or not os.path.exists(file_path):
+        return file_path if mode == 'keep' else None
+    if mode == 'delete':
+        os.remove(file_path)
+        return None
+    if mode != 'gzip':
+        raise ValueError(f"Unknown ARCHIVE_RAW_FILES mode: {mode}")
+    gz_path = f"{file_path}.gz"
+    tmp_path = f"{gz_path}.tmp"
+    with open(file_path, 'rb') as src, gzip.open(tmp_path, 'wb') as dst:
+        shutil.copyfileobj(src, dst)
+    os.replace(tmp_path, gz_path)
+    os.remove(file_path)
+    return gz_path
+
+
+def to_nav_frame(table: pa.Table) -> pd.DataFrame:
+    """Archive table -> DataFrame with parser column names, ready for insert_nav."""
+    df = table.to_pandas()
+    df = df.rename(columns={v: k for k, v in ARCHIVE_COLUMNS.items()})
+    if 'Date' in df.columns:
+        df['Date'] = pd.to_datetime(df['Date'])
+    return df
+
+
+def read_day(date) -> pd.DataFrame:
+    """Read one archived day (memory-mapped) as a validated NAV frame."""
+    return to_nav_frame(pq.read_table(archive_path(date), memory_map=True))
+
+
+def _archive_files() -> list:
+    """Finished archive files; *.parquet.tmp files of a write in progress are left out."""
+    return sorted(
+        os.path.join(root, name)
+        for root, _, names in os.walk(ARCHIVE_DIR)
+        for name in names
+        if name.endswith('.parquet')
+    )
+
+
+def _dataset(files: list) -> ds.Dataset:
+    return ds.dataset(
+        files,
+        format='parquet',
+        partitioning='hive',
+        partition_base_dir=ARCHIVE_DIR,
+        filesystem=fs.LocalFileSystem(use_mmap=True),
+    )
+
+
+def read_archive(start_date=None, end_date=None, scheme_codes=None, columns=None) -> pa.Table:
+    """
+    Scan the archive with predicate pushdown on nav_date and scheme_code.
+
+    Files in year/month directories outside the date range are pruned
+    without being opened, and Parquet row-group statistics skip the rest.
+    Only finished *.parquet files are scanned, never the .tmp file of a
+    write_day in progress.
+
+    Args:
+        start_date: Optional first nav_date (inclusive)
+        end_date: Optional last nav_date (inclusive)
+        scheme_codes (iterable): Optional scheme codes to keep
+        columns (list): Optional archive columns to read
+
+    Returns:
+        pa.Table: Matching rows (partition columns year/month excluded)
+    """
+    files = _archive_files()
+    if not files:
+        return ARCHIVE_SCHEMA.empty_table() if columns is None else ARCHIVE_SCHEMA.empty_table().select(columns)
+
+    conditions = []
+    if start_date is not None:
+        start_date = _as_date(start_date)
+        conditions.append(ds.field('nav_date') >= pa.scalar(start_date, pa.date32()))
+        conditions.append(ds.field('year') >= start_date.year)
+    if end_date is not None:
+        end_date = _as_date(end_date)
+        conditions.append(ds.field('nav_date') <= pa.scalar(end_date, pa.date32()))
+        conditions.append(ds.field('year') <= end_date.year)
+    if scheme_codes is not None:
+        conditions.append(ds.field('scheme_code').isin([str(code) for code in scheme_codes]))
+
+    condition = None
+    for c in conditions:
+        condition = c if condition is None else condition & c
+
+    columns = columns or list(ARCHIVE_COLUMNS.values())
+    return _dataset(files).to_table(columns=columns, filter=condition)
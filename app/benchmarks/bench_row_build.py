@@ -0,0 +1,83 @@
+"""
+Before/after benchmark for building nav_data INSERT tuples from a DataFrame.
+
+Usage (from the app directory):
+    python -m benchmarks.bench_row_build --rows 2000000
+"""
+import argparse
+import time
+import numpy as np
+import pandas as pd
+from db.insert_nav import build_rows
+
+
+def make_frame(rows: int, days: int = 250, seed: int = 42) -> pd.DataFrame:
+    """Synthetic validated frame shaped like the output of validate_data."""
+    rng = np.random.default_rng(seed)
+    schemes = max(1, rows // days)
+    scheme_codes = np.arange(100000, 100000 + schemes).astype(str)
+    dates = pd.bdate_range('2020-01-01', periods=days)
+    idx = np.arange(rows)
+    return pd.DataFrame({
+        'Scheme Type': np.where(idx % 3 == 0, 'Open Ended Schemes', 'Close Ended Schemes'),
+        'Scheme Category': '',
+        'Scheme Sub-Category': '',
+        'Scheme Code': scheme_codes[idx % schemes],
+        'ISIN Div Payout/ISIN Growth': 'INF000000000',
+        'ISIN Div Reinvestment': '',
+        'Scheme Name': np.char.add('Scheme ', scheme_codes[idx % schemes]),
+        'Net Asset Value': rng.uniform(10, 5000, rows).round(4),
+        'Date': dates[idx // schemes % days],
+        'Fund Structure': 'Example Mutual Fund',
+    })
+
+
+def build_rows_iterrows(df: pd.DataFrame) -> list:
+    """The previous row-by-row implementation, kept for comparison."""
+    rows = []
+    for _, row in df.iterrows():
+        rows.append((
+            row.get('Scheme Type', ''),
+            row.get('Scheme Category', ''),
+            row.get('Scheme Sub-Category', ''),
+            row['Scheme Code'],
+            row.get('ISIN Div Payout/ISIN Growth', ''),
+            row.get('ISIN Div Reinvestment', ''),
+            row.get('Scheme Name', ''),
+            float(row['Net Asset Value']),
+            row['Date'].strftime('%Y-%m-%d'),
+            row.get('Fund Structure', '')
+        ))
+    return rows
+
+
+def _time(func, df):
+    start = time.perf_counter()
+    rows = func(df)
+    return time.perf_counter() - start, rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark nav_data row materialization')
+    parser.add_argument('--rows', type=int, default=2_000_000, help='Rows in the synthetic frame')
+    parser.add_argument('--baseline-rows', type=int, default=200_000,
+                        help='Rows timed with the iterrows baseline (extrapolated to --rows)')
+    args = parser.parse_args()
+
+    df = make_frame(args.rows)
+    baseline_df = df.iloc[:min(args.baseline_rows, args.rows)]
+
+    before, before_rows = _time(build_rows_iterrows, baseline_df)
+    after, after_rows = _time(build_rows, df)
+    assert before_rows == after_rows[:len(before_rows)], "Row builders disagree"
+
+    before_total = before * args.rows / len(baseline_df)
+    print(f"Rows: {args.rows:,}")
+    print(f"iterrows (extrapolated from {len(baseline_df):,} rows): {before_total:.2f}s "
+          f"({args.rows / before_total:,.0f} rows/s)")
+    print(f"build_rows: {after:.2f}s ({args.rows / after:,.0f} rows/s)")
+    print(f"Speedup: {before_total / after:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,254 @@
+"""
+Benchmark parse, validate, row building and load on synthetic AMFI files.
+
+Every stage runs on the same generated files and reports rows/sec, wall
+time, peak RSS of the process (psutil) and peak Python allocations
+(tracemalloc). Results are written as JSON; --compare checks them against
+an earlier run and exits with status 1 if any stage got slower than the
+threshold, so CI can flag regressions.
+
+The load stage runs against a SQLite stand-in by default, which measures
+the client side of the load (row building, chunking, executemany). With
+--db mysql it calls insert_nav against DB_CONFIG; point that at a
+throwaway database, such as the docker-compose MySQL container.
+
+Usage (from the app directory):
+    python -m benchmarks.bench_suite --sizes 1x15000,20x15000 --output bench/results.json
+    python -m benchmarks.bench_suite --compare bench/baseline.json --threshold 0.15
+"""
+import argparse
+import gc
+import json
+import os
+import platform
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from datetime import datetime
+from functools import partial
+import psutil
+from benchmarks.synthetic_nav import write_nav_file
+from parser.parse_nav import parse_nav_file
+from db.insert_nav import validate_data, build_rows, insert_nav
+from config.settings import INSERT_ENGINE, INSERT_INITIAL_CHUNK_ROWS
+
+SQLITE_SCHEMA = """
+    CREATE TABLE nav_data (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        scheme_type TEXT, scheme_category TEXT, scheme_sub_category TEXT,
+        scheme_code TEXT, isin_growth TEXT, isin_reinv TEXT, scheme_name TEXT,
+        nav REAL, nav_date TEXT NOT NULL, fund_structure TEXT,
+        UNIQUE (scheme_code, nav_date)
+    )
+"""
+
+SQLITE_UPSERT_SQL = """
+    INSERT INTO nav_data (
+        scheme_type, scheme_category, scheme_sub_category, scheme_code,
+        isin_growth, isin_reinv, scheme_name, nav, nav_date, fund_structure
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT (scheme_code, nav_date) DO UPDATE SET
+        nav = excluded.nav,
+        scheme_name = excluded.scheme_name,
+        fund_structure = excluded.fund_structure
+"""
+
+
+class PeakRss:
+    """Samples the process RSS in a background thread and keeps the maximum."""
+
+    def __init__(self, interval: float = 0.01):
+        self.interval = interval
+        self.process = psutil.Process()
+        self.peak = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _sample(self):
+        while not self._stop.is_set():
+            self.peak = max(self.peak, self.process.memory_info().rss)
+            self._stop.wait(self.interval)
+
+    def __enter__(self):
+        self.peak = self.process.memory_info().rss
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self.peak = max(self.peak, self.process.memory_info().rss)
+
+
+def measure(name: str, func, rows: int, trace_allocations: bool = True) -> tuple:
+    """
+    Run func() once and measure it.
+
+    Returns:
+        tuple: (result of func, measurement dict)
+    """
+    gc.collect()
+    if trace_allocations:
+        tracemalloc.start()
+    with PeakRss() as rss:
+        start = time.perf_counter()
+        result = func()
+        seconds = time.perf_counter() - start
+    allocated = None
+    if trace_allocations:
+        allocated = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    measurement = {
+        'stage': name,
+        'rows': rows,
+        'seconds': round(seconds, 6),
+        'rows_per_second': round(rows / seconds, 1) if seconds > 0 else None,
+        'peak_rss_bytes': rss.peak,
+        'peak_allocated_bytes': allocated,
+    }
+    return result, measurement
+
+
+def sqlite_load(rows: list, path: str, chunk_rows: int = INSERT_INITIAL_CHUNK_ROWS) -> int:
+    """Upsert rows into a fresh SQLite nav_data in chunks, one commit each."""
+    if os.path.exists(path):
+        os.remove(path)
+    conn = sqlite3.connect(path)
+    try:
+        conn.execute(SQLITE_SCHEMA)
+        for i in range(0, len(rows), chunk_rows):
+            conn.executemany(SQLITE_UPSERT_SQL, rows[i:i + chunk_rows])
+            conn.commit()
+        return conn.execute("SELECT COUNT(*) FROM nav_data").fetchone()[0]
+    finally:
+        conn.close()
+
+
+def run_size(days: int, schemes: int, work_dir: str, db: str, engine: str, typed: bool,
+             trace_allocations: bool) -> dict:
+    """Generate one file and benchmark every stage plus the end-to-end run on it."""
+    info = write_nav_file(os.path.join(work_dir, f"navall_{days}x{schemes}.txt"), schemes=schemes, days=days)
+    path = info['path']
+    rows = info['rows']
+    sqlite_path = os.path.join(work_dir, 'bench.sqlite3')
+
+    def load(df, built=None):
+        if db == 'mysql':
+            return insert_nav(df, engine=engine, validated=True)
+        return sqlite_load(built if built is not None else build_rows(df), sqlite_path)
+
+    # Stage inputs are bound with partial, not closed over, so the frames
+    # can be released before the end-to-end run
+    stages = []
+    df, m = measure('parse', partial(parse_nav_file, path, typed=typed), rows, trace_allocations)
+    stages.append(m)
+    valid, m = measure('validate', partial(validate_data, df, quarantine=False), len(df), trace_allocations)
+    stages.append(m)
+    built, m = measure('build_rows', partial(build_rows, valid), len(valid), trace_allocations)
+    stages.append(m)
+    _, m = measure(f'load_{db}', partial(load, valid, built), len(valid), trace_allocations)
+    stages.append(m)
+    del df, valid, built
+
+    def end_to_end():
+        frame = validate_data(parse_nav_file(path, typed=typed), quarantine=False)
+        return load(frame)
+
+    _, m = measure('end_to_end', end_to_end, rows, trace_allocations)
+    stages.append(m)
+
+    for stage in stages:
+        print(f"  {stage['stage']:<12} {stage['seconds']:>8.3f}s "
+              f"{stage['rows_per_second'] or 0:>14,.0f} rows/s "
+              f"rss {stage['peak_rss_bytes'] / 1e6:>8.1f} MB "
+              + (f"alloc {stage['peak_allocated_bytes'] / 1e6:>8.1f} MB" if stage['peak_allocated_bytes'] else ''))
+    return {'days': days, 'schemes': schemes, 'rows': rows, 'file_bytes': info['bytes'], 'stages': stages}
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> list:
+    """Stages whose rows/sec fell more than threshold below the baseline."""
+    def index(report):
+        return {
+            (size['days'], size['schemes'], stage['stage']): stage['rows_per_second']
+            for size in report['sizes'] for stage in size['stages']
+        }
+
+    old = index(baseline)
+    regressions = []
+    for key, rate in index(results).items():
+        before = old.get(key)
+        if before and rate and rate < before * (1 - threshold):
+            days, schemes, stage = key
+            regressions.append(f"{stage} at {days}x{schemes}: {rate:,.0f} rows/s vs {before:,.0f} baseline "
+                               f"({rate / before - 1:+.1%})")
+    return regressions
+
+
+def parse_sizes(spec: str) -> list:
+    """'1x15000,20x15000' -> [(1, 15000), (20, 15000)]"""
+    sizes = []
+    for part in spec.split(','):
+        days, schemes = part.lower().split('x')
+        sizes.append((int(days), int(schemes)))
+    return sizes
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the NAV parse/validate/load stages')
+    parser.add_argument('--sizes', default='1x15000,20x15000',
+                        help='Comma-separated DAYSxSCHEMES file sizes. Default: one day and a 20-day range dump')
+    parser.add_argument('--db', choices=['sqlite', 'mysql'], default='sqlite',
+                        help='Load target: SQLite stand-in or the MySQL database in DB_CONFIG')
+    parser.add_argument('--engine', default=INSERT_ENGINE, help='insert_nav engine for --db mysql')
+    parser.add_argument('--typed', action='store_true', help='Parse into typed columnar frames')
+    parser.add_argument('--no-tracemalloc', action='store_true',
+                        help='Skip allocation tracing, which slows pure-Python stages down')
+    parser.add_argument('--work-dir', default=None, help='Where to write generated files. Default: a temp dir')
+    parser.add_argument('--output', default='bench/results.json', help='JSON results file')
+    parser.add_argument('--compare', help='Earlier results JSON to check for regressions')
+    parser.add_argument('--threshold', type=float, default=0.15,
+                        help='Allowed rows/sec drop against --compare before failing. Default: 0.15')
+    args = parser.parse_args()
+
+    work_dir = args.work_dir or tempfile.mkdtemp(prefix='nav_bench_')
+    os.makedirs(work_dir, exist_ok=True)
+
+    results = {
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'python': sys.version.split()[0],
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'db': args.db,
+        'engine': args.engine if args.db == 'mysql' else 'sqlite',
+        'typed': args.typed,
+        'sizes': [],
+    }
+    for days, schemes in parse_sizes(args.sizes):
+        print(f"{days} day(s) x {schemes:,} schemes")
+        results['sizes'].append(run_size(days, schemes, work_dir, args.db, args.engine, args.typed,
+                                         not args.no_tracemalloc))
+
+    directory = os.path.dirname(args.output)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(args.output, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(f"Results written to {args.output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(results, json.load(f), args.threshold)
+        if regressions:
+            print("Regressions:")
+            for line in regressions:
+                print(f"  - {line}")
+            sys.exit(1)
+        print(f"No regressions beyond {args.threshold:.0%} against {args.compare}")
+
+
+if __name__ == "__main__":
+    main()
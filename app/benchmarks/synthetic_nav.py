@@ -0,0 +1,144 @@
+"""
+Synthetic AMFI NAV reports for benchmarks.
+
+Files follow the layout of the NAVAll history report: the column header,
+"Open Ended Schemes(...)" / "Close Ended Schemes(...)" section lines,
+fund house lines and 8-field semicolon records. A single-day file has one
+block per section; a range dump repeats the sections for every day, as the
+frmdt..todt report does.
+
+Usage (from the app directory):
+    python -m benchmarks.synthetic_nav --schemes 15000 --days 1 --output data/bench/navall_1d.txt
+"""
+import argparse
+import os
+import numpy as np
+import pandas as pd
+
+HEADER = ("Scheme Code;Scheme Name;ISIN Div Payout/ISIN Growth;ISIN Div Reinvestment;"
+          "Net Asset Value;Repurchase Price;Sale Price;Date")
+
+SECTIONS = [
+    "Open Ended Schemes(Debt Scheme - Banking and PSU Fund)",
+    "Open Ended Schemes(Debt Scheme - Liquid Fund)",
+    "Open Ended Schemes(Equity Scheme - Large Cap Fund)",
+    "Open Ended Schemes(Equity Scheme - Flexi Cap Fund)",
+    "Open Ended Schemes(Hybrid Scheme - Balanced Advantage)",
+    "Open Ended Schemes(Other Scheme - Index Funds)",
+    "Close Ended Schemes(Income)",
+    "Close Ended Schemes(Growth)",
+]
+
+FUND_HOUSES = [
+    "Aditya Birla Sun Life Mutual Fund",
+    "Axis Mutual Fund",
+    "HDFC Mutual Fund",
+    "ICICI Prudential Mutual Fund",
+    "Kotak Mahindra Mutual Fund",
+    "Nippon India Mutual Fund",
+    "SBI Mutual Fund",
+    "UTI Mutual Fund",
+]
+
+
+def make_schemes(schemes: int, seed: int = 42) -> pd.DataFrame:
+    """Scheme master: code, name, ISINs, section, fund house and starting NAV."""
+    rng = np.random.default_rng(seed)
+    codes = np.arange(100000, 100000 + schemes)
+    sections = rng.integers(0, len(SECTIONS), schemes)
+    houses = rng.integers(0, len(FUND_HOUSES), schemes)
+    plans = np.where(codes % 2 == 0, 'Direct Plan - Growth', 'Regular Plan - IDCW')
+    df = pd.DataFrame({
+        'code': codes.astype(str),
+        'name': [f"{FUND_HOUSES[h].replace(' Mutual Fund', '')} Scheme {c} - {p}"
+                 for h, c, p in zip(houses, codes, plans)],
+        'isin_growth': [f"INF{c:09d}" for c in codes],
+        'isin_reinv': np.where(codes % 2 == 0, '', [f"INF{c + 500000000:09d}" for c in codes]),
+        'section': sections,
+        'house': houses,
+        'nav': rng.uniform(10, 5000, schemes),
+    })
+    return df.sort_values(['section', 'house', 'code'], kind='stable').reset_index(drop=True)
+
+
+def nav_paths(schemes: pd.DataFrame, days: int, seed: int = 42) -> np.ndarray:
+    """NAVs of shape (days, schemes), a random walk from each scheme's starting NAV."""
+    rng = np.random.default_rng(seed + 1)
+    returns = rng.normal(0.0003, 0.01, (days, len(schemes)))
+    navs = schemes['nav'].to_numpy() * np.exp(np.cumsum(returns, axis=0))
+    return np.round(navs, 4)
+
+
+def write_nav_file(path: str, schemes: int = 15000, days: int = 1, start_date: str = '2024-01-01',
+                   bad_row_ratio: float = 0.001, seed: int = 42) -> dict:
+    """
+    Write a synthetic NAV report.
+
+    Args:
+        path (str): Output file
+        schemes (int): Schemes reported per day
+        days (int): Business days in the file (1 = daily file, more = range dump)
+        start_date (str): First NAV date
+        bad_row_ratio (float): Share of records with a non-numeric NAV, so
+            validation has rejects to count
+        seed (int): Random seed; the same arguments always give the same file
+
+    Returns:
+        dict: {'path', 'rows', 'bytes', 'days', 'schemes'}
+    """
+    master = make_schemes(schemes, seed)
+    navs = nav_paths(master, days, seed)
+    dates = pd.bdate_range(start_date, periods=days)
+    rng = np.random.default_rng(seed + 2)
+    bad = rng.random((days, schemes)) < bad_row_ratio
+
+    codes = master['code'].tolist()
+    names = master['name'].tolist()
+    isin_growth = master['isin_growth'].tolist()
+    isin_reinv = master['isin_reinv'].tolist()
+    sections = master['section'].to_numpy()
+    houses = master['house'].to_numpy()
+    # Row ranges of each (section, fund house) block
+    block_starts = np.flatnonzero(np.r_[True, (sections[1:] != sections[:-1]) | (houses[1:] != houses[:-1])])
+    block_ends = np.r_[block_starts[1:], len(master)]
+
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    rows = 0
+    with open(path, 'w', encoding='utf-8', newline='\r\n') as f:
+        f.write(HEADER + '\n\n')
+        for d, date in enumerate(dates):
+            nav_date = date.strftime('%d-%b-%Y')
+            day_navs = navs[d]
+            last_section = None
+            for start, end in zip(block_starts, block_ends):
+                if sections[start] != last_section:
+                    last_section = sections[start]
+                    f.write(f"{SECTIONS[last_section]}\n\n")
+                f.write(f"{FUND_HOUSES[houses[start]]}\n\n")
+                lines = []
+                for i in range(start, end):
+                    nav = 'N.A.' if bad[d, i] else f"{day_navs[i]:.4f}"
+                    lines.append(f"{codes[i]};{names[i]};{isin_growth[i]};{isin_reinv[i]};{nav};;;{nav_date}\n")
+                f.writelines(lines)
+                f.write('\n')
+                rows += int(end - start)
+    return {'path': path, 'rows': rows, 'bytes': os.path.getsize(path), 'days': days, 'schemes': schemes}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Write a synthetic AMFI NAV report')
+    parser.add_argument('--schemes', type=int, default=15000, help='Schemes per day')
+    parser.add_argument('--days', type=int, default=1, help='Business days in the file')
+    parser.add_argument('--start-date', default='2024-01-01', help='First NAV date (YYYY-MM-DD)')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', default='data/bench/navall_synthetic.txt')
+    args = parser.parse_args()
+
+    info = write_nav_file(args.output, args.schemes, args.days, args.start_date, seed=args.seed)
+    print(f"Wrote {info['rows']:,} rows ({info['bytes'] / 1e6:.1f} MB) to {info['path']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,105 @@
 import os
+import tempfile
 
 DB_CONFIG = {
     'host': os.getenv('MYSQL_HOST', 'mysqldb'),
     'user': os.getenv('MYSQL_USER', 'bob'),
     'password': os.getenv('MYSQL_PASSWORD', 'marley'),
     'database': os.getenv('MYSQL_DATABASE', 'dont_worry'),
-    'port': int(os.getenv('MYSQL_PORT', 3306))
+    'port': int(os.getenv('MYSQL_PORT', 3306)),
+    # LOAD DATA LOCAL INFILE stays off; only load_data engine connections
+    # enable it, limited to LOAD_DATA_DIR (see db.models.get_connection)
+    'allow_local_infile': False,
 }
 # NAVALL_BASE_URL = "https://portal.amfiindia.com/DownloadNAVHistoryReport_Po.aspx?frmdt="
-NAVALL_BASE_URL = "https://portal.amfiindia.com/DownloadNAVHistoryReport_Po.aspx?frmdt={}&todt={}"
+NAVALL_BASE_URL = os.getenv(
+    'NAVALL_BASE_URL',
+    "https://portal.amfiindia.com/DownloadNAVHistoryReport_Po.aspx?frmdt={}&todt={}")
+
+# Download engine
+DOWNLOAD_WORKERS = int(os.getenv('DOWNLOAD_WORKERS', 8))  # Thread pool size
+DOWNLOAD_MAX_PER_HOST = int(os.getenv('DOWNLOAD_MAX_PER_HOST', 4))  # Concurrent requests per host
+DOWNLOAD_TIMEOUT = float(os.getenv('DOWNLOAD_TIMEOUT', 30))  # Seconds per request
+DOWNLOAD_RETRIES = int(os.getenv('DOWNLOAD_RETRIES', 4))  # Retries after the first attempt
+DOWNLOAD_BACKOFF_BASE = float(os.getenv('DOWNLOAD_BACKOFF_BASE', 0.5))  # Seconds
+DOWNLOAD_BACKOFF_MAX = float(os.getenv('DOWNLOAD_BACKOFF_MAX', 30))  # Seconds
+
+# Range fetch: one request covers a frmdt..todt window of several days
+DOWNLOAD_RANGE_FETCH = os.getenv('DOWNLOAD_RANGE_FETCH', 'false').lower() == 'true'
+RANGE_INITIAL_DAYS = int(os.getenv('RANGE_INITIAL_DAYS', 7))  # Calendar days in the first window
+RANGE_MAX_DAYS = int(os.getenv('RANGE_MAX_DAYS', 31))  # Upper bound on window size
+RANGE_TARGET_BYTES = int(os.getenv('RANGE_TARGET_BYTES', 16 * 1024 * 1024))  # Desired response size
+
+# Parser
+NAV_FILE_ENCODING = os.getenv('NAV_FILE_ENCODING') or None  # Skip detection when set
+NAV_ENCODING_SAMPLE_BYTES = int(os.getenv('NAV_ENCODING_SAMPLE_BYTES', 64 * 1024))
+PARSE_BATCH_ROWS = int(os.getenv('PARSE_BATCH_ROWS', 50000))
+PARSE_BATCH_BYTES = int(os.getenv('PARSE_BATCH_BYTES', 16 * 1024 * 1024))  # File bytes per typed batch
+PARSE_TYPED = os.getenv('PARSE_TYPED', 'false').lower() == 'true'  # Typed columnar frames by default
+
+# Database load
+INSERT_ENGINE = os.getenv('INSERT_ENGINE', 'executemany')  # 'executemany' or 'load_data'
+# The only directory load_data connections may send files from (server must run with local_infile=1)
+LOAD_DATA_DIR = os.getenv('LOAD_DATA_DIR', os.path.join(tempfile.gettempdir(), 'amfi_nav_load'))
+INSERT_BATCH_BYTES = int(os.getenv('INSERT_BATCH_BYTES', 4 * 1024 * 1024))  # Upper bound per executemany statement
+INSERT_INITIAL_CHUNK_ROWS = int(os.getenv('INSERT_INITIAL_CHUNK_ROWS', 5000))
+INSERT_MIN_CHUNK_ROWS = int(os.getenv('INSERT_MIN_CHUNK_ROWS', 500))
+INSERT_MAX_CHUNK_ROWS = int(os.getenv('INSERT_MAX_CHUNK_ROWS', 50000))
+INSERT_TARGET_COMMIT_SECONDS = float(os.getenv('INSERT_TARGET_COMMIT_SECONDS', 1.0))  # Desired latency per chunk
+DB_POOL_NAME = os.getenv('DB_POOL_NAME', 'amfi_nav')
+DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', 5))  # 0 disables pooling
+DB_POOL_TIMEOUT = float(os.getenv('DB_POOL_TIMEOUT', 30))  # Seconds to wait for a free connection
+STORAGE_MODE = os.getenv('STORAGE_MODE', 'wide')  # 'wide' (nav_data) or 'normalized' (scheme_dim + nav_fact)
+
+# Read API cache
+NAV_CACHE_SIZE = int(os.getenv('NAV_CACHE_SIZE', 10000))  # Entries; 0 disables caching
+NAV_CACHE_TTL = float(os.getenv('NAV_CACHE_TTL', 300))  # Seconds an entry stays valid
+NAV_LOOKUP_FALLBACK_DAYS = int(os.getenv('NAV_LOOKUP_FALLBACK_DAYS', 7))  # Calendar days searched back for a NAV
+
+# Precomputed returns and drawdowns (nav_metrics)
+METRICS_REFRESH = os.getenv('METRICS_REFRESH', 'true').lower() == 'true'  # Refresh after the daily job
+METRICS_SOURCE = os.getenv('METRICS_SOURCE', 'database')  # 'database' or 'archive'
+METRICS_MAX_FILL_DAYS = int(os.getenv('METRICS_MAX_FILL_DAYS', 10))  # Longest forward fill of a missing NAV
+
+# Partition maintenance, run before each load
+PARTITION_MAINTENANCE = os.getenv('PARTITION_MAINTENANCE', 'true').lower() == 'true'
+PARTITION_AHEAD = int(os.getenv('PARTITION_AHEAD', 2))  # Future partitions (years or months) kept ready
+PARTITION_RETENTION_YEARS = int(os.getenv('PARTITION_RETENTION_YEARS', 0))  # 0 keeps all history
+PARTITION_RETENTION_ACTION = os.getenv('PARTITION_RETENTION_ACTION', 'archive')  # 'archive' or 'drop'
+
+# Pipelined download -> parse -> load
+PIPELINE_DOWNLOAD_WORKERS = int(os.getenv('PIPELINE_DOWNLOAD_WORKERS', DOWNLOAD_WORKERS))
+PIPELINE_PARSE_WORKERS = int(os.getenv('PIPELINE_PARSE_WORKERS', os.cpu_count() or 2))  # Processes
+PIPELINE_LOAD_WORKERS = int(os.getenv('PIPELINE_LOAD_WORKERS', 2))  # Each holds one DB connection
+PIPELINE_QUEUE_SIZE = int(os.getenv('PIPELINE_QUEUE_SIZE', 8))  # Items buffered between stages
+YEARLY_WORKERS = int(os.getenv('YEARLY_WORKERS', 4))  # Processes for --yearly, one partition (year) each
+
+# Local ingestion manifest (SQLite)
+MANIFEST_PATH = os.getenv('MANIFEST_PATH', 'data/manifest.sqlite3')
+MANIFEST_HOLIDAY_GRACE_DAYS = int(os.getenv('MANIFEST_HOLIDAY_GRACE_DAYS', 3))  # Empty days newer than this are retried
+TRADING_HOLIDAYS_FILE = os.getenv('TRADING_HOLIDAYS_FILE') or None  # Known holidays, one YYYY-MM-DD per line
+
+# Gap detection
+GAP_BASELINE_DAYS = int(os.getenv('GAP_BASELINE_DAYS', 21))  # Trading days in the rolling row-count baseline
+GAP_PARTIAL_RATIO = float(os.getenv('GAP_PARTIAL_RATIO', 0.9))  # Days below this share of the baseline are reloaded
+
+# Local columnar archive (Parquet)
+ARCHIVE_ENABLED = os.getenv('ARCHIVE_ENABLED', 'true').lower() == 'true'
+ARCHIVE_DIR = os.getenv('ARCHIVE_DIR', 'data/archive')
+ARCHIVE_COMPRESSION = os.getenv('ARCHIVE_COMPRESSION', 'zstd')
+ARCHIVE_RAW_FILES = os.getenv('ARCHIVE_RAW_FILES', 'gzip')  # Downloaded file once archived and loaded: gzip, delete, keep
+NAV_MMAP_THRESHOLD_BYTES = int(os.getenv('NAV_MMAP_THRESHOLD_BYTES', 8 * 1024 * 1024))  # Typed parser maps larger files
+
+# Telemetry
+TELEMETRY_SINKS = os.getenv('TELEMETRY_SINKS', '')  # Comma-separated: prometheus, jsonl, statsd
+TELEMETRY_PREFIX = os.getenv('TELEMETRY_PREFIX', 'amfi_nav')
+TELEMETRY_PROMETHEUS_PATH = os.getenv('TELEMETRY_PROMETHEUS_PATH', 'data/metrics/amfi_nav.prom')  # node_exporter textfile
+TELEMETRY_JSONL_PATH = os.getenv('TELEMETRY_JSONL_PATH', 'logs/telemetry.jsonl')
+STATSD_HOST = os.getenv('STATSD_HOST', 'localhost')
+STATSD_PORT = int(os.getenv('STATSD_PORT', 8125))
+PROFILER = os.getenv('PROFILER', '')  # '', 'cprofile' or 'pyinstrument'
+PROFILE_DIR = os.getenv('PROFILE_DIR', 'logs/profiles')
+
+# Validation
+QUARANTINE_ENABLED = os.getenv('QUARANTINE_ENABLED', 'true').lower() == 'true'
+QUARANTINE_DIR = os.getenv('QUARANTINE_DIR', 'data/quarantine')  # Rejected rows with reason codes
@@ -0,0 +1,200 @@
+import logging
+import time
+from telemetry.instruments import get_telemetry
+from config.settings import (
+    INSERT_BATCH_BYTES,
+    INSERT_INITIAL_CHUNK_ROWS,
+    INSERT_MIN_CHUNK_ROWS,
+    INSERT_MAX_CHUNK_ROWS,
+    INSERT_TARGET_COMMIT_SECONDS,
+)
+
+# Fraction of max_allowed_packet a single statement may use
+PACKET_HEADROOM = 0.9
+# Per-value overhead of the rendered INSERT (quotes, comma, escaping slack)
+VALUE_OVERHEAD_BYTES = 4
+# Per-row overhead of the rendered INSERT (parentheses and separator)
+ROW_OVERHEAD_BYTES = 4
+
+
+def estimate_row_bytes(row: tuple) -> int:
+    """Approximate size of a row once rendered into a multi-row INSERT."""
+    return sum(len(str(value)) for value in row) + VALUE_OVERHEAD_BYTES * len(row) + ROW_OVERHEAD_BYTES
+
+
+def get_max_allowed_packet(cursor) -> int:
+    """Read the server's max_allowed_packet, or None if it cannot be read."""
+    try:
+        cursor.execute("SELECT @@max_allowed_packet")
+        return int(cursor.fetchone()[0])
+    except Exception as e:
+        logging.warning(f"Could not read max_allowed_packet: {str(e)}")
+        return None
+
+
+class ChunkSizer:
+    """
+    Splits rows into executemany chunks sized by bytes and commit latency.
+
+    Every chunk stays under a byte budget (INSERT_BATCH_BYTES, capped by the
+    server's max_allowed_packet). Within that budget the row limit moves
+    towards the size that would make each commit take
+    INSERT_TARGET_COMMIT_SECONDS, based on the latency of the last commit.
+    """
+
+    def __init__(self, max_allowed_packet: int = None,
+                 max_bytes: int = INSERT_BATCH_BYTES,
+                 initial_rows: int = INSERT_INITIAL_CHUNK_ROWS,
+                 min_rows: int = INSERT_MIN_CHUNK_ROWS,
+                 max_rows: int = INSERT_MAX_CHUNK_ROWS,
+                 target_seconds: float = INSERT_TARGET_COMMIT_SECONDS):
+        if max_allowed_packet:
+            max_bytes = min(max_bytes, int(max_allowed_packet * PACKET_HEADROOM))
+        self.max_bytes = max_bytes
+        self.min_rows = min_rows
+        self.max_rows = max_rows
+        self.target_seconds = target_seconds
+        self.rows_limit = max(min_rows, min(max_rows, initial_rows))
+
+    def next_chunk(self, rows: list, start: int) -> int:
+        """
+        Return the end index of the chunk starting at start.
+
+        A chunk always holds at least one row, even if that row alone
+        exceeds the byte budget.
+        """
+        limit = min(len(rows), start + self.rows_limit)
+        size = 0
+        end = start
+        while end < limit:
+            size += estimate_row_bytes(rows[end])
+            if size > self.max_bytes and end > start:
+                break
+            end += 1
+        return end
+
+    def record(self, rows: int, seconds: float):
+        """Adjust the row limit from the latency of a committed chunk."""
+        if rows <= 0 or seconds <= 0:
+            return
+        ideal = rows * self.target_seconds / seconds
+        # Move halfway towards the ideal size and at most double per step
+        new_limit = min(self.rows_limit * 2, (self.rows_limit + ideal) / 2)
+        self.rows_limit = int(max(self.min_rows, min(self.max_rows, new_limit)))
+
+
+def dedupe_rows(rows: list, key_columns: tuple) -> list:
+    """
+    Drop all but the last row of every repeated key, keeping row order.
+
+    The last row is what a sequence of upserts would leave in the table,
+    so the result loads the same data with one row per key.
+    """
+    last = {}
+    for i, row in enumerate(rows):
+        last[tuple(row[c] for c in key_columns)] = i
+    if len(last) == len(rows):
+        return rows
+    logging.warning(f"Dropped {len(rows) - len(last)} rows with a repeated key; the last one of each is loaded")
+    return [rows[i] for i in sorted(last.values())]
+
+
+def split_upsert_counts(rows: int, existing: int, affected: int) -> tuple:
+    """
+    Derive (inserted, updated, unchanged) for an ON DUPLICATE KEY UPDATE batch.
+
+    MySQL reports 1 affected row per insert, 2 per changed row and 0 per
+    row whose values did not change (without the CLIENT_FOUND_ROWS flag).
+    existing is how many of the batch keys were already in the table.
+    Every key must appear once in the batch (see dedupe_rows): a repeated
+    key is counted once by the existence check but affects rows twice.
+    """
+    inserted = max(0, rows - existing)
+    updated = max(0, min(existing, (affected - inserted) // 2))
+    unchanged = existing - updated
+    return inserted, updated, unchanged
+
+
+def count_existing_keys(cursor, chunk: list, check_sql: str, key_columns: tuple) -> int:
+    """
+    Count how many keys of chunk are already stored.
+
+    check_sql has a single {} where the (%s, %s), ... row list goes, and
+    key_columns are the positions of the two key values in each row.
+    """
+    placeholders = ', '.join(['(%s, %s)'] * len(chunk))
+    params = []
+    for row in chunk:
+        params.extend(row[i] for i in key_columns)
+    cursor.execute(check_sql.format(placeholders), params)
+    return cursor.fetchone()[0]
+
+
+def executemany_upsert(conn, cursor, rows: list, insert_sql: str, check_sql: str, key_columns: tuple) -> tuple:
+    """
+    Upsert rows with executemany in ChunkSizer-sized chunks, one commit each.
+
+    Keys repeated within a chunk are reduced to their last row first, so
+    the insert/update split stays exact; repeats across chunks need no
+    handling because the earlier chunk is committed before the next count.
+
+    Args:
+        conn: Open connection
+        cursor: Cursor on conn
+        rows (list): Parameter tuples for insert_sql
+        insert_sql (str): INSERT ... ON DUPLICATE KEY UPDATE statement
+        check_sql (str): Key count query for count_existing_keys
+        key_columns (tuple): Positions of the unique key values in each row
+
+    Returns:
+        tuple: (inserted, updated, unchanged)
+    """
+    sizer = ChunkSizer(max_allowed_packet=get_max_allowed_packet(cursor))
+    logging.info(
+        f"Chunking by byte budget {sizer.max_bytes} bytes, "
+        f"starting at {sizer.rows_limit} rows per chunk"
+    )
+
+    total_inserted = 0
+    total_updated = 0
+    total_unchanged = 0
+    chunk_number = 0
+    i = 0
+
+    while i < len(rows):
+        end = sizer.next_chunk(rows, i)
+        chunk = dedupe_rows(rows[i:end], key_columns)
+        chunk_number += 1
+        try:
+            chunk_start = time.perf_counter()
+            existing = count_existing_keys(cursor, chunk, check_sql, key_columns)
+            cursor.executemany(insert_sql, chunk)
+            affected_rows = cursor.rowcount
+            with get_telemetry().timer('db_commit'):
+                conn.commit()
+            elapsed = time.perf_counter() - chunk_start
+        except Exception as chunk_error:
+            logging.error(f"Error processing chunk {chunk_number}: {str(chunk_error)}")
+            conn.rollback()
+            raise
+
+        inserted, updated, unchanged = split_upsert_counts(len(chunk), existing, affected_rows)
+        total_inserted += inserted
+        total_updated += updated
+        total_unchanged += unchanged
+
+        logging.info(
+            f"Chunk {chunk_number}: "
+            f"Rows: {len(chunk)}, "
+            f"Affected rows: {affected_rows}, "
+            f"Inserted: {inserted}, "
+            f"Updated: {updated}, "
+            f"Unchanged: {unchanged}, "
+            f"Commit latency: {elapsed:.3f}s, "
+            f"Throughput: {len(chunk) / elapsed if elapsed else 0:.0f} rows/s"
+        )
+
+        sizer.record(len(chunk), elapsed)
+        i = end
+
+    return total_inserted, total_updated, total_unchanged
@@ -0,0 +1,85 @@
+import logging
+import numpy as np
+import pandas as pd
+from db.manifest import file_hash, get_loaded_hash, set_loaded_hash, get_fingerprints, save_fingerprints
+
+# Index of scheme_code and nav_date in the tuples built by insert_nav.build_rows
+SCHEME_CODE_INDEX = 3
+NAV_DATE_INDEX = 8
+
+
+def fingerprint_rows(rows: list) -> np.ndarray:
+    """Stable 64-bit fingerprint of every row tuple, computed column-wise."""
+    if not rows:
+        return np.empty(0, dtype=np.uint64)
+    frame = pd.DataFrame.from_records(rows)
+    return pd.util.hash_pandas_object(frame, index=False).to_numpy(np.uint64)
+
+
+def _rows_by_date(rows: list) -> dict:
+    groups = {}
+    for i, row in enumerate(rows):
+        groups.setdefault(row[NAV_DATE_INDEX], []).append(i)
+    return groups
+
+
+def _stored_fingerprints(nav_date: str) -> dict:
+    stored = get_fingerprints(nav_date)
+    if stored is None:
+        return {}
+    scheme_codes, row_hashes = stored
+    return dict(zip(scheme_codes, np.frombuffer(row_hashes, dtype=np.uint64).tolist()))
+
+
+def diff_rows(rows: list, fingerprints: np.ndarray) -> tuple:
+    """
+    Keep only rows that are new or changed since the last load.
+
+    Args:
+        rows (list): Row tuples from build_rows
+        fingerprints (np.ndarray): fingerprint_rows(rows)
+
+    Returns:
+        tuple: (changed_rows, changes) where changes lists
+            (scheme_code, nav_date, 'new' | 'changed') for every kept row
+    """
+    changed_rows = []
+    changes = []
+    hashes = fingerprints.tolist()
+    for nav_date, indexes in _rows_by_date(rows).items():
+        stored = _stored_fingerprints(nav_date)
+        for i in indexes:
+            scheme_code = rows[i][SCHEME_CODE_INDEX]
+            previous = stored.get(scheme_code)
+            if previous == hashes[i]:
+                continue
+            changed_rows.append(rows[i])
+            changes.append((scheme_code, nav_date, 'new' if previous is None else 'changed'))
+    return changed_rows, changes
+
+
+def save_row_fingerprints(rows: list, fingerprints: np.ndarray):
+    """Store the fingerprints of loaded rows, merged into what each day already has."""
+    hashes = fingerprints.tolist()
+    for nav_date, indexes in _rows_by_date(rows).items():
+        stored = _stored_fingerprints(nav_date)
+        for i in indexes:
+            stored[rows[i][SCHEME_CODE_INDEX]] = hashes[i]
+        scheme_codes = list(stored)
+        row_hashes = np.array([stored[code] for code in scheme_codes], dtype=np.uint64).tobytes()
+        save_fingerprints(nav_date, scheme_codes, row_hashes)
+
+
+def file_unchanged_since_load(date, file_path: str) -> bool:
+    """True when file_path is byte-identical to the file last loaded for date."""
+    loaded_hash = get_loaded_hash(date)
+    if loaded_hash is None:
+        return False
+    unchanged = loaded_hash == file_hash(file_path)
+    if unchanged:
+        logging.info(f"{file_path} unchanged since last load")
+    return unchanged
+
+
+def mark_file_loaded(date, file_path: str):
+    set_loaded_hash(date, file_hash(file_path))
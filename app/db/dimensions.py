@@ -0,0 +1,191 @@
+import os
+import logging
+import threading
+from db.batching import executemany_upsert
+
+# Positions in a build_rows tuple
+SCHEME_CODE_INDEX = 3
+NAV_INDEX = 7
+NAV_DATE_INDEX = 8
+# Scheme attributes kept on the dimension row, in SCHEME_UPSERT_SQL order after scheme_code
+SCHEME_ATTRIBUTE_INDEXES = (0, 1, 2, 4, 5, 6, 9)
+
+# Codes per IN (...) lookup
+LOOKUP_BATCH_SIZE = 1000
+
+SCHEME_ATTRIBUTE_COLUMNS = (
+    'scheme_type', 'scheme_category', 'scheme_sub_category',
+    'isin_growth', 'isin_reinv', 'scheme_name', 'fund_structure',
+)
+
+SCHEME_LOOKUP_SQL = """
+    SELECT scheme_code, scheme_id, last_nav_date, {columns}
+    FROM scheme_dim
+    WHERE scheme_code IN ({{}})
+""".format(columns=', '.join(SCHEME_ATTRIBUTE_COLUMNS))
+
+# Type 1 slowly changing dimension: attributes are overwritten in place, but
+# only by rows at least as recent as the ones they came from, so backfills
+# and out-of-order days never bring back old names or categories.
+# last_nav_date is assigned last because MySQL applies assignments in order.
+SCHEME_UPSERT_SQL = """
+    INSERT INTO scheme_dim (
+        scheme_code, {columns}, last_nav_date
+    ) VALUES (%s, {placeholders}, %s)
+    ON DUPLICATE KEY UPDATE
+        {updates},
+        last_nav_date = GREATEST(COALESCE(last_nav_date, VALUES(last_nav_date)), VALUES(last_nav_date))
+""".format(
+    columns=', '.join(SCHEME_ATTRIBUTE_COLUMNS),
+    placeholders=', '.join(['%s'] * len(SCHEME_ATTRIBUTE_COLUMNS)),
+    updates=',\n        '.join(
+        f"{column} = IF(last_nav_date IS NULL OR VALUES(last_nav_date) >= last_nav_date, "
+        f"VALUES({column}), {column})"
+        for column in SCHEME_ATTRIBUTE_COLUMNS
+    ),
+)
+
+FACT_INSERT_SQL = """
+    INSERT INTO nav_fact (scheme_id, nav, nav_date)
+    VALUES (%s, %s, %s)
+    ON DUPLICATE KEY UPDATE
+        nav = VALUES(nav)
+"""
+
+FACT_CHECK_EXISTING_SQL = """
+    SELECT COUNT(*)
+    FROM nav_fact
+    WHERE (scheme_id, nav_date) IN ({})
+"""
+
+
+def _date_key(value) -> str:
+    """'YYYY-MM-DD' for a DATE column value or build_rows nav_date, None for NULL."""
+    if value is None:
+        return None
+    return value if isinstance(value, str) else value.strftime('%Y-%m-%d')
+
+
+class SchemeCache:
+    """
+    In-process map of scheme_code -> scheme_id plus the attributes last
+    written to scheme_dim and the nav_date they came from.
+
+    Known schemes whose attributes and nav_date did not move cost nothing
+    per load. Unknown codes are looked up in bulk; schemes that are new,
+    changed (renames, recategorisation) or seen on a later nav_date are
+    upserted. Rows older than the stored attributes never replace them.
+    """
+
+    def __init__(self):
+        self.ids = {}
+        self.attributes = {}
+        self.nav_dates = {}
+        self._lock = threading.Lock()
+
+    def clear(self):
+        with self._lock:
+            self.ids.clear()
+            self.attributes.clear()
+            self.nav_dates.clear()
+
+    def _lookup(self, cursor, codes: list):
+        for i in range(0, len(codes), LOOKUP_BATCH_SIZE):
+            batch = codes[i:i + LOOKUP_BATCH_SIZE]
+            cursor.execute(SCHEME_LOOKUP_SQL.format(', '.join(['%s'] * len(batch))), batch)
+            for code, scheme_id, last_nav_date, *attributes in cursor.fetchall():
+                self.ids[code] = scheme_id
+                self.nav_dates[code] = _date_key(last_nav_date)
+                self.attributes[code] = tuple('' if value is None else value for value in attributes)
+
+    def _needs_write(self, code: str, nav_date: str, attributes: tuple) -> bool:
+        """True if a row for nav_date is new or more recent than what scheme_dim holds."""
+        if code not in self.ids:
+            return True
+        stored_date = self.nav_dates.get(code)
+        if stored_date is None:
+            return True
+        if nav_date < stored_date:
+            return False
+        # A later nav_date is written even with the same attributes, so an
+        # older backfill row cannot pass the date check afterwards
+        return nav_date > stored_date or self.attributes.get(code) != attributes
+
+    def resolve(self, conn, cursor, rows: list) -> dict:
+        """
+        Make sure every scheme in rows has a scheme_dim row with current
+        attributes and return scheme_code -> scheme_id for them.
+
+        Args:
+            conn: Open connection; dimension changes are committed on it
+            cursor: Cursor on conn
+            rows (list): Tuples from build_rows
+
+        Returns:
+            dict: scheme_code -> scheme_id
+        """
+        # The latest nav_date wins; the last occurrence among equal dates
+        latest = {}
+        for row in rows:
+            code = row[SCHEME_CODE_INDEX]
+            nav_date = _date_key(row[NAV_DATE_INDEX])
+            if code not in latest or nav_date >= latest[code][0]:
+                latest[code] = (nav_date, tuple(row[i] for i in SCHEME_ATTRIBUTE_INDEXES))
+
+        with self._lock:
+            unknown = [code for code in latest if code not in self.ids]
+            if unknown:
+                self._lookup(cursor, unknown)
+
+            changed = [code for code, (nav_date, attributes) in latest.items()
+                       if self._needs_write(code, nav_date, attributes)]
+            if changed:
+                new = [code for code in changed if code not in self.ids]
+                try:
+                    cursor.executemany(SCHEME_UPSERT_SQL, [
+                        (code,) + latest[code][1] + (latest[code][0],) for code in changed
+                    ])
+                    conn.commit()
+                except Exception:
+                    conn.rollback()
+                    raise
+                for code in changed:
+                    self.nav_dates[code], self.attributes[code] = latest[code]
+                if new:
+                    self._lookup(cursor, new)
+                logging.info(
+                    f"scheme_dim: {len(new)} new schemes, {len(changed) - len(new)} updated"
+                )
+
+            return {code: self.ids[code] for code in latest}
+
+
+_cache = None
+_cache_pid = None
+_cache_lock = threading.Lock()
+
+
+def get_scheme_cache() -> SchemeCache:
+    """Return this process's SchemeCache, starting empty after a fork."""
+    global _cache, _cache_pid
+    with _cache_lock:
+        if _cache is None or _cache_pid != os.getpid():
+            _cache = SchemeCache()
+            _cache_pid = os.getpid()
+    return _cache
+
+
+def insert_normalized(conn, cursor, rows: list) -> tuple:
+    """
+    Upsert build_rows tuples into scheme_dim and nav_fact.
+
+    Returns:
+        tuple: (inserted, updated, unchanged) for nav_fact
+    """
+    scheme_ids = get_scheme_cache().resolve(conn, cursor, rows)
+    fact_rows = [
+        (scheme_ids[row[SCHEME_CODE_INDEX]], row[NAV_INDEX], row[NAV_DATE_INDEX])
+        for row in rows
+    ]
+    return executemany_upsert(conn, cursor, fact_rows, FACT_INSERT_SQL, FACT_CHECK_EXISTING_SQL,
+                              key_columns=(0, 2))
@@ -1,8 +1,17 @@
-import psutil
+import os
 import logging
+import tempfile
+import time
+import numpy as np
 import pandas as pd
 from datetime import datetime
-from db.models import get_connection
+from db.models import connection_scope
+from db.delta import fingerprint_rows, diff_rows, save_row_fingerprints
+from db.batching import dedupe_rows, executemany_upsert, split_upsert_counts
+from db.dimensions import insert_normalized
+from db.query_nav import invalidate_loaded_rows
+from telemetry.instruments import get_telemetry
+from config.settings import INSERT_ENGINE, LOAD_DATA_DIR, QUARANTINE_ENABLED, QUARANTINE_DIR, STORAGE_MODE
 
 # Configure logging
 logging.basicConfig(
@@ -14,12 +23,36 @@ logging.basicConfig(
     ]
 )
 
-def validate_data(df: pd.DataFrame) -> pd.DataFrame:
+# Largest value that fits DECIMAL(10,4)
+MAX_NAV = 999999.9999
+
+# Reason codes for rejected rows, in the order they are checked
+REJECT_REASONS = ['invalid_nav', 'invalid_date', 'nav_out_of_range']
+
+def quarantine_rows(rejected: pd.DataFrame) -> str:
+    """
+    Append rejected rows, with their reject_reason column, to this process's
+    quarantine file for today.
+    
+    Returns:
+        str: Path of the quarantine file
+    """
+    os.makedirs(QUARANTINE_DIR, exist_ok=True)
+    path = os.path.join(QUARANTINE_DIR, f"rejects_{datetime.now().strftime('%Y-%m-%d')}_{os.getpid()}.csv")
+    rejected.to_csv(path, mode='a', header=not os.path.exists(path), index=False)
+    return path
+
+def validate_data(df: pd.DataFrame, quarantine: bool = QUARANTINE_ENABLED) -> pd.DataFrame:
     """
     Validate and clean the NAV data before insertion.
     
+    All checks are combined into one boolean mask and invalid rows are
+    dropped in a single step. Rejections are logged as one line of counters
+    per reason and, if quarantine is on, written in bulk to QUARANTINE_DIR.
+    
     Args:
         df (pd.DataFrame): Input DataFrame containing NAV data
+        quarantine (bool): Write rejected rows with a reject_reason column
         
     Returns:
         pd.DataFrame: Cleaned and validated DataFrame
@@ -27,215 +60,440 @@ def validate_data(df: pd.DataFrame) -> pd.DataFrame:
     if df.empty:
         raise ValueError("Empty DataFrame received")
     
-    # Check if first row contains header values
-    if df.iloc[0, 0] == 'Scheme Code':
-        df = df.iloc[1:].reset_index(drop=True)
-        logging.warning("Header row detected and removed")
-    
     # Validate required columns
     required_columns = ['Scheme Code', 'Scheme Name', 'Net Asset Value', 'Date']
     missing_columns = [col for col in required_columns if col not in df.columns]
     if missing_columns:
         raise ValueError(f"Missing required columns: {missing_columns}")
     
-    # Convert data types and handle invalid values
+    validate_start = time.perf_counter()
     try:
-        # Create a copy of the DataFrame to avoid SettingWithCopyWarning
-        df = df.copy()
-        
-        # Convert NAV to numeric, handling non-numeric values
-        df.loc[:, 'Net Asset Value'] = pd.to_numeric(df['Net Asset Value'], errors='coerce')
-        
-        # Log rows with invalid NAV values
-        invalid_nav_rows = df[df['Net Asset Value'].isna()]
-        if not invalid_nav_rows.empty:
-            logging.warning(f"Found {len(invalid_nav_rows)} rows with invalid NAV values")
-            for idx, row in invalid_nav_rows.iterrows():
-                logging.warning(f"Row {idx}: Invalid NAV value '{row['Net Asset Value']}' for scheme {row['Scheme Name']}")
-        
-        # Remove rows with invalid NAV values
-        df = df.dropna(subset=['Net Asset Value'])
-        
-        # Convert date to datetime
-        df.loc[:, 'Date'] = pd.to_datetime(df['Date'], format='%d-%b-%Y', errors='coerce')
+        # The column header line parses like a record; drop it without quarantining
+        is_header = (df['Scheme Code'].astype(object) == 'Scheme Code').to_numpy()
         
-        # Log rows with invalid dates
-        invalid_date_rows = df[df['Date'].isna()]
-        if not invalid_date_rows.empty:
-            logging.warning(f"Found {len(invalid_date_rows)} rows with invalid dates")
-            for idx, row in invalid_date_rows.iterrows():
-                logging.warning(f"Row {idx}: Invalid date '{row['Date']}' for scheme {row['Scheme Name']}")
+        # Convert data types; already-typed columns pass through unchanged
+        nav = df['Net Asset Value']
+        if not pd.api.types.is_float_dtype(nav):
+            nav = pd.to_numeric(nav, errors='coerce')
+        dates = df['Date']
+        if not pd.api.types.is_datetime64_any_dtype(dates):
+            dates = pd.to_datetime(dates, format='%d-%b-%Y', errors='coerce')
         
-        # Remove rows with invalid dates
-        df = df.dropna(subset=['Date'])
+        invalid_nav = nav.isna().to_numpy() & ~is_header
+        invalid_date = dates.isna().to_numpy() & ~is_header & ~invalid_nav
+        nav_out_of_range = (nav > MAX_NAV).to_numpy() & ~is_header & ~invalid_date
+        rejected = invalid_nav | invalid_date | nav_out_of_range
+        valid = ~(rejected | is_header)
         
-        # Ensure NAV values are within valid range for DECIMAL(10,4)
-        max_nav = 999999.9999
-        invalid_range_rows = df[df['Net Asset Value'] > max_nav]
-        if not invalid_range_rows.empty:
-            logging.warning(f"Found {len(invalid_range_rows)} rows with NAV values exceeding {max_nav}")
-            for idx, row in invalid_range_rows.iterrows():
-                logging.warning(f"Row {idx}: NAV value {row['Net Asset Value']} exceeds maximum allowed value for scheme {row['Scheme Name']}")
+        counts = {
+            'invalid_nav': int(invalid_nav.sum()),
+            'invalid_date': int(invalid_date.sum()),
+            'nav_out_of_range': int(nav_out_of_range.sum()),
+        }
+        telemetry = get_telemetry()
+        telemetry.incr('validate_rows', len(df))
+        for reason in REJECT_REASONS:
+            if counts[reason]:
+                telemetry.incr('validate_rejects', counts[reason], reason=reason)
+        if rejected.any():
+            logging.warning(
+                f"Rejected {int(rejected.sum())} rows: "
+                + ", ".join(f"{reason}={counts[reason]}" for reason in REJECT_REASONS)
+            )
+            if quarantine:
+                reasons = np.select([invalid_nav, invalid_date, nav_out_of_range], REJECT_REASONS, default='')
+                path = quarantine_rows(df.loc[rejected].assign(reject_reason=reasons[rejected]))
+                logging.info(f"Quarantined rejected rows to {path}")
         
-        # Remove rows with NAV values exceeding maximum
-        df = df[df['Net Asset Value'] <= max_nav]
+        # Drop invalid rows once and round NAV values to 4 decimal places
+        df = df.loc[valid].assign(**{
+            'Net Asset Value': nav[valid].round(4),
+            'Date': dates[valid],
+        }).reset_index(drop=True)
         
-        # Round NAV values to 4 decimal places
-        df.loc[:, 'Net Asset Value'] = df['Net Asset Value'].round(4)
-        
-        # Log summary of validation
+        telemetry.observe('validate', time.perf_counter() - validate_start)
         logging.info(f"Data validation complete. Remaining rows: {len(df)}")
-        if len(df) > 0:
-            logging.info(f"Sample of first row after validation: {df.iloc[0].to_dict()}")
         
     except Exception as e:
         logging.error(f"Error during data validation: {str(e)}")
-        logging.error(f"Error converting data types: {str(e)}")
         return False
     
-    # Remove rows with invalid data
-    invalid_rows = df[df['Net Asset Value'].isna() | df['Date'].isna()]
-    if not invalid_rows.empty:
-        logging.warning(f"Found {len(invalid_rows)} rows with invalid data. Removing...")
-        df = df.dropna(subset=['Net Asset Value', 'Date'])
-    
     return df
 
-def insert_nav(df):
-    # Validate and clean data
-    df = validate_data(df)
-    if df is False:
-        logging.error("Data validation failed. Aborting insertion.")
-        return
+def validate_batches(batches, quarantine: bool = QUARANTINE_ENABLED):
+    """
+    Validate parsed batches one at a time and keep only their valid rows.
     
-    conn = get_connection()
-    cursor = conn.cursor()
+    Each batch is released once validated, so peak memory is one raw batch
+    plus the valid rows rather than the whole parsed file. Categorical
+    columns of typed batches stay categorical in the result.
     
-    # First, let's check how many rows already exist for these scheme_code and nav_date combinations
-    check_sql = """
-        SELECT scheme_code, nav_date 
-        FROM nav_data 
-        WHERE (scheme_code, nav_date) IN (%s)
+    Args:
+        batches (iterable): DataFrames from parse_nav.iter_nav_batches or
+            parse_nav.iter_nav_column_batches
+        quarantine (bool): Write rejected rows with a reject_reason column
+        
+    Returns:
+        pd.DataFrame: Valid rows of every batch, None if there were no
+            batches, or False if validation of any batch failed
+    """
+    frames = []
+    seen = False
+    for batch in batches:
+        seen = True
+        valid = validate_data(batch, quarantine=quarantine)
+        if valid is False:
+            return False
+        if not valid.empty:
+            frames.append(valid)
+    if not seen:
+        return None
+    if not frames:
+        return valid
+    return frames[0] if len(frames) == 1 else _concat_frames(frames)
+
+
+def _concat_frames(frames: list) -> pd.DataFrame:
+    """pd.concat that unions categories instead of falling back to object columns."""
+    data = {}
+    for column in frames[0].columns:
+        parts = [frame[column] for frame in frames]
+        if all(isinstance(part.dtype, pd.CategoricalDtype) for part in parts):
+            data[column] = pd.api.types.union_categoricals(parts, ignore_order=True)
+        else:
+            data[column] = pd.concat(parts, ignore_index=True)
+    return pd.DataFrame(data, columns=frames[0].columns)
+
+# Column order of the nav_data INSERT statement
+ROW_COLUMNS = [
+    'Scheme Type',
+    'Scheme Category',
+    'Scheme Sub-Category',
+    'Scheme Code',
+    'ISIN Div Payout/ISIN Growth',
+    'ISIN Div Reinvestment',
+    'Scheme Name',
+    'Net Asset Value',
+    'Date',
+    'Fund Structure',
+]
+
+def build_rows(df: pd.DataFrame) -> list:
     """
+    Materialize validated rows as parameter tuples for the nav_data INSERT.
+    
+    Works column-wise: each column is converted to a Python list once, NAV
+    is cast to float in one step and each distinct date is formatted once.
     
-    insert_sql = """
-        INSERT INTO nav_data (
-            scheme_type, scheme_category, scheme_sub_category, scheme_code,
-            isin_growth, isin_reinv, scheme_name, nav, nav_date, fund_structure
-        ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-        ON DUPLICATE KEY UPDATE
-            nav = VALUES(nav),
-            scheme_name = VALUES(scheme_name),
-            fund_structure = VALUES(fund_structure)
+    Args:
+        df (pd.DataFrame): Validated NAV data
+        
+    Returns:
+        list: Tuples in ROW_COLUMNS order
     """
+    n = len(df)
+    columns = []
+    for name in ROW_COLUMNS:
+        if name == 'Net Asset Value':
+            columns.append(df[name].astype('float64').tolist())
+        elif name == 'Date':
+            codes, uniques = pd.factorize(df[name])
+            formatted = np.array([d.strftime('%Y-%m-%d') for d in uniques], dtype=object)
+            columns.append(formatted[codes].tolist())
+        elif name in df.columns:
+            values = df[name].astype(object)
+            columns.append(values.where(values.notna(), '').tolist())
+        else:
+            columns.append([''] * n)
+    return list(zip(*columns))
+
+INSERT_SQL = """
+    INSERT INTO nav_data (
+        scheme_type, scheme_category, scheme_sub_category, scheme_code,
+        isin_growth, isin_reinv, scheme_name, nav, nav_date, fund_structure
+    ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+    ON DUPLICATE KEY UPDATE
+        nav = VALUES(nav),
+        scheme_name = VALUES(scheme_name),
+        fund_structure = VALUES(fund_structure)
+"""
+
+CHECK_EXISTING_SQL = """
+    SELECT COUNT(*)
+    FROM nav_data
+    WHERE (scheme_code, nav_date) IN ({})
+"""
+
+# Session-scoped staging table for the load_data engine
+STAGING_TABLE_SQL = """
+    CREATE TEMPORARY TABLE IF NOT EXISTS nav_data_staging (
+        scheme_type VARCHAR(100),
+        scheme_category VARCHAR(100),
+        scheme_sub_category VARCHAR(100),
+        scheme_code VARCHAR(20),
+        isin_growth VARCHAR(30),
+        isin_reinv VARCHAR(30),
+        scheme_name TEXT,
+        nav DECIMAL(10, 4),
+        nav_date DATE NOT NULL,
+        fund_structure VARCHAR(100)
+    )
+"""
+
+LOAD_DATA_SQL = """
+    LOAD DATA LOCAL INFILE %s
+    INTO TABLE nav_data_staging
+    CHARACTER SET utf8mb4
+    FIELDS TERMINATED BY '\\t' ESCAPED BY '\\\\'
+    LINES TERMINATED BY '\\n'
+    (scheme_type, scheme_category, scheme_sub_category, scheme_code,
+     isin_growth, isin_reinv, scheme_name, nav, nav_date, fund_structure)
+"""
+
+MERGE_STAGING_SQL = """
+    INSERT INTO nav_data (
+        scheme_type, scheme_category, scheme_sub_category, scheme_code,
+        isin_growth, isin_reinv, scheme_name, nav, nav_date, fund_structure
+    )
+    SELECT s.scheme_type, s.scheme_category, s.scheme_sub_category, s.scheme_code,
+           s.isin_growth, s.isin_reinv, s.scheme_name, s.nav, s.nav_date, s.fund_structure
+    FROM nav_data_staging s
+    ON DUPLICATE KEY UPDATE
+        nav = s.nav,
+        scheme_name = s.scheme_name,
+        fund_structure = s.fund_structure
+"""
+
+COUNT_STAGED_EXISTING_SQL = """
+    SELECT COUNT(*)
+    FROM nav_data_staging s
+    JOIN nav_data n ON n.scheme_code = s.scheme_code AND n.nav_date = s.nav_date
+"""
+
+INSERT_ENGINES = ('executemany', 'load_data')
+
+# Table holding one row per (scheme, nav_date) for each storage mode
+NAV_TABLES = {
+    'wide': 'nav_data',
+    'normalized': 'nav_fact',
+}
+
+def nav_table(storage: str = STORAGE_MODE) -> str:
+    """Name of the NAV table for a storage mode."""
+    if storage not in NAV_TABLES:
+        raise ValueError(f"Unknown storage mode '{storage}'. Expected one of {tuple(NAV_TABLES)}")
+    return NAV_TABLES[storage]
+
+# Backslash first so escapes added for the other characters are not doubled
+_TSV_ESCAPES = [('\\', '\\\\'), ('\t', '\\t'), ('\n', '\\n'), ('\r', '\\r')]
+
+def _tsv_field(value) -> str:
+    if isinstance(value, float):
+        return f"{value:.4f}"
+    value = str(value)
+    for char, escaped in _TSV_ESCAPES:
+        if char in value:
+            value = value.replace(char, escaped)
+    return value
+
+def write_tsv(rows: list, path: str):
+    """Write rows in the format expected by LOAD_DATA_SQL."""
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        for row in rows:
+            f.write('\t'.join(_tsv_field(value) for value in row))
+            f.write('\n')
+
+def _insert_executemany(conn, cursor, rows: list):
+    """Upsert rows into nav_data with executemany; returns (inserted, updated, unchanged)."""
+    return executemany_upsert(conn, cursor, rows, INSERT_SQL, CHECK_EXISTING_SQL, key_columns=(3, 8))
+
+def _insert_load_data(conn, cursor, rows: list):
+    """
+    Bulk-load rows through LOAD DATA LOCAL INFILE and a staging table.
+    
+    The rows are written to a TSV file in LOAD_DATA_DIR, loaded into the
+    session-scoped nav_data_staging table and merged into nav_data with a
+    single INSERT ... SELECT ... ON DUPLICATE KEY UPDATE.
+    
+    Returns:
+        tuple: (inserted, updated, unchanged)
+    """
+    # conn only accepts LOCAL INFILE requests for files under LOAD_DATA_DIR
+    os.makedirs(LOAD_DATA_DIR, mode=0o700, exist_ok=True)
+    fd, tsv_path = tempfile.mkstemp(prefix='nav_data_', suffix='.tsv', dir=LOAD_DATA_DIR)
+    os.close(fd)
+    # One staged row per key, or the existing-key join and the merge would count repeats
+    rows = dedupe_rows(rows, key_columns=(3, 8))
+    try:
+        write_tsv(rows, tsv_path)
+        
+        cursor.execute(STAGING_TABLE_SQL)
+        cursor.execute("TRUNCATE TABLE nav_data_staging")
+        cursor.execute(LOAD_DATA_SQL, (tsv_path,))
+        logging.info(f"Loaded {cursor.rowcount} rows into nav_data_staging")
+        
+        cursor.execute(COUNT_STAGED_EXISTING_SQL)
+        existing = cursor.fetchone()[0]
+        cursor.execute(MERGE_STAGING_SQL)
+        affected_rows = cursor.rowcount
+        with get_telemetry().timer('db_commit'):
+            conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        os.remove(tsv_path)
+    
+    inserted, updated, unchanged = split_upsert_counts(len(rows), existing, affected_rows)
+    logging.info(
+        f"Merged staging table. Affected rows: {affected_rows}, "
+        f"Inserted: {inserted}, Updated: {updated}, Unchanged: {unchanged}"
+    )
+    return inserted, updated, unchanged
+
+def insert_nav(df, engine: str = INSERT_ENGINE, conn=None, validated: bool = False, delta: bool = False,
+               storage: str = STORAGE_MODE):
+    """
+    Validate NAV data and upsert it into nav_data, or into scheme_dim and
+    nav_fact in normalized storage mode.
+    
+    Args:
+        df (pd.DataFrame): Parsed NAV data
+        engine (str): 'executemany' or 'load_data' (LOAD DATA LOCAL INFILE
+            into a staging table, falling back to executemany on failure)
+        conn: Optional open connection to reuse; a pooled one is checked out
+            and returned otherwise. The load_data engine needs a connection
+            from get_connection(local_infile=True) and falls back to
+            executemany on any other.
+        validated (bool): df already went through validate_data
+        delta (bool): Send only rows that are new or changed since the last
+            load, judged by the per-row fingerprints every load stores
+        storage (str): 'wide' (nav_data) or 'normalized' (scheme_dim +
+            nav_fact, always loaded with executemany)
+    
+    Returns:
+        dict: Row counts (rows, inserted, updated, unchanged) and duration in
+            seconds, or None if nothing was inserted. In delta mode 'changed'
+            lists (scheme_code, nav_date, 'new' | 'changed') for rows sent.
+    """
+    if engine not in INSERT_ENGINES:
+        raise ValueError(f"Unknown insert engine '{engine}'. Expected one of {INSERT_ENGINES}")
+    nav_table(storage)
+    
+    # Validate and clean data
+    if not validated:
+        df = validate_data(df)
+    if df is False:
+        logging.error("Data validation failed. Aborting insertion.")
+        return
 
     # Log start of insertion process
     logging.info(f"Starting data insertion process. Total rows to process: {len(df)}")
     logging.info(f"First row sample: {df.iloc[0].to_dict() if not df.empty else 'No data'}")
 
     # Prepare rows for insertion
-    rows = []
-    for _, row in df.iterrows():
-        try:
-            rows.append((
-                row.get('Scheme Type', ''),
-                row.get('Scheme Category', ''),
-                row.get('Scheme Sub-Category', ''),
-                row['Scheme Code'],
-                row.get('ISIN Div Payout/ISIN Growth', ''),
-                row.get('ISIN Div Reinvestment', ''),
-                row.get('Scheme Name', ''),
-                float(row['Net Asset Value']),
-                row['Date'].strftime('%Y-%m-%d'),
-                row.get('Fund Structure', '')
-            ))
-        except Exception as e:
-            logging.error(f"Error processing row: {str(e)}")
-            continue
+    rows = build_rows(df)
 
     if not rows:
         logging.error("No valid rows to insert after processing")
         return
 
-    total_memory = psutil.virtual_memory().available
-    estimated_row_size = 1000  # bytes per row estimate
-    chunk_size = max(
-        500, min(len(rows), total_memory // estimated_row_size // 2))
-    
-    logging.info(f"Using chunk size of {chunk_size} rows")
+    # Every load stores row fingerprints, so the first delta run after a
+    # normal load already knows which rows are unchanged
+    all_rows = rows
+    fingerprints = fingerprint_rows(all_rows)
+    changes = None
+    if delta:
+        rows, changes = diff_rows(all_rows, fingerprints)
+        new_count = sum(1 for change in changes if change[2] == 'new')
+        logging.info(
+            f"Delta mode: {len(rows)} of {len(all_rows)} rows to send "
+            f"(new: {new_count}, changed: {len(changes) - new_count})"
+        )
+        if not rows:
+            return {'rows': 0, 'inserted': 0, 'updated': 0, 'unchanged': 0,
+                    'duration': 0.0, 'changed': []}
 
-    total_inserted = 0
-    total_updated = 0
-    start_time = datetime.now()
+    with connection_scope(conn, local_infile=engine == 'load_data' and storage == 'wide') as conn:
+        cursor = conn.cursor()
+        start_time = datetime.now()
 
-    try:
-        for i in range(0, len(rows), chunk_size):
-            chunk = rows[i:i+chunk_size]
+        try:
+            if storage == 'normalized':
+                if engine == 'load_data':
+                    logging.info("Normalized storage loads through executemany; ignoring load_data engine")
+                    engine = 'executemany'
+                counts = insert_normalized(conn, cursor, rows)
+            elif engine == 'load_data':
+                try:
+                    counts = _insert_load_data(conn, cursor, rows)
+                except Exception as load_error:
+                    logging.warning(f"LOAD DATA engine failed ({str(load_error)}). Falling back to executemany")
+                    counts = _insert_executemany(conn, cursor, rows)
+            else:
+                counts = _insert_executemany(conn, cursor, rows)
+            total_inserted, total_updated, total_unchanged = counts
+            invalidate_loaded_rows(rows)
+
+            # Log final results
+            duration = (datetime.now() - start_time).total_seconds()
+            telemetry = get_telemetry()
+            telemetry.observe('insert', duration, engine=engine, storage=storage)
+            telemetry.incr('insert_rows', len(rows), engine=engine, storage=storage)
+            telemetry.incr('insert_rows_inserted', total_inserted)
+            telemetry.incr('insert_rows_updated', total_updated)
+            logging.info(
+                f"Insertion completed. "
+                f"Engine: {engine}, "
+                f"Total rows processed: {len(rows)}, "
+                f"Inserted: {total_inserted}, "
+                f"Updated: {total_updated}, "
+                f"Unchanged: {total_unchanged}, "
+                f"Duration: {duration:.2f} seconds"
+            )
+            result = {
+                'rows': len(rows),
+                'inserted': total_inserted,
+                'updated': total_updated,
+                'unchanged': total_unchanged,
+                'duration': duration,
+            }
             try:
-                # Execute the insert
-                cursor.executemany(insert_sql, chunk)
-                conn.commit()
-                
-                # Get the number of affected rows
-                affected_rows = cursor.rowcount
-                
-                # For ON DUPLICATE KEY UPDATE:
-                # - If a row is inserted, it counts as 1
-                # - If a row is updated, it counts as 2
-                inserted = sum(1 for _ in chunk if cursor.rowcount == 1)
-                updated = sum(1 for _ in chunk if cursor.rowcount == 2)
-                
-                total_inserted += inserted
-                total_updated += updated
-                
-                logging.info(
-                    f"Chunk {i//chunk_size + 1}: "
-                    f"Affected rows: {affected_rows}, "
-                    f"Inserted: {inserted}, "
-                    f"Updated: {updated}"
-                )
-                
-            except Exception as chunk_error:
-                logging.error(f"Error processing chunk {i//chunk_size + 1}: {str(chunk_error)}")
-                conn.rollback()
-                raise
-
-        # Log final results
-        duration = (datetime.now() - start_time).total_seconds()
-        logging.info(
-            f"Insertion completed. "
-            f"Total rows processed: {len(rows)}, "
-            f"Inserted: {total_inserted}, "
-            f"Updated: {total_updated}, "
-            f"Duration: {duration:.2f} seconds"
-        )
+                save_row_fingerprints(all_rows, fingerprints)
+            except Exception as e:
+                # The rows are committed; a later delta run just resends them
+                logging.warning(f"Could not save row fingerprints: {str(e)}")
+            if delta:
+                result['changed'] = changes
+            return result
 
-    except Exception as e:
-        conn.rollback()
-        logging.error(f"Fatal error during insertion: {str(e)}")
-        raise
-    finally:
-        cursor.close()
-        conn.close()
-        logging.info("Database connection closed")
+        except Exception as e:
+            conn.rollback()
+            logging.error(f"Fatal error during insertion: {str(e)}")
+            raise
+        finally:
+            cursor.close()
 
-def get_earliest_nav_date() -> datetime:
+def get_earliest_nav_date(conn=None, storage: str = STORAGE_MODE) -> datetime:
     """
     Get the earliest NAV date from the database.
     
+    Args:
+        conn: Optional open connection to reuse
+        storage (str): Storage mode whose NAV table is queried
+    
     Returns:
         datetime: The earliest date found in the database, or None if no data exists
     """
     try:
-        conn = get_connection()
-        cursor = conn.cursor()
-        
-        query = "SELECT MIN(nav_date) FROM nav_data"
-        cursor.execute(query)
-        result = cursor.fetchone()[0]
-        
-        cursor.close()
-        conn.close()
+        with connection_scope(conn) as conn:
+            cursor = conn.cursor()
+            
+            query = f"SELECT MIN(nav_date) FROM {nav_table(storage)}"
+            cursor.execute(query)
+            result = cursor.fetchone()[0]
+            
+            cursor.close()
         
         if result:
             logging.info(f"Earliest NAV date in database: {result}")
@@ -248,23 +506,26 @@ def get_earliest_nav_date() -> datetime:
         logging.error(f"Error getting earliest NAV date: {str(e)}")
         raise
 
-def get_latest_nav_date() -> datetime:
+def get_latest_nav_date(conn=None, storage: str = STORAGE_MODE) -> datetime:
     """
     Get the latest NAV date from the database.
     
+    Args:
+        conn: Optional open connection to reuse
+        storage (str): Storage mode whose NAV table is queried
+    
     Returns:
         datetime: The latest date found in the database, or None if no data exists
     """
     try:
-        conn = get_connection()
-        cursor = conn.cursor()
-        
-        query = "SELECT MAX(nav_date) FROM nav_data"
-        cursor.execute(query)
-        result = cursor.fetchone()[0]
-        
-        cursor.close()
-        conn.close()
+        with connection_scope(conn) as conn:
+            cursor = conn.cursor()
+            
+            query = f"SELECT MAX(nav_date) FROM {nav_table(storage)}"
+            cursor.execute(query)
+            result = cursor.fetchone()[0]
+            
+            cursor.close()
         
         if result:
             logging.info(f"Latest NAV date in database: {result}")
@@ -0,0 +1,208 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import zlib
+from datetime import date as date_type, datetime
+from config.settings import MANIFEST_PATH, MANIFEST_HOLIDAY_GRACE_DAYS
+
+MANIFEST_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS ingest_manifest (
+        nav_date TEXT PRIMARY KEY,       -- YYYY-MM-DD
+        download_status TEXT,            -- downloaded | empty | failed
+        file_path TEXT,
+        content_hash TEXT,               -- sha256 of the downloaded file
+        file_size INTEGER,
+        row_count INTEGER,               -- validated rows of the day, not rows sent in delta mode
+        load_status TEXT,                -- loaded | failed
+        is_holiday INTEGER NOT NULL DEFAULT 0,
+        error TEXT,
+        updated_at TEXT NOT NULL
+    )
+"""
+
+# Per-row fingerprints of the last version of each day loaded in delta mode
+FINGERPRINT_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS day_fingerprints (
+        nav_date TEXT PRIMARY KEY,       -- YYYY-MM-DD
+        loaded_hash TEXT,                -- sha256 of the file last loaded for this day
+        scheme_codes BLOB,               -- zlib-compressed, newline-separated scheme codes
+        row_hashes BLOB,                 -- uint64 fingerprints in scheme_codes order
+        updated_at TEXT NOT NULL
+    )
+"""
+
+_conn = None
+_conn_pid = None
+_lock = threading.Lock()
+
+
+def _key(date) -> str:
+    if isinstance(date, (datetime, date_type)):
+        return date.strftime('%Y-%m-%d')
+    return str(date)
+
+
+def _connection() -> sqlite3.Connection:
+    """Per-process SQLite connection shared by this process's threads (use under _lock)."""
+    global _conn, _conn_pid
+    if _conn is None or _conn_pid != os.getpid():
+        directory = os.path.dirname(MANIFEST_PATH)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        _conn = sqlite3.connect(MANIFEST_PATH, timeout=30, check_same_thread=False)
+        # WAL lets yearly worker processes write concurrently with readers
+        _conn.execute("PRAGMA journal_mode=WAL")
+        _conn.execute(MANIFEST_SCHEMA)
+        _conn.execute(FINGERPRINT_SCHEMA)
+        _conn.commit()
+        _conn_pid = os.getpid()
+    return _conn
+
+
+def _upsert(date, **fields):
+    fields['updated_at'] = datetime.now().isoformat(timespec='seconds')
+    columns = ', '.join(['nav_date'] + list(fields))
+    placeholders = ', '.join(['?'] * (len(fields) + 1))
+    updates = ', '.join(f"{column} = excluded.{column}" for column in fields)
+    sql = (f"INSERT INTO ingest_manifest ({columns}) VALUES ({placeholders}) "
+           f"ON CONFLICT(nav_date) DO UPDATE SET {updates}")
+    with _lock:
+        conn = _connection()
+        conn.execute(sql, [_key(date)] + list(fields.values()))
+        conn.commit()
+
+
+def file_hash(file_path: str) -> str:
+    """sha256 of a file, read in 1 MB blocks."""
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def record_download(date, file_path: str):
+    """Record a successful download with the file's hash and size."""
+    _upsert(date, download_status='downloaded', file_path=file_path,
+            content_hash=file_hash(file_path), file_size=os.path.getsize(file_path),
+            is_holiday=0, error=None)
+
+
+def record_empty(date):
+    """
+    Record a weekday whose response had no NAV records.
+
+    Only days older than MANIFEST_HOLIDAY_GRACE_DAYS count as holidays; a
+    recent day may simply not be published yet and is retried next run.
+    """
+    if isinstance(date, datetime):
+        date = date.date()
+    elif not isinstance(date, date_type):
+        date = datetime.strptime(str(date), '%Y-%m-%d').date()
+    is_holiday = int((datetime.now().date() - date).days > MANIFEST_HOLIDAY_GRACE_DAYS)
+    _upsert(date, download_status='empty', is_holiday=is_holiday, error=None)
+
+
+def record_download_failure(date, error: str):
+    _upsert(date, download_status='failed', error=error)
+
+
+def record_load(date, status: str, row_count: int = None, error: str = None):
+    """Record the outcome of loading a day into nav_data ('loaded' or 'failed')."""
+    _upsert(date, load_status=status, row_count=row_count, error=error)
+
+
+def get_entry(date) -> dict:
+    """Manifest row for a date as a dict, or None."""
+    with _lock:
+        conn = _connection()
+        cursor = conn.execute("SELECT * FROM ingest_manifest WHERE nav_date = ?", (_key(date),))
+        row = cursor.fetchone()
+        columns = [d[0] for d in cursor.description]
+    return dict(zip(columns, row)) if row else None
+
+
+def completed_dates(start_date, end_date, skip_loaded: bool = True) -> set:
+    """
+    'YYYY-MM-DD' keys between start_date and end_date that need no work:
+    loaded into the database, or known holidays/empty days. With
+    skip_loaded=False only holidays count, so loaded days are checked again.
+    """
+    condition = "(load_status = 'loaded' OR is_holiday = 1)" if skip_loaded else "is_holiday = 1"
+    with _lock:
+        conn = _connection()
+        rows = conn.execute(
+            f"SELECT nav_date FROM ingest_manifest WHERE nav_date BETWEEN ? AND ? AND {condition}",
+            (_key(start_date), _key(end_date))
+        ).fetchall()
+    return {row[0] for row in rows}
+
+
+def holiday_dates() -> list:
+    """'YYYY-MM-DD' keys of every day recorded as a holiday, oldest first."""
+    with _lock:
+        rows = _connection().execute(
+            "SELECT nav_date FROM ingest_manifest WHERE is_holiday = 1 ORDER BY nav_date"
+        ).fetchall()
+    return [row[0] for row in rows]
+
+
+def filter_pending(dates, skip_loaded: bool = True) -> list:
+    """
+    Drop dates the manifest marks as completed, keeping the input order.
+
+    skip_loaded=False keeps loaded days and drops only holidays, for delta
+    runs that re-check loaded days for restatements.
+    """
+    dates = list(dates)
+    if not dates:
+        return dates
+    done = completed_dates(min(dates), max(dates), skip_loaded=skip_loaded)
+    return [date for date in dates if _key(date) not in done]
+
+
+def get_loaded_hash(date) -> str:
+    """sha256 of the file last loaded for date, or None."""
+    with _lock:
+        row = _connection().execute(
+            "SELECT loaded_hash FROM day_fingerprints WHERE nav_date = ?", (_key(date),)
+        ).fetchone()
+    return row[0] if row else None
+
+
+def set_loaded_hash(date, content_hash: str):
+    with _lock:
+        conn = _connection()
+        conn.execute(
+            "INSERT INTO day_fingerprints (nav_date, loaded_hash, updated_at) VALUES (?, ?, ?) "
+            "ON CONFLICT(nav_date) DO UPDATE SET loaded_hash = excluded.loaded_hash, "
+            "updated_at = excluded.updated_at",
+            (_key(date), content_hash, datetime.now().isoformat(timespec='seconds'))
+        )
+        conn.commit()
+
+
+def get_fingerprints(date) -> tuple:
+    """(scheme_codes, row_hashes bytes) stored for date, or None."""
+    with _lock:
+        row = _connection().execute(
+            "SELECT scheme_codes, row_hashes FROM day_fingerprints WHERE nav_date = ?", (_key(date),)
+        ).fetchone()
+    if not row or row[0] is None:
+        return None
+    return zlib.decompress(row[0]).decode('utf-8').split('\n'), row[1]
+
+
+def save_fingerprints(date, scheme_codes: list, row_hashes: bytes):
+    """Replace the stored fingerprints for date."""
+    packed_codes = zlib.compress('\n'.join(scheme_codes).encode('utf-8'))
+    with _lock:
+        conn = _connection()
+        conn.execute(
+            "INSERT INTO day_fingerprints (nav_date, scheme_codes, row_hashes, updated_at) VALUES (?, ?, ?, ?) "
+            "ON CONFLICT(nav_date) DO UPDATE SET scheme_codes = excluded.scheme_codes, "
+            "row_hashes = excluded.row_hashes, updated_at = excluded.updated_at",
+            (_key(date), packed_codes, row_hashes, datetime.now().isoformat(timespec='seconds'))
+        )
+        conn.commit()
@@ -1,6 +1,96 @@
+import os
+import threading
+import time
+from contextlib import contextmanager
 import mysql.connector
-from config.settings import DB_CONFIG
+from mysql.connector import pooling
+from mysql.connector.errors import PoolError
+from telemetry.instruments import get_telemetry
+from config.settings import DB_CONFIG, DB_POOL_NAME, DB_POOL_SIZE, DB_POOL_TIMEOUT, LOAD_DATA_DIR
 
+_pools = {}  # local_infile -> (pool, pid)
+_pool_lock = threading.Lock()
 
-def get_connection():
-    return mysql.connector.connect(**DB_CONFIG)
+
+def connection_config(local_infile: bool = False) -> dict:
+    """
+    DB_CONFIG for a connection, with LOAD DATA LOCAL INFILE allowed only
+    from LOAD_DATA_DIR when local_infile is set.
+
+    The server can ask a LOCAL INFILE client for any file it may read, so
+    the permission is kept off every connection except the load_data
+    engine's, and even there it is confined to the directory that holds
+    its TSV files.
+    """
+    config = dict(DB_CONFIG, allow_local_infile=False)
+    if local_infile:
+        os.makedirs(LOAD_DATA_DIR, mode=0o700, exist_ok=True)
+        config['allow_local_infile_in_path'] = LOAD_DATA_DIR
+    return config
+
+
+def get_pool(local_infile: bool = False) -> pooling.MySQLConnectionPool:
+    """
+    Return this process's connection pool, creating it on first use.
+
+    load_data connections (local_infile) come from a separate pool so the
+    LOCAL INFILE permission never leaks into other connections. Pools are
+    re-created after a fork so child processes never share sockets with
+    their parent.
+    """
+    with _pool_lock:
+        pool, pid = _pools.get(local_infile, (None, None))
+        if pool is None or pid != os.getpid():
+            suffix = '_infile' if local_infile else ''
+            pool = pooling.MySQLConnectionPool(
+                pool_name=f"{DB_POOL_NAME}_{os.getpid()}{suffix}",
+                pool_size=DB_POOL_SIZE,
+                pool_reset_session=True,
+                **connection_config(local_infile)
+            )
+            _pools[local_infile] = (pool, os.getpid())
+    return pool
+
+
+def get_connection(local_infile: bool = False):
+    """
+    Check out a connection. Calling close() on it returns it to the pool.
+
+    Waits up to DB_POOL_TIMEOUT seconds when every pooled connection is in
+    use. With DB_POOL_SIZE=0 a plain, unpooled connection is opened.
+
+    Args:
+        local_infile (bool): Connection for the load_data engine, allowed to
+            send files from LOAD_DATA_DIR with LOAD DATA LOCAL INFILE
+    """
+    with get_telemetry().timer('db_connection_acquire'):
+        if DB_POOL_SIZE <= 0:
+            return mysql.connector.connect(**connection_config(local_infile))
+        pool = get_pool(local_infile)
+        deadline = time.monotonic() + DB_POOL_TIMEOUT
+        while True:
+            try:
+                return pool.get_connection()
+            except PoolError:
+                if time.monotonic() >= deadline:
+                    raise
+                time.sleep(0.05)
+
+
+@contextmanager
+def connection_scope(conn=None, local_infile: bool = False):
+    """
+    Yield conn when one is given, otherwise a connection checked out for
+    the duration of the block.
+
+    Lets a job hold one connection and pass it to every query and insert,
+    while standalone calls still manage their own.
+    """
+    if conn is not None:
+        yield conn
+        return
+    conn = get_connection(local_infile)
+    try:
+        yield conn
+    finally:
+        conn.close()
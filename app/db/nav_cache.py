@@ -0,0 +1,178 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import date as date_type, datetime, timedelta
+from config.settings import NAV_CACHE_SIZE, NAV_CACHE_TTL
+
+# Entries are keyed by tuples whose first two items are (kind, scheme_code):
+#   ('latest', code)
+#   ('on', code, date, fallback_days)
+#   ('series', code, start_date, end_date)
+_MISSING = object()
+
+
+def _as_date(value) -> date_type:
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, str):
+        return date_type.fromisoformat(value)
+    return value
+
+
+def _affected(key: tuple, nav_dates: set) -> bool:
+    """True if a row for one of nav_dates can change the cached answer for key."""
+    kind = key[0]
+    if kind == 'latest':
+        return True
+    if kind == 'on':
+        _, _, day, fallback_days = key
+        return any(nav_date <= day <= nav_date + timedelta(days=fallback_days) for nav_date in nav_dates)
+    if kind == 'series':
+        _, _, start, end = key
+        return any(start <= nav_date <= end for nav_date in nav_dates)
+    return True
+
+
+class NavCache:
+    """
+    Bounded LRU cache with a per-entry TTL for NAV lookups.
+
+    Keys are indexed by scheme code, so invalidating the rows of one load
+    only inspects entries of the schemes that were loaded. None results are
+    cached too, so repeated misses do not reach the database either.
+
+    Every invalidation bumps a per-scheme generation; get_or_load drops a
+    loaded value whose scheme was invalidated while the loader ran, since
+    the loader may have read the rows from before that load.
+    """
+
+    def __init__(self, max_size: int = NAV_CACHE_SIZE, ttl: float = NAV_CACHE_TTL):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries = OrderedDict()  # key -> (expires_at, value)
+        self._by_scheme = {}  # scheme_code -> set of keys
+        self._generations = {}  # scheme_code -> invalidation count
+        self._clears = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _discard(self, key):
+        self._entries.pop(key, None)
+        keys = self._by_scheme.get(key[1])
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._by_scheme[key[1]]
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._entries.get(key, _MISSING)
+            if entry is _MISSING or entry[0] < time.monotonic():
+                if entry is not _MISSING:
+                    self._discard(key)
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def generation(self, scheme_code: str) -> tuple:
+        """Changes whenever entries of scheme_code are invalidated or the cache is cleared."""
+        with self._lock:
+            return self._clears, self._generations.get(scheme_code, 0)
+
+    def put(self, key, value, generation: tuple = None):
+        """
+        Cache value for key. With generation (from generation() before the
+        value was read), nothing is stored if key's scheme was invalidated
+        since.
+        """
+        if self.max_size <= 0:
+            return
+        with self._lock:
+            if generation is not None and generation != (self._clears, self._generations.get(key[1], 0)):
+                return
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            self._by_scheme.setdefault(key[1], set()).add(key)
+            while len(self._entries) > self.max_size:
+                oldest = next(iter(self._entries))
+                self._discard(oldest)
+
+    def get_or_load(self, key, loader):
+        """Return the cached value for key, calling loader() and caching its result on a miss."""
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            generation = self.generation(key[1])
+            value = loader()
+            self.put(key, value, generation=generation)
+        return value
+
+    def invalidate_scheme(self, scheme_code: str, nav_dates=None) -> int:
+        """
+        Drop the entries of scheme_code that rows for nav_dates can affect,
+        or all of them when nav_dates is None. Returns entries dropped.
+        """
+        with self._lock:
+            return self._invalidate_scheme(scheme_code, nav_dates)
+
+    def _invalidate_scheme(self, scheme_code: str, nav_dates) -> int:
+        """invalidate_scheme without taking the lock; the caller holds it."""
+        self._generations[scheme_code] = self._generations.get(scheme_code, 0) + 1
+        keys = list(self._by_scheme.get(scheme_code, ()))
+        if keys and nav_dates is not None:
+            nav_dates = {_as_date(d) for d in nav_dates}
+            keys = [key for key in keys if _affected(key, nav_dates)]
+        for key in keys:
+            self._discard(key)
+        return len(keys)
+
+    def invalidate_rows(self, rows: list, code_index: int = 3, date_index: int = 8) -> int:
+        """
+        Drop exactly the entries affected by rows just written to the database.
+
+        Args:
+            rows (list): build_rows tuples (scheme_code at code_index,
+                'YYYY-MM-DD' nav_date at date_index)
+
+        Returns:
+            int: Entries dropped
+        """
+        with self._lock:
+            dates_by_scheme = {}
+            for row in rows:
+                # Schemes without entries are included too: a lookup may be
+                # loading one of them right now
+                dates_by_scheme.setdefault(row[code_index], set()).add(row[date_index])
+            return sum(self._invalidate_scheme(code, dates) for code, dates in dates_by_scheme.items())
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._by_scheme.clear()
+            self._clears += 1
+
+
+_cache = None
+_cache_pid = None
+_cache_lock = threading.Lock()
+
+
+def get_nav_cache() -> NavCache:
+    """
+    Return this process's NavCache.
+
+    Loads in the same process invalidate it directly; readers in other
+    processes see new data once their entries reach NAV_CACHE_TTL.
+    """
+    global _cache, _cache_pid
+    with _cache_lock:
+        if _cache is None or _cache_pid != os.getpid():
+            _cache = NavCache()
+            _cache_pid = os.getpid()
+    return _cache
@@ -0,0 +1,240 @@
+import logging
+from datetime import date as date_type, datetime
+import pandas as pd
+from db.models import connection_scope
+from db.insert_nav import nav_table
+from archive.nav_archive import has_day, write_day
+from config.settings import (
+    PARTITION_MAINTENANCE,
+    PARTITION_AHEAD,
+    PARTITION_RETENTION_YEARS,
+    PARTITION_RETENTION_ACTION,
+)
+
+PARTITIONS_SQL = """
+    SELECT PARTITION_NAME, PARTITION_DESCRIPTION, PARTITION_EXPRESSION, TABLE_ROWS
+    FROM information_schema.PARTITIONS
+    WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND PARTITION_NAME IS NOT NULL
+    ORDER BY PARTITION_ORDINAL_POSITION
+"""
+
+RETENTION_ACTIONS = ('archive', 'drop')
+
+# MySQL TO_DAYS() of a date is its proleptic ordinal plus 365
+_TO_DAYS_OFFSET = 365
+
+# Rows of a partition as parser columns, for archiving before a drop
+_PARTITION_DAYS_SQL = {
+    'nav_data': "SELECT DISTINCT nav_date FROM nav_data PARTITION ({})",
+    'nav_fact': "SELECT DISTINCT nav_date FROM nav_fact PARTITION ({})",
+}
+_PARTITION_ROWS_SQL = {
+    'nav_data': """
+        SELECT scheme_type, scheme_category, scheme_sub_category, scheme_code,
+               isin_growth, isin_reinv, scheme_name, nav, nav_date, fund_structure
+        FROM nav_data PARTITION ({})
+        WHERE nav_date = %s
+    """,
+    'nav_fact': """
+        SELECT d.scheme_type, d.scheme_category, d.scheme_sub_category, d.scheme_code,
+               d.isin_growth, d.isin_reinv, d.scheme_name, f.nav, f.nav_date, d.fund_structure
+        FROM nav_fact PARTITION ({}) f
+        JOIN scheme_dim d ON d.scheme_id = f.scheme_id
+        WHERE f.nav_date = %s
+    """,
+}
+_PARTITION_COLUMNS = [
+    'Scheme Type', 'Scheme Category', 'Scheme Sub-Category', 'Scheme Code',
+    'ISIN Div Payout/ISIN Growth', 'ISIN Div Reinvestment', 'Scheme Name',
+    'Net Asset Value', 'Date', 'Fund Structure',
+]
+
+
+def _as_date(date) -> date_type:
+    return date.date() if isinstance(date, datetime) else date
+
+
+def get_partitions(cursor, table: str) -> tuple:
+    """
+    Read the RANGE partitions of table.
+
+    Returns:
+        tuple: (granularity, partitions) where granularity is 'year' for
+            YEAR(nav_date) and 'month' for TO_DAYS(nav_date), and partitions
+            lists (name, upper bound or None for MAXVALUE, estimated rows)
+    """
+    cursor.execute(PARTITIONS_SQL, (table,))
+    granularity = None
+    partitions = []
+    for name, description, expression, rows in cursor.fetchall():
+        if granularity is None:
+            granularity = 'month' if 'to_days' in (expression or '').lower() else 'year'
+        bound = None if description == 'MAXVALUE' else int(description)
+        partitions.append((name, bound, rows or 0))
+    return granularity, partitions
+
+
+def _period_start(date, granularity: str) -> date_type:
+    return date_type(date.year, 1, 1) if granularity == 'year' else date_type(date.year, date.month, 1)
+
+
+def _next_period(start: date_type, granularity: str) -> date_type:
+    if granularity == 'year':
+        return date_type(start.year + 1, 1, 1)
+    return date_type(start.year + (start.month == 12), start.month % 12 + 1, 1)
+
+
+def _bound_of(start: date_type, granularity: str) -> int:
+    """VALUES LESS THAN bound for a partition whose rows start at start."""
+    end = _next_period(start, granularity)
+    return end.year if granularity == 'year' else end.toordinal() + _TO_DAYS_OFFSET
+
+
+def _bound_date(bound: int, granularity: str) -> date_type:
+    """First date that does not fit below bound."""
+    if granularity == 'year':
+        return date_type(bound, 1, 1)
+    return date_type.fromordinal(bound - _TO_DAYS_OFFSET)
+
+
+def _partition_name(start: date_type, granularity: str) -> str:
+    return f"p{start.year}" if granularity == 'year' else f"p{start.year}{start.month:02d}"
+
+
+def ensure_future_partitions(table: str = None, through=None, ahead: int = PARTITION_AHEAD, conn=None) -> list:
+    """
+    Split pmax so that every period up to ahead periods past today (or past
+    through, when later) has its own partition.
+
+    Splitting an empty pmax is a metadata change; rows already sitting in
+    pmax are moved into the new partitions by the same statement.
+
+    Args:
+        table (str): Partitioned table, the current storage mode's NAV table by default
+        through: Optional date that must get its own partition
+        ahead (int): Periods (years or months) to create beyond the current one
+        conn: Optional open connection to reuse
+
+    Returns:
+        list: Names of the partitions created
+    """
+    table = table or nav_table()
+    with connection_scope(conn) as conn:
+        cursor = conn.cursor()
+        try:
+            granularity, partitions = get_partitions(cursor, table)
+            bounds = [bound for _, bound, _ in partitions if bound is not None]
+            if not bounds:
+                logging.warning(f"{table} has no RANGE partitions; nothing to maintain")
+                return []
+
+            last_date = datetime.now().date()
+            if through is not None:
+                last_date = max(last_date, _as_date(through))
+            target = _period_start(last_date, granularity)
+            for _ in range(ahead):
+                target = _next_period(target, granularity)
+
+            new = []
+            start = _bound_date(max(bounds), granularity)
+            while start <= target:
+                new.append((_partition_name(start, granularity), _bound_of(start, granularity)))
+                start = _next_period(start, granularity)
+            if not new:
+                return []
+
+            definitions = [f"PARTITION {name} VALUES LESS THAN ({bound})" for name, bound in new]
+            maxvalue = [(name, rows) for name, bound, rows in partitions if bound is None]
+            if maxvalue:
+                name, rows = maxvalue[0]
+                if rows:
+                    logging.warning(f"{table}.{name} holds ~{rows} rows; they are moved while splitting")
+                definitions.append(f"PARTITION {name} VALUES LESS THAN MAXVALUE")
+                cursor.execute(f"ALTER TABLE {table} REORGANIZE PARTITION {name} INTO ({', '.join(definitions)})")
+            else:
+                cursor.execute(f"ALTER TABLE {table} ADD PARTITION ({', '.join(definitions)})")
+            created = [name for name, _ in new]
+            logging.info(f"Created {table} partitions: {', '.join(created)}")
+            return created
+        finally:
+            cursor.close()
+
+
+def _archive_partition(cursor, table: str, partition: str) -> int:
+    """Write every day of a partition missing from the Parquet archive; returns days written."""
+    if table not in _PARTITION_ROWS_SQL:
+        raise ValueError(f"Cannot archive partitions of {table}")
+    cursor.execute(_PARTITION_DAYS_SQL[table].format(partition))
+    written = 0
+    for (nav_date,) in cursor.fetchall():
+        if has_day(nav_date):
+            continue
+        cursor.execute(_PARTITION_ROWS_SQL[table].format(partition), (nav_date,))
+        df = pd.DataFrame(cursor.fetchall(), columns=_PARTITION_COLUMNS)
+        write_day(nav_date, df)
+        written += 1
+    return written
+
+
+def apply_retention(table: str = None, keep_years: int = PARTITION_RETENTION_YEARS,
+                    action: str = PARTITION_RETENTION_ACTION, conn=None) -> list:
+    """
+    Drop partitions whose rows are all older than keep_years full years.
+
+    With action='archive' every day of a partition is written to the
+    Parquet archive (days already archived are kept as they are) before it
+    is dropped. keep_years <= 0 keeps everything.
+
+    Returns:
+        list: Names of the partitions dropped
+    """
+    if action not in RETENTION_ACTIONS:
+        raise ValueError(f"Unknown retention action '{action}'. Expected one of {RETENTION_ACTIONS}")
+    if keep_years <= 0:
+        return []
+    table = table or nav_table()
+    cutoff = date_type(datetime.now().year - keep_years, 1, 1)
+
+    with connection_scope(conn) as conn:
+        cursor = conn.cursor()
+        try:
+            granularity, partitions = get_partitions(cursor, table)
+            expired = [
+                name for name, bound, _ in partitions
+                if bound is not None and _bound_date(bound, granularity) <= cutoff
+            ]
+            if not expired:
+                return []
+            if action == 'archive':
+                for name in expired:
+                    days = _archive_partition(cursor, table, name)
+                    logging.info(f"Archived {days} days of {table}.{name}")
+            cursor.execute(f"ALTER TABLE {table} DROP PARTITION {', '.join(expired)}")
+            logging.info(f"Dropped {table} partitions older than {cutoff}: {', '.join(expired)}")
+            return expired
+        finally:
+            cursor.close()
+
+
+def maintain_partitions(through=None, conn=None) -> dict:
+    """
+    Run partition maintenance before a load: create upcoming partitions and
+    apply the retention policy. Failures are logged, not raised; rows still
+    land in pmax when maintenance could not run.
+
+    Args:
+        through: Optional latest date about to be loaded
+        conn: Optional open connection to reuse
+
+    Returns:
+        dict: {'created': [...], 'dropped': [...]}
+    """
+    result = {'created': [], 'dropped': []}
+    if not PARTITION_MAINTENANCE:
+        return result
+    try:
+        result['created'] = ensure_future_partitions(through=through, conn=conn)
+        result['dropped'] = apply_retention(conn=conn)
+    except Exception as e:
+        logging.error(f"Partition maintenance failed: {str(e)}")
+    return result
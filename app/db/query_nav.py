@@ -0,0 +1,130 @@
+import logging
+from datetime import date as date_type, datetime, timedelta
+from db.models import connection_scope
+from db.nav_cache import get_nav_cache
+from config.settings import STORAGE_MODE, NAV_LOOKUP_FALLBACK_DAYS
+
+# Per storage mode: FROM clause and the column holding the scheme code
+_SOURCES = {
+    'wide': ("nav_data", "scheme_code"),
+    'normalized': ("nav_fact JOIN scheme_dim ON scheme_dim.scheme_id = nav_fact.scheme_id",
+                   "scheme_dim.scheme_code"),
+}
+
+LATEST_NAV_SQL = """
+    SELECT nav_date, nav
+    FROM {}
+    WHERE {} = %s AND nav IS NOT NULL
+    ORDER BY nav_date DESC
+    LIMIT 1
+"""
+
+NAV_ON_SQL = """
+    SELECT nav_date, nav
+    FROM {}
+    WHERE {} = %s AND nav_date BETWEEN %s AND %s AND nav IS NOT NULL
+    ORDER BY nav_date DESC
+    LIMIT 1
+"""
+
+NAV_SERIES_SQL = """
+    SELECT nav_date, nav
+    FROM {}
+    WHERE {} = %s AND nav_date BETWEEN %s AND %s AND nav IS NOT NULL
+    ORDER BY nav_date
+"""
+
+
+def _as_date(value) -> date_type:
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, str):
+        return date_type.fromisoformat(value)
+    return value
+
+
+def _sql(template: str, storage: str) -> str:
+    if storage not in _SOURCES:
+        raise ValueError(f"Unknown storage mode '{storage}'. Expected one of {tuple(_SOURCES)}")
+    return template.format(*_SOURCES[storage])
+
+
+def _fetch(sql: str, params: tuple, conn=None) -> list:
+    with connection_scope(conn) as conn:
+        cursor = conn.cursor()
+        try:
+            cursor.execute(sql, params)
+            return cursor.fetchall()
+        finally:
+            cursor.close()
+
+
+def _point(scheme_code: str, row) -> dict:
+    if row is None:
+        return None
+    nav_date, nav = row
+    return {'scheme_code': scheme_code, 'nav_date': nav_date, 'nav': float(nav)}
+
+
+def get_latest_nav(scheme_code: str, conn=None, storage: str = STORAGE_MODE) -> dict:
+    """
+    Latest stored NAV of a scheme.
+
+    Returns:
+        dict: {'scheme_code', 'nav_date', 'nav'}, or None if the scheme has no rows
+    """
+    scheme_code = str(scheme_code)
+
+    def load():
+        rows = _fetch(_sql(LATEST_NAV_SQL, storage), (scheme_code,), conn)
+        return _point(scheme_code, rows[0] if rows else None)
+
+    return get_nav_cache().get_or_load(('latest', scheme_code), load)
+
+
+def get_nav_on(scheme_code: str, date, fallback_days: int = NAV_LOOKUP_FALLBACK_DAYS,
+               conn=None, storage: str = STORAGE_MODE) -> dict:
+    """
+    NAV of a scheme on date, falling back to the most recent earlier day
+    with a NAV (weekends, holidays) up to fallback_days calendar days back.
+
+    Returns:
+        dict: {'scheme_code', 'nav_date', 'nav'} where nav_date is the day
+            actually used, or None if nothing was published in the window
+    """
+    scheme_code = str(scheme_code)
+    date = _as_date(date)
+
+    def load():
+        params = (scheme_code, date - timedelta(days=fallback_days), date)
+        rows = _fetch(_sql(NAV_ON_SQL, storage), params, conn)
+        return _point(scheme_code, rows[0] if rows else None)
+
+    return get_nav_cache().get_or_load(('on', scheme_code, date, fallback_days), load)
+
+
+def get_nav_series(scheme_code: str, start_date, end_date, conn=None, storage: str = STORAGE_MODE) -> list:
+    """
+    NAVs of a scheme between start_date and end_date (inclusive), oldest first.
+
+    Returns:
+        list: (nav_date, nav) tuples with float NAVs
+    """
+    scheme_code = str(scheme_code)
+    start_date, end_date = _as_date(start_date), _as_date(end_date)
+
+    def load():
+        rows = _fetch(_sql(NAV_SERIES_SQL, storage), (scheme_code, start_date, end_date), conn)
+        return [(nav_date, float(nav)) for nav_date, nav in rows]
+
+    series = get_nav_cache().get_or_load(('series', scheme_code, start_date, end_date), load)
+    # Callers get their own list; the cached one stays intact
+    return list(series)
+
+
+def invalidate_loaded_rows(rows: list) -> int:
+    """Drop cached lookups affected by rows just loaded; returns entries dropped."""
+    dropped = get_nav_cache().invalidate_rows(rows)
+    if dropped:
+        logging.info(f"NAV cache: invalidated {dropped} entries")
+    return dropped
@@ -1,94 +1,396 @@
 import requests
 import os
-from datetime import datetime, timedelta
-from config.settings import NAVALL_BASE_URL
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, as_completed, wait, FIRST_COMPLETED
+from datetime import datetime
+from urllib.parse import urlsplit
+from requests.adapters import HTTPAdapter
+from db.manifest import record_download, record_empty, record_download_failure
+from planner.trading_calendar import get_trading_calendar
+from telemetry.instruments import get_telemetry
+from config.settings import (
+    NAVALL_BASE_URL,
+    DOWNLOAD_WORKERS,
+    DOWNLOAD_MAX_PER_HOST,
+    DOWNLOAD_TIMEOUT,
+    DOWNLOAD_RETRIES,
+    DOWNLOAD_BACKOFF_BASE,
+    DOWNLOAD_BACKOFF_MAX,
+    RANGE_INITIAL_DAYS,
+    RANGE_MAX_DAYS,
+    RANGE_TARGET_BYTES,
+)
+
+class NoNavDataError(Exception):
+    """The server answered, but the response holds no NAV records (e.g. a holiday)."""
+
+
+# Status codes worth retrying; anything else non-200 fails immediately
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+
+# Request errors that no retry can fix; every other RequestException
+# (connection drops, timeouts, truncated chunked bodies, ...) is retried
+FATAL_REQUEST_ERRORS = (
+    requests.exceptions.URLRequired,
+    requests.exceptions.MissingSchema,
+    requests.exceptions.InvalidSchema,
+    requests.exceptions.InvalidURL,
+    requests.exceptions.InvalidHeader,
+)
+
+_session = None
+_session_pid = None
+_session_lock = threading.Lock()
+_host_limits = {}
+
+
+def get_session() -> requests.Session:
+    """
+    Return the process-wide HTTP session, creating it on first use.
+
+    The session keeps a pool of keep-alive connections per host so that
+    consecutive downloads reuse the same TCP/TLS connection.
+    """
+    global _session, _session_pid
+    with _session_lock:
+        # A forked child must not reuse its parent's sockets
+        if _session is None or _session_pid != os.getpid():
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=DOWNLOAD_MAX_PER_HOST)
+            session.mount('https://', adapter)
+            session.mount('http://', adapter)
+            _session = session
+            _session_pid = os.getpid()
+    return _session
+
+
+def _host_limit(url: str) -> threading.BoundedSemaphore:
+    host = urlsplit(url).netloc
+    with _session_lock:
+        if host not in _host_limits:
+            _host_limits[host] = threading.BoundedSemaphore(DOWNLOAD_MAX_PER_HOST)
+        return _host_limits[host]
+
+
+def _backoff_delay(attempt: int) -> float:
+    # Exponential backoff with full jitter
+    return random.uniform(0, min(DOWNLOAD_BACKOFF_MAX, DOWNLOAD_BACKOFF_BASE * (2 ** attempt)))
+
+
+def fetch_url(url: str, timeout: float = DOWNLOAD_TIMEOUT, retries: int = DOWNLOAD_RETRIES) -> requests.Response:
+    """
+    GET a URL through the shared session with a per-host concurrency limit.
+
+    Transient request errors (connection errors, timeouts, broken chunked
+    bodies) and retryable status codes are retried with exponential backoff
+    and jitter. Malformed URLs fail immediately.
+
+    Args:
+        url (str): URL to fetch
+        timeout (float): Per-request timeout in seconds
+        retries (int): Number of retries after the first attempt
+
+    Returns:
+        requests.Response: The successful (status 200) response
+    """
+    limit = _host_limit(url)
+    telemetry = get_telemetry()
+    last_error = None
+    for attempt in range(retries + 1):
+        if attempt:
+            telemetry.incr('download_retries')
+        try:
+            with limit:
+                start = time.perf_counter()
+                response = get_session().get(url, timeout=timeout)
+                telemetry.observe('download', time.perf_counter() - start)
+            telemetry.incr('download_requests', status=response.status_code)
+            if response.status_code == 200:
+                telemetry.incr('download_bytes', len(response.content))
+                return response
+            if response.status_code not in RETRYABLE_STATUS_CODES:
+                raise Exception(
+                    f"Failed to download file. Status code: {response.status_code}")
+            last_error = f"Status code: {response.status_code}"
+        except FATAL_REQUEST_ERRORS:
+            raise
+        except requests.RequestException as e:
+            last_error = str(e)
+        if attempt < retries:
+            time.sleep(_backoff_delay(attempt))
+    raise Exception(f"Failed to download file after {retries + 1} attempts. {last_error}")
 
 
 def get_latest_business_day(reference_date: datetime) -> datetime:
-    date = reference_date - timedelta(days=1)
-    while date.weekday() >= 5:  # Saturday=5, Sunday=6
-        date -= timedelta(days=1)
-    return date
+    """Latest trading day before reference_date, skipping weekends and known holidays."""
+    return get_trading_calendar().previous_trading_day(reference_date)
+
+
+def nav_file_path(date: datetime) -> str:
+    return f"data/navall_{date.strftime('%Y-%m-%d')}.txt"
 
 
 def download_nav_file_for_date(date: datetime):
     nav_date = date.strftime('%d-%b-%Y')  # Format: 02-Apr-2025
     url = NAVALL_BASE_URL.format(nav_date, nav_date)
-    response = requests.get(url)
-    if response.status_code == 200 and any(char.isdigit() for char in response.text):
-        file_path = f"data/navall_{date.strftime('%Y-%m-%d')}.txt"
+    response = fetch_url(url)
+    if any(char.isdigit() for char in response.text):
+        file_path = nav_file_path(date)
         os.makedirs("data", exist_ok=True)
         with open(file_path, "wb") as f:
             f.write(response.content)
+        record_download(date, file_path)
         return file_path
     else:
-        raise Exception(
-            f"Failed to download file. Status code: {response.status_code}")
+        record_empty(date)
+        raise NoNavDataError(
+            f"Failed to download file. No NAV data in response for {date.strftime('%Y-%m-%d')}")
 
 
-def bulk_download_past_months(months: int = 3, start_date: datetime = None, end_date: datetime = None):
+def download_nav_files(dates, workers: int = DOWNLOAD_WORKERS, skip_existing: bool = True, on_result=None):
     """
-    Download NAV data for the specified number of past months.
-    
+    Download NAV files for many dates concurrently.
+
     Args:
-        months (int): Number of past months to download data for. Default is 3 months.
-        start_date (datetime): Optional start date for downloading. If not provided, will be calculated.
-        end_date (datetime): Optional end date for downloading. If not provided, will be calculated.
-    
+        dates (iterable): Dates (datetime or date) to download
+        workers (int): Number of download threads
+        skip_existing (bool): Reuse files already present under data/
+        on_result (callable): Called on the calling thread as each date
+            finishes, with (date, file_path, None) or (date, None, error);
+            error is NoNavDataError for a day without data
+
     Returns:
-        list: List of successfully downloaded file paths
+        tuple: (downloaded, failed) where downloaded maps date -> file path
+            and failed maps date -> error message
     """
-    # If dates are not provided, calculate them
-    if not end_date:
-        end_date = get_latest_business_day(datetime.now())
-    if not start_date:
-        start_date = end_date - timedelta(days=months*30)  # Approximate start date
-    
-    downloaded_files = []
-    
-    # Create data directory if it doesn't exist
+    downloaded = {}
+    failed = {}
+    pending = []
+
     os.makedirs("data", exist_ok=True)
-    
-    # Calculate total business days to process
-    current_date = end_date
-    while current_date >= start_date:
-        if current_date.weekday() < 5:  # Only weekdays
-            file_path = f"data/navall_{current_date.strftime('%Y-%m-%d')}.txt"
-            
-            # Skip if file already exists
-            if not os.path.exists(file_path):
-                try:
-                    print(f"Downloading NAV data for {current_date.strftime('%Y-%m-%d')}...")
-                    download_nav_file_for_date(current_date)
-                    downloaded_files.append(file_path)
-                    print(f"Successfully downloaded: {file_path}")
-                except Exception as e:
-                    print(f"Failed to download for {current_date.strftime('%Y-%m-%d')}: {e}")
-            else:
-                print(f"File already exists: {file_path}")
-                downloaded_files.append(file_path)
-        
-        current_date -= timedelta(days=1)
-    
-    # Print summary
-    print(f"\nDownload Summary:")
-    print(f"Start date: {start_date.strftime('%Y-%m-%d')}")
-    print(f"End date: {end_date.strftime('%Y-%m-%d')}")
-    print(f"Total files downloaded: {len(downloaded_files)}")
-    
-    return downloaded_files
-
-
-def bulk_download_past_years(years: int = 15):
-    today = datetime.now()
-    for i in range(years * 365):
-        date = today - timedelta(days=i)
-        if date.weekday() >= 5:  # Skip weekends
-            continue
-        file_path = f"data/navall_{date.strftime('%Y-%m-%d')}.txt"
-        if not os.path.exists(file_path):
+
+    for date in dates:
+        file_path = nav_file_path(date)
+        if skip_existing and os.path.exists(file_path):
+            print(f"File already exists: {file_path}")
+            downloaded[date] = file_path
+            if on_result:
+                on_result(date, file_path, None)
+        else:
+            pending.append(date)
+
+    if not pending:
+        return downloaded, failed
+
+    def _download(date):
+        if not isinstance(date, datetime):
+            date = datetime.combine(date, datetime.min.time())
+        return download_nav_file_for_date(date)
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        futures = {executor.submit(_download, date): date for date in pending}
+        for future in as_completed(futures):
+            date = futures[future]
             try:
-                print(f"Downloading for {date.strftime('%Y-%m-%d')}...")
-                download_nav_file_for_date(date)
+                downloaded[date] = future.result()
+                print(f"Successfully downloaded: {downloaded[date]}")
             except Exception as e:
-                print(f"Failed for {date.strftime('%Y-%m-%d')}: {e}")
+                failed[date] = str(e)
+                if not isinstance(e, NoNavDataError):
+                    record_download_failure(date, str(e))
+                print(f"Failed to download for {date.strftime('%Y-%m-%d')}: {e}")
+                if on_result:
+                    on_result(date, None, e)
+                continue
+            if on_result:
+                on_result(date, downloaded[date], None)
+
+    return downloaded, failed
+
+
+def split_nav_range(content: bytes) -> dict:
+    """
+    Split a multi-day NAV report into one report per NAV date.
+
+    Each partition gets the column header plus the scheme type and fund house
+    lines that precede its records, so it parses exactly like a single-day
+    download. Works on raw bytes so no decoding is needed.
+
+    Args:
+        content (bytes): Raw response body for a frmdt..todt window
+
+    Returns:
+        dict: Maps 'YYYY-MM-DD' -> bytes for every date that has records
+    """
+    header = None
+    scheme_type = fund_house = None
+    partitions = {}
+    emitted = {}  # date -> (scheme_type, fund_house) last written to it
+    date_keys = {}
+
+    for raw_line in content.splitlines():
+        line = raw_line.strip()
+        if not line:
+            continue
+        if b';' not in line:
+            # Same classification as parse_nav_file
+            if line.startswith(b"Open Ended") or line.startswith(b"Close Ended"):
+                scheme_type = line
+            elif b"Fund" in line:
+                fund_house = line
+            continue
+        parts = line.split(b';')
+        if len(parts) != 8:
+            continue
+        nav_date = parts[7].strip()
+        if nav_date == b'Date':
+            header = line
+            continue
+        key = date_keys.get(nav_date)
+        if key is None:
+            try:
+                key = datetime.strptime(nav_date.decode('ascii'), '%d-%b-%Y').strftime('%Y-%m-%d')
+            except (UnicodeDecodeError, ValueError):
+                continue
+            date_keys[nav_date] = key
+        lines = partitions.get(key)
+        if lines is None:
+            lines = partitions[key] = [header] if header else []
+            emitted[key] = (None, None)
+        last_type, last_house = emitted[key]
+        if scheme_type is not None and scheme_type != last_type:
+            lines.append(scheme_type)
+        if fund_house is not None and fund_house != last_house:
+            lines.append(fund_house)
+        emitted[key] = (scheme_type, fund_house)
+        lines.append(line)
+
+    return {key: b'\n'.join(lines) + b'\n' for key, lines in partitions.items()}
+
+
+def download_nav_range(start_date: datetime, end_date: datetime) -> tuple:
+    """
+    Download a frmdt..todt window in one request and write per-date files.
+
+    Args:
+        start_date (datetime): First day of the window
+        end_date (datetime): Last day of the window (inclusive)
+
+    Days missing from the response are not recorded as empty here: a
+    truncated range response looks the same as a holiday, so callers
+    confirm missing days with a single-day request first.
+
+    Returns:
+        tuple: (files, response_size) where files maps 'YYYY-MM-DD' -> file path
+    """
+    url = NAVALL_BASE_URL.format(start_date.strftime('%d-%b-%Y'), end_date.strftime('%d-%b-%Y'))
+    response = fetch_url(url)
+    os.makedirs("data", exist_ok=True)
+    files = {}
+    for key, content in split_nav_range(response.content).items():
+        file_path = f"data/navall_{key}.txt"
+        with open(file_path, "wb") as f:
+            f.write(content)
+        files[key] = file_path
+        record_download(datetime.strptime(key, '%Y-%m-%d'), file_path)
+    return files, len(response.content)
+
+
+def _next_window(pending: deque, window_days: int) -> list:
+    # Consecutive pending dates spanning at most window_days calendar days
+    first = pending[0]
+    window = []
+    while pending and (pending[0] - first).days < window_days:
+        window.append(pending.popleft())
+    return window
+
+
+def download_nav_files_by_range(dates, workers: int = DOWNLOAD_WORKERS, skip_existing: bool = True,
+                                on_result=None):
+    """
+    Download NAV files for many dates using multi-day range requests.
+
+    Window size adapts to the observed response size per calendar day so
+    that each response stays near RANGE_TARGET_BYTES. Windows that fail, and
+    days a window response left out, are retried one day at a time; only an
+    empty single-day response marks a day as empty in the manifest.
+
+    Args:
+        dates (iterable): Dates (datetime or date) to download
+        workers (int): Number of concurrent range requests
+        skip_existing (bool): Reuse files already present under data/
+        on_result (callable): Called as each date finishes, as in
+            download_nav_files; days a window left out are reported once
+            their single-day retry finishes
+
+    Returns:
+        tuple: (downloaded, failed) with the same shape as download_nav_files
+    """
+    downloaded = {}
+    failed = {}
+    pending = []
+
+    for date in dates:
+        file_path = nav_file_path(date)
+        if skip_existing and os.path.exists(file_path):
+            downloaded[date] = file_path
+            if on_result:
+                on_result(date, file_path, None)
+        else:
+            pending.append(date)
+    pending = deque(sorted(pending))
+
+    window_days = max(1, min(RANGE_INITIAL_DAYS, RANGE_MAX_DAYS))
+    bytes_per_day = None
+    retry_daily = []
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        running = {}
+        while pending or running:
+            while pending and len(running) < max(1, workers):
+                window = _next_window(pending, window_days)
+                print(f"Downloading NAV data for {window[0].strftime('%Y-%m-%d')} "
+                      f"to {window[-1].strftime('%Y-%m-%d')}...")
+                future = executor.submit(download_nav_range, window[0], window[-1])
+                running[future] = window
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                window = running.pop(future)
+                try:
+                    files, size = future.result()
+                except Exception as e:
+                    print(f"Failed range {window[0].strftime('%Y-%m-%d')} to "
+                          f"{window[-1].strftime('%Y-%m-%d')}: {e}")
+                    retry_daily.extend(window)
+                    continue
+
+                for date in window:
+                    file_path = files.get(date.strftime('%Y-%m-%d'))
+                    if file_path:
+                        downloaded[date] = file_path
+                        if on_result:
+                            on_result(date, file_path, None)
+                    else:
+                        # Holiday or truncated response; a single-day request tells them apart
+                        retry_daily.append(date)
+
+                # Re-size the next windows from an average of observed sizes
+                span = (window[-1] - window[0]).days + 1
+                observed = size / span
+                bytes_per_day = observed if bytes_per_day is None else (bytes_per_day + observed) / 2
+                if bytes_per_day > 0:
+                    window_days = int(max(1, min(RANGE_MAX_DAYS, RANGE_TARGET_BYTES // bytes_per_day)))
+
+    if retry_daily:
+        retried, retry_failed = download_nav_files(retry_daily, workers=workers, skip_existing=False,
+                                                   on_result=on_result)
+        downloaded.update(retried)
+        failed.update(retry_failed)
+
+    print(f"Range download complete: {len(downloaded)} files, {len(failed)} dates without data")
+    return downloaded, failed
+
@@ -1,11 +1,18 @@
 import argparse
-from downloader.download_nav import download_nav_file_for_date, get_latest_business_day, bulk_download_past_years, bulk_download_past_months
-from parser.parse_nav import parse_nav_file
-from db.insert_nav import insert_nav, get_earliest_nav_date, get_latest_nav_date
+from downloader.download_nav import get_latest_business_day
+from db.insert_nav import get_earliest_nav_date, get_latest_nav_date
+from planner.trading_calendar import get_trading_calendar
+from planner.gap_planner import plan_gaps
+from pipeline.yearly_loader import plan_yearly_dates
+from pipeline.job_runner import run_job
+from telemetry.instruments import get_telemetry, flush, profile_run
+from config.settings import (
+    DOWNLOAD_RANGE_FETCH, INSERT_ENGINE, YEARLY_WORKERS, ARCHIVE_ENABLED, PROFILER,
+    PIPELINE_DOWNLOAD_WORKERS, PIPELINE_PARSE_WORKERS, PIPELINE_LOAD_WORKERS,
+)
+from calendar import monthrange
 from datetime import datetime, timedelta
 import logging
-import os
-import glob
 import sys
 
 # Configure logging
@@ -18,248 +25,221 @@ logging.basicConfig(
     ]
 )
 
-def run_daily_job():
+def months_before(date, months: int):
+    """Same day of month, months earlier, clipped to the end of a shorter month."""
+    year, month = divmod(date.year * 12 + date.month - 1 - months, 12)
+    month += 1
+    return date.replace(year=year, month=month, day=min(date.day, monthrange(year, month)[1]))
+
+def plan_daily_dates() -> list:
     """
-    Run the daily job to download and process the latest NAV data.
-    Checks for missing days between the latest data in database and yesterday,
-    and downloads data for those missing days.
+    Trading days between the latest day in the database and yesterday.
+
+    Returns:
+        list: Dates to process, newest first
     """
-    start_time = datetime.now()
-    logging.info("Starting daily job")
-    
-    try:
-        # Get the latest date from database
-        latest_db_date = get_latest_nav_date()
-        if latest_db_date is None:
-            logging.info("No data in database. Starting with yesterday's data.")
-            latest_db_date = get_latest_business_day(datetime.now()).date() - timedelta(days=1)
-        
-        # Get yesterday's date
-        yesterday = get_latest_business_day(datetime.now()).date()
-        
-        # Calculate missing days
-        missing_days = []
-        current_date = latest_db_date + timedelta(days=1)
-        while current_date <= yesterday:
-            if current_date.weekday() < 5:  # Only weekdays
-                missing_days.append(current_date)
-            current_date += timedelta(days=1)
-        
-        if not missing_days:
-            logging.info("No missing days found. Database is up to date.")
-            return
-            
-        logging.info(f"Found {len(missing_days)} missing days to process")
-        
-        # Process each missing day
-        success_count = 0
-        failed_count = 0
-        failed_dates = []
-        
-        for date in missing_days:
-            try:
-                logging.info(f"Processing data for {date.strftime('%Y-%m-%d')}")
-                
-                # Download NAV file
-                file_path = f"data/navall_{date.strftime('%Y-%m-%d')}.txt"
-                if not os.path.exists(file_path):
-                    download_nav_file_for_date(datetime.combine(date, datetime.min.time()))
-                
-                # Process the file
-                df = parse_nav_file(file_path)
-                if df is not None and not df.empty:
-                    # Save parsed data to CSV
-                    csv_path = file_path.replace('.txt', '.csv')
-                    df.to_csv(csv_path, index=False)
-                    
-                    # Insert data into database
-                    insert_nav(df)
-                    success_count += 1
-                    logging.info(f"Successfully processed data for {date.strftime('%Y-%m-%d')}")
-                else:
-                    logging.warning(f"No data found for {date.strftime('%Y-%m-%d')}")
-                    failed_count += 1
-                    failed_dates.append(date.strftime('%Y-%m-%d'))
-                    
-            except Exception as e:
-                failed_count += 1
-                failed_dates.append(date.strftime('%Y-%m-%d'))
-                logging.error(f"Error processing {date.strftime('%Y-%m-%d')}: {str(e)}")
-        
-        # Print summary
-        duration = datetime.now() - start_time
-        logging.info("\nDaily Job Summary:")
-        logging.info(f"Total days processed: {len(missing_days)}")
-        logging.info(f"Successfully processed: {success_count}")
-        logging.info(f"Failed to process: {failed_count}")
-        if failed_dates:
-            logging.info("Failed dates:")
-            for date in failed_dates:
-                logging.info(f"  - {date}")
-        logging.info(f"Total duration: {duration}")
-            
-    except Exception as e:
-        logging.error(f"Error in daily job: {str(e)}")
-        raise
-    finally:
-        duration = datetime.now() - start_time
-        logging.info(f"Daily job completed in {duration}")
+    # Pick up holidays learned by earlier runs
+    calendar = get_trading_calendar(reload=True)
+    yesterday = get_latest_business_day(datetime.now()).date()
+
+    latest_db_date = get_latest_nav_date()
+    if latest_db_date is None:
+        logging.info("No data in database. Starting with yesterday's data.")
+        latest_db_date = yesterday - timedelta(days=1)
+
+    return calendar.trading_day_list(latest_db_date + timedelta(days=1), yesterday, newest_first=True)
+
+def plan_monthly_dates(months: int = 3) -> list:
+    """
+    Trading days in the months before the earliest day in the database
+    (or before yesterday if the database is empty).
+
+    Returns:
+        list: Dates to process, newest first
+    """
+    calendar = get_trading_calendar(reload=True)
+    earliest_date = get_earliest_nav_date()
+    if earliest_date:
+        end_date = earliest_date - timedelta(days=1)  # One day before earliest date
+    else:
+        logging.info("No existing data in database. Processing default date range.")
+        end_date = get_latest_business_day(datetime.now()).date()
+    start_date = months_before(end_date, months)
+
+    logging.info(f"Processing data from {start_date.strftime('%Y-%m-%d')} to {end_date.strftime('%Y-%m-%d')}")
+    return calendar.trading_day_list(start_date, end_date, newest_first=True)
 
-def run_monthly_job(months: int = 3):
+def plan_range_dates(start_date, end_date=None) -> list:
     """
-    Run the monthly job to download and process NAV data.
-    
+    Every trading day from start_date to end_date, loaded or not.
+
+    Args:
+        start_date (date): First day to process
+        end_date (date): Last day to process. Default: latest business day.
+
+    Returns:
+        list: Dates to process, newest first
+    """
+    calendar = get_trading_calendar(reload=True)
+    if end_date is None:
+        end_date = get_latest_business_day(datetime.now()).date()
+    logging.info(f"Processing data from {start_date.strftime('%Y-%m-%d')} to {end_date.strftime('%Y-%m-%d')}")
+    return calendar.trading_day_list(start_date, end_date, newest_first=True)
+
+def run_daily_job(**options) -> dict:
+    """
+    Load every trading day missing since the latest day in the database.
+
+    Args:
+        **options: Execution options passed to run_job (engine, delta, dry_run, ...)
+    """
+    dates = plan_daily_dates()
+    if not dates:
+        logging.info("No missing days found. Database is up to date.")
+    return run_job('daily', dates, **options)
+
+def run_monthly_job(months: int = 3, **options) -> dict:
+    """
+    Extend the history backwards by the given number of months.
+
     Args:
         months (int): Number of months to process. Default is 3 months.
+        **options: Execution options passed to run_job
     """
-    start_time = datetime.now()
-    logging.info(f"Starting monthly job for {months} months")
-    
-    try:
-        # Get the earliest date from database
-        earliest_date = get_earliest_nav_date()
-        if earliest_date:
-            # Calculate the date range
-            end_date = earliest_date - timedelta(days=1)  # One day before earliest date
-            start_date = end_date - timedelta(days=months*30)  # months ago
-            
-            logging.info(f"Processing data from {start_date.strftime('%Y-%m-%d')} to {end_date.strftime('%Y-%m-%d')}")
-            
-            # Download NAV files
-            downloaded_files = bulk_download_past_months(months, start_date=start_date, end_date=end_date)
-            if not downloaded_files:
-                logging.warning("No files were downloaded")
-                return
-                
-            logging.info(f"Downloaded {len(downloaded_files)} files")
-            
-            # Process each downloaded file
-            success_count = 0
-            failed_count = 0
-            failed_files = []
-            
-            for file_path in downloaded_files:
-                try:
-                    logging.info(f"Processing file: {file_path}")
-                    
-                    # Parse the NAV file
-                    df = parse_nav_file(file_path)
-                    if df is None or df.empty:
-                        logging.warning(f"No data found in file: {file_path}")
-                        continue
-                    
-                    # Save parsed data to CSV (for backup/verification)
-                    csv_path = file_path.replace('.txt', '.csv')
-                    df.to_csv(csv_path, index=False)
-                    logging.info(f"Saved parsed data to: {csv_path}")
-                    
-                    # Insert data into database
-                    insert_nav(df)  # Pass the DataFrame directly
-                    success_count += 1
-                    logging.info(f"Successfully processed: {file_path}")
-                    
-                except Exception as e:
-                    failed_count += 1
-                    failed_files.append(file_path)
-                    logging.error(f"Error processing {file_path}: {str(e)}")
-            
-            # Print summary
-            duration = datetime.now() - start_time
-            logging.info("\nMonthly Job Summary:")
-            logging.info(f"Total files processed: {len(downloaded_files)}")
-            logging.info(f"Successfully processed: {success_count}")
-            logging.info(f"Failed to process: {failed_count}")
-            if failed_files:
-                logging.info("Failed files:")
-                for file in failed_files:
-                    logging.info(f"  - {file}")
-            logging.info(f"Total duration: {duration}")
-            
-        else:
-            logging.info("No existing data in database. Processing default date range.")
-            # If no data exists, use the default behavior
-            downloaded_files = bulk_download_past_months(months)
-            if not downloaded_files:
-                logging.warning("No files were downloaded")
-                return
-                
-            logging.info(f"Downloaded {len(downloaded_files)} files")
-            
-            # Process each downloaded file
-            success_count = 0
-            failed_count = 0
-            failed_files = []
-            
-            for file_path in downloaded_files:
-                try:
-                    logging.info(f"Processing file: {file_path}")
-                    
-                    # Parse the NAV file
-                    df = parse_nav_file(file_path)
-                    if df is None or df.empty:
-                        logging.warning(f"No data found in file: {file_path}")
-                        continue
-                    
-                    # Save parsed data to CSV (for backup/verification)
-                    csv_path = file_path.replace('.txt', '.csv')
-                    df.to_csv(csv_path, index=False)
-                    logging.info(f"Saved parsed data to: {csv_path}")
-                    
-                    # Insert data into database
-                    insert_nav(df)  # Pass the DataFrame directly
-                    success_count += 1
-                    logging.info(f"Successfully processed: {file_path}")
-                    
-                except Exception as e:
-                    failed_count += 1
-                    failed_files.append(file_path)
-                    logging.error(f"Error processing {file_path}: {str(e)}")
-            
-            # Print summary
-            duration = datetime.now() - start_time
-            logging.info("\nMonthly Job Summary:")
-            logging.info(f"Total files processed: {len(downloaded_files)}")
-            logging.info(f"Successfully processed: {success_count}")
-            logging.info(f"Failed to process: {failed_count}")
-            if failed_files:
-                logging.info("Failed files:")
-                for file in failed_files:
-                    logging.info(f"  - {file}")
-            logging.info(f"Total duration: {duration}")
-            
-    except Exception as e:
-        logging.error(f"Error in monthly job: {str(e)}")
-        raise
-    finally:
-        # Clean up temporary CSV files
-        try:
-            for file_path in downloaded_files:
-                csv_path = file_path.replace('.txt', '.csv')
-                if os.path.exists(csv_path):
-                    os.remove(csv_path)
-                    logging.info(f"Cleaned up temporary file: {csv_path}")
-        except Exception as e:
-            logging.error(f"Error cleaning up temporary files: {str(e)}")
-        
-        logging.info("Monthly job completed")
+    # Metrics are refreshed for recent days by the daily job, not for backfills
+    options.setdefault('metrics', False)
+    return run_job('monthly', plan_monthly_dates(months), **options)
+
+def run_yearly_job(years: int = 1, **options) -> dict:
+    """
+    Backfill the past years, one worker process per year.
+
+    Args:
+        years (int): Number of years to process.
+        **options: Execution options passed to run_job
+    """
+    options.setdefault('executor', 'sharded')
+    options.setdefault('metrics', False)
+    return run_job('yearly', plan_yearly_dates(years), **options)
+
+def run_range_job(start_date, end_date=None, **options) -> dict:
+    """
+    Process an explicit range of days, such as re-checking loaded days for
+    AMFI restatements with delta=True.
+
+    Args:
+        start_date (date): First day to process
+        end_date (date): Last day to process. Default: latest business day.
+        **options: Execution options passed to run_job
+    """
+    return run_job('range', plan_range_dates(start_date, end_date), **options)
+
+def run_gap_job(start_date=None, end_date=None, **options) -> dict:
+    """
+    Find missing and partially loaded days anywhere in the history and load them.
+
+    Args:
+        start_date (date): First day to check. Default: earliest day in the database.
+        end_date (date): Last day to check. Default: latest trading day.
+        **options: Execution options passed to run_job
+    """
+    plan = plan_gaps(start_date, end_date)
+    logging.info(f"Missing days: {len(plan['missing'])}, partial days: {len(plan['partial'])}")
+    # Gap days may be marked loaded in the manifest, so bypass it
+    options['force'] = True
+    return run_job('gaps', plan['missing'] + plan['partial'], **options)
 
 def main():
     # Set up argument parser
     parser = argparse.ArgumentParser(description='AMFI NAV Loader - Download and process mutual fund NAV data')
     parser.add_argument('--months', type=int, default=1, help='Number of months to process (for monthly job). Default: 1')
     parser.add_argument('--yearly', type=int, default=1, help='Number of years to process (for yearly job). Default: 1')
-    
+    parser.add_argument('--fill-gaps', action='store_true',
+                        help='Find and load missing or partially loaded days anywhere in the history')
+    parser.add_argument('--gap-start', type=lambda s: datetime.strptime(s, '%Y-%m-%d').date(),
+                        help='First day checked by --fill-gaps (YYYY-MM-DD). Default: earliest loaded day')
+    parser.add_argument('--gap-end', type=lambda s: datetime.strptime(s, '%Y-%m-%d').date(),
+                        help='Last day checked by --fill-gaps (YYYY-MM-DD). Default: latest trading day')
+    parser.add_argument('--start', type=lambda s: datetime.strptime(s, '%Y-%m-%d').date(),
+                        help='Process every trading day from this date (YYYY-MM-DD), even if already loaded; '
+                             'with --delta, re-checks the range for restated NAVs')
+    parser.add_argument('--end', type=lambda s: datetime.strptime(s, '%Y-%m-%d').date(),
+                        help='Last day processed with --start (YYYY-MM-DD). Default: latest business day')
+
+    # Execution options, shared by every mode
+    parser.add_argument('--executor', choices=['pipeline', 'sharded'], default=None,
+                        help='pipeline: overlapping download/parse/load stages; sharded: one process per year. '
+                             'Default: sharded for --yearly, pipeline otherwise')
+    parser.add_argument('--range-fetch', action='store_true', default=DOWNLOAD_RANGE_FETCH,
+                        help='Download multi-day windows in one request')
+    parser.add_argument('--engine', choices=['executemany', 'load_data'], default=INSERT_ENGINE,
+                        help=f'Database insert engine. Default: {INSERT_ENGINE}')
+    parser.add_argument('--force', action='store_true',
+                        help='Reprocess days the manifest marks as loaded or holidays')
+    parser.add_argument('--delta', action='store_true',
+                        help='Download days again and only load rows that are new or changed since the last load')
+    parser.add_argument('--dry-run', action='store_true',
+                        help='Plan the run and report the days it would process without downloading or loading')
+    parser.add_argument('--no-archive', dest='archive', action='store_false', default=ARCHIVE_ENABLED,
+                        help='Do not write or read the Parquet archive')
+    parser.add_argument('--download-workers', type=int, default=PIPELINE_DOWNLOAD_WORKERS,
+                        help=f'Download threads (pipeline). Default: {PIPELINE_DOWNLOAD_WORKERS}')
+    parser.add_argument('--parse-workers', type=int, default=PIPELINE_PARSE_WORKERS,
+                        help=f'Parse/validate processes (pipeline). Default: {PIPELINE_PARSE_WORKERS}')
+    parser.add_argument('--load-workers', type=int, default=PIPELINE_LOAD_WORKERS,
+                        help=f'Database load threads (pipeline). Default: {PIPELINE_LOAD_WORKERS}')
+    parser.add_argument('--workers', type=int, default=YEARLY_WORKERS,
+                        help=f'Worker processes, one year each (sharded). Default: {YEARLY_WORKERS}')
+    parser.add_argument('--profile', choices=['cprofile', 'pyinstrument'], default=PROFILER or None,
+                        help='Profile the job run and write the result to PROFILE_DIR')
+
     args = parser.parse_args()
-    
+    if args.end and not args.start:
+        parser.error('--end requires --start')
+
+    options = {
+        'engine': args.engine,
+        'range_fetch': args.range_fetch,
+        'force': args.force,
+        'delta': args.delta,
+        'dry_run': args.dry_run,
+        'archive': args.archive,
+        'download_workers': args.download_workers,
+        'parse_workers': args.parse_workers,
+        'load_workers': args.load_workers,
+        'shard_workers': args.workers,
+    }
+    if args.executor:
+        options['executor'] = args.executor
+
+    if args.fill_gaps:
+        job = 'gaps'
+    elif args.start:
+        job = 'range'
     # Check if yearly argument was explicitly provided
-    if '--yearly' in sys.argv:
-        logging.info(f"Starting yearly job for {args.yearly} years")
-        bulk_download_past_years(args.yearly)
+    elif '--yearly' in sys.argv:
+        job = 'yearly'
     # Check if months argument was explicitly provided
     elif '--months' in sys.argv:
-        run_monthly_job(args.months)
+        job = 'monthly'
     else:
-        run_daily_job()
+        job = 'daily'
+
+    try:
+        with profile_run(job, args.profile or ''), get_telemetry().timer('job', job=job):
+            if job == 'gaps':
+                run_gap_job(args.gap_start, args.gap_end, **options)
+            elif job == 'range':
+                run_range_job(args.start, args.end, **options)
+            elif job == 'yearly':
+                run_yearly_job(args.yearly, **options)
+            elif job == 'monthly':
+                run_monthly_job(args.months, **options)
+            else:
+                run_daily_job(**options)
+    finally:
+        # Export stage timings and counters for this run
+        flush(job)
 
 if __name__ == "__main__":
     main()
@@ -1,57 +1,497 @@
+import codecs
+import mmap
+import os
+import time
+import numpy as np
 import pandas as pd
-import re
+import pyarrow as pa
+import pyarrow.compute as pc
 import chardet
+from telemetry.instruments import get_telemetry
+from config.settings import (
+    NAV_FILE_ENCODING,
+    NAV_ENCODING_SAMPLE_BYTES,
+    NAV_MMAP_THRESHOLD_BYTES,
+    PARSE_BATCH_ROWS,
+    PARSE_BATCH_BYTES,
+    PARSE_TYPED,
+)
 
+COLUMNS = [
+    "Scheme Type",
+    "Scheme Category",
+    "Scheme Sub-Category",
+    "Scheme Code",
+    "ISIN Div Payout/ISIN Growth",
+    "ISIN Div Reinvestment",
+    "Scheme Name",
+    "Net Asset Value",
+    "Date",
+    "Fund Structure"
+]
 
-def parse_nav_file(file_path):
-    with open(file_path, 'rb') as raw:
-        raw_data = raw.read()
-        result = chardet.detect(raw_data)
-        encoding = result['encoding'] or 'latin1'
+# Columns read from the record line itself, in file order (NAV and date handled separately)
+RECORD_STRING_COLUMNS = [
+    "Scheme Code",
+    "Scheme Name",
+    "ISIN Div Payout/ISIN Growth",
+    "ISIN Div Reinvestment",
+]
 
-    lines = raw_data.decode(encoding, errors='replace').splitlines()
+# Columns that come from the section and fund house lines
+CONTEXT_COLUMNS = [
+    "Scheme Type",
+    "Scheme Category",
+    "Scheme Sub-Category",
+    "Fund Structure",
+]
 
-    data = []
-    scheme_type = scheme_category = scheme_sub_category = fund_structure = ""
+
+def detect_encoding(file_path, sample_size: int = NAV_ENCODING_SAMPLE_BYTES) -> str:
+    """
+    Detect the file encoding from a prefix sample instead of the whole file.
+
+    NAV_FILE_ENCODING, when configured, skips detection entirely.
+    """
+    if NAV_FILE_ENCODING:
+        return NAV_FILE_ENCODING
+    with get_telemetry().timer('encoding_detect'):
+        with open(file_path, 'rb') as raw:
+            sample = raw.read(sample_size)
+        encoding = chardet.detect(sample)['encoding'] or 'latin1'
+    # A pure-ASCII prefix says nothing about the rest of the file
+    if encoding.lower() == 'ascii':
+        encoding = 'utf-8'
+    return encoding
+
+
+def _is_ascii_compatible(encoding: str) -> bool:
+    """True if ';', newlines and ASCII text keep their byte values in encoding."""
+    try:
+        return 'Ab;\n'.encode(encoding) == b'Ab;\n'
+    except LookupError:
+        return False
+
+
+def _scan_nav_lines_mmap(file_path, encoding: str):
+    """
+    mmap-backed version of _scan_nav_lines.
+
+    Lines are classified and split as bytes directly over the mapped file;
+    only the six fields callers use are decoded, and section/fund house
+    lines are decoded only when seen. Nothing proportional to the file
+    size is held in memory, but copying and decoding line by line is slower
+    than buffered text reads, so it is only used when asked for.
+    """
+    scheme_type = scheme_category = scheme_sub_category = ""
     fund_house = ""
+    context = (scheme_type, scheme_category, scheme_sub_category, fund_house)
 
-    for line in lines:
-        line = line.strip()
-        if not line:
-            continue
-        if ';' not in line:
-            if line.startswith("Open Ended") or line.startswith("Close Ended"):
-                scheme_type = line
-                scheme_category = scheme_sub_category = ""
-            elif "Fund" in line:
-                fund_house = line
+    with open(file_path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            for raw_line in iter(mm.readline, b''):
+                line = raw_line.strip()
+                if not line:
+                    continue
+                if b';' not in line:
+                    if line.startswith(b"Open Ended") or line.startswith(b"Close Ended"):
+                        scheme_type = line.decode(encoding, errors='replace')
+                        scheme_category = scheme_sub_category = ""
+                    elif b"Fund" in line:
+                        fund_house = line.decode(encoding, errors='replace')
+                    else:
+                        continue
+                    context = (scheme_type, scheme_category, scheme_sub_category, fund_house)
+                    continue
+                fields = line.split(b';')
+                if len(fields) == 8:
+                    # Repurchase and sale prices (fields 5 and 6) are never used
+                    yield context, [
+                        fields[0].decode(encoding, errors='replace'),
+                        fields[1].decode(encoding, errors='replace'),
+                        fields[2].decode(encoding, errors='replace'),
+                        fields[3].decode(encoding, errors='replace'),
+                        fields[4].decode(encoding, errors='replace'),
+                        '',
+                        '',
+                        fields[7].decode(encoding, errors='replace'),
+                    ]
+
+
+def _scan_nav_lines(file_path, encoding: str = None, use_mmap: bool = False):
+    """
+    Yield (context, parts) for each 8-field record line.
+
+    context is a (scheme_type, scheme_category, scheme_sub_category, fund_house)
+    tuple; the same tuple object is reused until a section or fund house
+    line changes it, so callers can compare it by identity.
+
+    With use_mmap, files in an ASCII-compatible encoding are scanned
+    through mmap instead of buffered text reads.
+    """
+    encoding = encoding or detect_encoding(file_path)
+    if use_mmap and _is_ascii_compatible(encoding):
+        yield from _scan_nav_lines_mmap(file_path, encoding)
+        return
+
+    scheme_type = scheme_category = scheme_sub_category = ""
+    fund_house = ""
+    context = (scheme_type, scheme_category, scheme_sub_category, fund_house)
+
+    with open(file_path, 'r', encoding=encoding, errors='replace') as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            if ';' not in line:
+                if line.startswith("Open Ended") or line.startswith("Close Ended"):
+                    scheme_type = line
+                    scheme_category = scheme_sub_category = ""
+                elif "Fund" in line:
+                    fund_house = line
+                else:
+                    continue
+                context = (scheme_type, scheme_category, scheme_sub_category, fund_house)
+                continue
+            parts = line.split(';')
+            if len(parts) == 8:
+                yield context, parts
+
+
+def iter_nav_records(file_path, encoding: str = None, use_mmap: bool = False):
+    """
+    Stream NAV records from a file one line at a time.
+
+    Args:
+        file_path (str): Path to the NAV text file
+        encoding (str): Optional encoding; detected from a sample if omitted
+        use_mmap (bool): Scan the file through mmap instead of buffered
+            text reads, which is slower but holds no read buffer
+
+    Yields:
+        list: One record with the fields listed in COLUMNS
+    """
+    for context, parts in _scan_nav_lines(file_path, encoding, use_mmap):
+        scheme_type, scheme_category, scheme_sub_category, fund_house = context
+        scheme_code, scheme_name, isin_growth, isin_reinv, nav, repurchase, sale, nav_date = parts
+        yield [
+            scheme_type,
+            scheme_category,
+            scheme_sub_category,
+            scheme_code,
+            isin_growth,
+            isin_reinv,
+            scheme_name,
+            nav,
+            nav_date,
+            fund_house
+        ]
+
+
+def iter_nav_batches(file_path, batch_size: int = PARSE_BATCH_ROWS, encoding: str = None,
+                     use_mmap: bool = False):
+    """
+    Stream NAV records as all-string DataFrames of at most batch_size rows.
+
+    Only the current batch of records is held, so a consumer that reduces
+    each batch before asking for the next (validate_batches) never has the
+    whole file as Python strings in memory. Parse time, rows and bytes are
+    recorded once the file is exhausted.
+    """
+    telemetry = get_telemetry()
+    seconds = 0.0
+    rows = 0
+    batch = []
+    start = time.perf_counter()
+    for record in iter_nav_records(file_path, encoding=encoding, use_mmap=use_mmap):
+        batch.append(record)
+        if len(batch) >= batch_size:
+            frame = pd.DataFrame.from_records(batch, columns=COLUMNS)
+            batch = []
+            rows += len(frame)
+            # Time spent in the consumer between batches is not parse time
+            seconds += time.perf_counter() - start
+            yield frame
+            start = time.perf_counter()
+    if batch:
+        frame = pd.DataFrame.from_records(batch, columns=COLUMNS)
+        batch = []
+        rows += len(frame)
+        seconds += time.perf_counter() - start
+        yield frame
+        start = time.perf_counter()
+    seconds += time.perf_counter() - start
+
+    telemetry.observe('parse', seconds, typed=False)
+    telemetry.incr('parse_rows', rows, typed=False)
+    telemetry.incr('parse_bytes', os.path.getsize(file_path))
+
+
+# Numbers pd.to_numeric would accept from the NAV field; anything else becomes NaN
+_NUMBER_PATTERN = r'^[+-]?(\d+\.?\d*|\.\d+)([eE][+-]?\d+)?$'
+
+
+def _text_array(buffer: pa.Buffer, encoding: str) -> pa.Array:
+    """
+    buffer as a one-element large_string array. UTF-8 is wrapped without
+    decoding; other encodings are decoded once as a whole.
+    """
+    if buffer.size == 0:
+        return pa.array([''], type=pa.large_string())
+    if codecs.lookup(encoding).name == 'utf-8':
+        offsets = pa.py_buffer(np.array([0, buffer.size], dtype=np.int64))
+        raw = pa.Array.from_buffers(pa.large_binary(), 1, [None, offsets, buffer])
+        try:
+            return raw.cast(pa.large_string())
+        except pa.ArrowInvalid:
+            pass  # Invalid UTF-8: decode with replacement like the text reader
+    return pa.array([buffer.to_pybytes().decode(encoding, errors='replace')], type=pa.large_string())
+
+
+def _read_text_array(file_path, encoding: str, use_mmap: bool) -> pa.Array:
+    """The whole file as a one-element large_string array, over a memory map when use_mmap is set."""
+    if os.path.getsize(file_path) == 0:
+        return pa.array([''], type=pa.large_string())
+    if use_mmap and codecs.lookup(encoding).name == 'utf-8':
+        return _text_array(pa.memory_map(file_path).read_buffer(), encoding)
+    with open(file_path, 'rb') as f:
+        return _text_array(pa.py_buffer(f.read()), encoding)
+
+
+def _read_text_blocks(file_path, encoding: str, block_bytes: int):
+    """
+    Yield the file as text arrays of about block_bytes, each ending at a
+    line break, so at most one block is held. Encodings in which a newline
+    byte can occur inside a character are read as one block.
+    """
+    if not _is_ascii_compatible(encoding):
+        yield _read_text_array(file_path, encoding, use_mmap=False)
+        return
+    with open(file_path, 'rb') as f:
+        tail = b''
+        while True:
+            block = f.read(block_bytes)
+            data = tail + block
+            if block:
+                cut = data.rfind(b'\n') + 1
+                if cut == 0:
+                    # A single line longer than block_bytes
+                    tail = data
+                    continue
+                data, tail = data[:cut], data[cut:]
+            if data:
+                yield _text_array(pa.py_buffer(data), encoding)
+            if not block:
+                return
+
+
+def _encode(values: pa.Array) -> tuple:
+    """(int32 codes, categories) for a string array."""
+    encoded = pc.dictionary_encode(values)
+    return encoded.indices.to_numpy(zero_copy_only=False).astype(np.int32), encoded.dictionary.to_pylist()
+
+
+class _SharedCategories:
+    """Categories of one string column, shared by every batch of a file."""
+
+    def __init__(self):
+        self.codes = {}
+        self.values = []
+        self.dtype = pd.CategoricalDtype([])
+
+    def remap(self, codes: np.ndarray, categories: list) -> tuple:
+        """Map one batch's (codes, categories) onto the shared categories."""
+        mapping = np.empty(len(categories), dtype=np.int32)
+        for i, value in enumerate(categories):
+            code = self.codes.get(value)
+            if code is None:
+                code = self.codes[value] = len(self.values)
+                self.values.append(value)
+            mapping[i] = code
+        if len(self.values) != len(self.dtype.categories):
+            self.dtype = pd.CategoricalDtype(self.values)
+        return mapping[codes], self.dtype
+
+
+def parse_nav_columns(file_path, encoding: str = None, use_mmap: bool = None) -> dict:
+    """
+    Parse a NAV file into typed, dictionary-encoded columns with Arrow kernels.
+
+    The file is split into lines and fields by pyarrow.compute over one
+    buffer, so no Python object is created per row: section and fund house
+    lines are forward-filled onto the records below them, string columns
+    are dictionary-encoded, NAV becomes float64 (NaN where the value is not
+    numeric) and dates become datetime64[D] (NaT where unparseable), with
+    each distinct date string parsed once. The whole file is held at once;
+    iter_nav_column_batches does the same in bounded memory.
+
+    Args:
+        file_path (str): Path to the NAV text file
+        encoding (str): Optional encoding; detected from a sample if omitted
+        use_mmap (bool): Map the file instead of reading it; by default for
+            files of at least NAV_MMAP_THRESHOLD_BYTES
+
+    Returns:
+        dict: Column name -> numpy array, or (codes, categories) for strings
+    """
+    encoding = encoding or detect_encoding(file_path)
+    if use_mmap is None:
+        use_mmap = os.path.getsize(file_path) >= NAV_MMAP_THRESHOLD_BYTES
+    columns, _ = _text_columns(_read_text_array(file_path, encoding, use_mmap), ('', ''))
+    return columns
+
+
+def iter_nav_column_batches(file_path, encoding: str = None, batch_bytes: int = PARSE_BATCH_BYTES):
+    """
+    Stream a NAV file as typed DataFrames, one per block of about
+    batch_bytes of the file.
+
+    Each block goes through the same Arrow kernels as parse_nav_columns,
+    with the section and fund house in force at the end of one block
+    carried into the next, so memory stays bounded by the block size
+    whatever the file size. String columns share one CategoricalDtype per
+    column across batches (growing only when new values appear), so the
+    batches kept by a consumer do not each hold their own copy of every
+    scheme name. Blocks without records yield nothing. Parse time, rows
+    and bytes are recorded once the file is exhausted.
+    """
+    encoding = encoding or detect_encoding(file_path)
+    telemetry = get_telemetry()
+    seconds = 0.0
+    rows = 0
+    context = ('', '')
+    shared = {column: _SharedCategories() for column in COLUMNS}
+    start = time.perf_counter()
+    for text in _read_text_blocks(file_path, encoding, batch_bytes):
+        columns, context = _text_columns(text, context)
+        del text
+        for column, value in columns.items():
+            if isinstance(value, tuple):
+                columns[column] = shared[column].remap(*value)
+        frame = columns_to_frame(columns)
+        del columns
+        if frame.empty:
             continue
-        parts = line.split(';')
-        if len(parts) == 8:
-            scheme_code, scheme_name, isin_growth, isin_reinv, nav, repurchase, sale, nav_date = parts
-            data.append([
-                scheme_type,
-                scheme_category,
-                scheme_sub_category,
-                scheme_code,
-                isin_growth,
-                isin_reinv,
-                scheme_name,
-                nav,
-                nav_date,
-                fund_house
-            ])
-
-    df = pd.DataFrame.from_records(data, columns=[
-        "Scheme Type",
-        "Scheme Category",
-        "Scheme Sub-Category",
-        "Scheme Code",
-        "ISIN Div Payout/ISIN Growth",
-        "ISIN Div Reinvestment",
-        "Scheme Name",
-        "Net Asset Value",
-        "Date",
-        "Fund Structure"
-    ])
+        rows += len(frame)
+        # Time spent in the consumer between batches is not parse time
+        seconds += time.perf_counter() - start
+        yield frame
+        start = time.perf_counter()
+    seconds += time.perf_counter() - start
+
+    telemetry.observe('parse', seconds, typed=True)
+    telemetry.incr('parse_rows', rows, typed=True)
+    telemetry.incr('parse_bytes', os.path.getsize(file_path))
+
+
+def _text_columns(text: pa.Array, context: tuple) -> tuple:
+    """
+    parse_nav_columns over one text array.
+
+    context is the (scheme type, fund house) line in force before the
+    first line of text; returns (columns, context at its end).
+    """
+    lines = pc.utf8_trim_whitespace(pc.list_flatten(pc.split_pattern(text, '\n')))
+    has_fields = pc.match_substring(lines, ';')
+    is_section = pc.and_not(pc.or_(pc.starts_with(lines, 'Open Ended'), pc.starts_with(lines, 'Close Ended')),
+                            has_fields)
+    is_fund_house = pc.and_not(pc.and_not(pc.match_substring(lines, 'Fund'), is_section), has_fields)
+
+    # Context lines apply to every record below them until the next one
+    null = pa.scalar(None, pa.large_string())
+    scheme_type = pc.fill_null(pc.fill_null_forward(pc.if_else(is_section, lines, null)),
+                               pa.scalar(context[0], pa.large_string()))
+    fund_house = pc.fill_null(pc.fill_null_forward(pc.if_else(is_fund_house, lines, null)),
+                              pa.scalar(context[1], pa.large_string()))
+    if len(lines):
+        context = (scheme_type[-1].as_py(), fund_house[-1].as_py())
+
+    fields = pc.split_pattern(pc.filter(lines, has_fields), ';')
+    is_record = pc.equal(pc.list_value_length(fields), 8)
+    fields = pc.filter(fields, is_record)
+    record_rows = pc.filter(pc.indices_nonzero(has_fields), is_record)
+    del lines
+
+    count = len(fields)
+    flat = pc.list_flatten(fields)
+    del fields
+
+    def field(i):
+        return pc.take(flat, pa.array(np.arange(i, 8 * count, 8, dtype=np.int64)))
+
+    columns = {}
+    for i, column in enumerate(RECORD_STRING_COLUMNS):
+        columns[column] = _encode(field(i))
+    columns["Scheme Type"] = _encode(pc.take(scheme_type, record_rows))
+    columns["Fund Structure"] = _encode(pc.take(fund_house, record_rows))
+    # The report has no category columns; they stay empty like the text parser's
+    blank = (np.zeros(count, dtype=np.int32), [''])
+    columns["Scheme Category"] = blank
+    columns["Scheme Sub-Category"] = blank
+
+    nav = field(4)
+    nav = pc.if_else(pc.match_substring_regex(nav, _NUMBER_PATTERN), nav, null)
+    columns["Net Asset Value"] = pc.cast(nav, pa.float64()).to_numpy(zero_copy_only=False)
+
+    date_codes, date_values = _encode(field(7))
+    unique_dates = pd.to_datetime(pd.Series(date_values, dtype=object), format='%d-%b-%Y', errors='coerce')
+    unique_dates = unique_dates.to_numpy(dtype='datetime64[D]')
+    columns["Date"] = unique_dates[date_codes] if count else np.empty(0, dtype='datetime64[D]')
+    return columns, context
+
+
+def columns_to_frame(columns: dict) -> pd.DataFrame:
+    """Build a DataFrame with categorical string columns from parse_nav_columns output."""
+    data = {}
+    for column in COLUMNS:
+        value = columns[column]
+        if isinstance(value, tuple):
+            column_codes, categories = value
+            if isinstance(categories, pd.CategoricalDtype):
+                data[column] = pd.Categorical.from_codes(column_codes, dtype=categories)
+            else:
+                data[column] = pd.Categorical.from_codes(column_codes, categories=categories)
+        else:
+            data[column] = value
+    df = pd.DataFrame(data, columns=COLUMNS)
+    df["Date"] = df["Date"].astype('datetime64[ns]')
+    return df
+
+
+def parse_nav_file(file_path, encoding: str = None, typed: bool = PARSE_TYPED, use_mmap: bool = None):
+    """
+    Parse a NAV file into a DataFrame with the columns listed in COLUMNS.
+
+    The whole file ends up in the returned frame; callers that only need
+    validated rows should stream iter_nav_batches (string) or
+    iter_nav_column_batches (typed) through validate_batches, which keeps
+    memory bounded whatever the file size.
+
+    Args:
+        file_path (str): Path to the NAV text file
+        encoding (str): Optional encoding; detected from a sample if omitted
+        typed (bool): Return float64 NAV, datetime Date and categorical
+            string columns instead of all-string columns
+        use_mmap (bool): Force the mmap reader on or off; by default only
+            the typed parser maps files of at least NAV_MMAP_THRESHOLD_BYTES
+
+    Returns:
+        pd.DataFrame: Parsed NAV records
+    """
+    if not typed:
+        batches = list(iter_nav_batches(file_path, encoding=encoding, use_mmap=bool(use_mmap)))
+        if not batches:
+            return pd.DataFrame(columns=COLUMNS)
+        if len(batches) == 1:
+            return batches[0]
+        return pd.concat(batches, ignore_index=True)
+
+    start = time.perf_counter()
+    df = columns_to_frame(parse_nav_columns(file_path, encoding=encoding, use_mmap=use_mmap))
+    telemetry = get_telemetry()
+    telemetry.observe('parse', time.perf_counter() - start, typed=typed)
+    telemetry.incr('parse_rows', len(df), typed=typed)
+    telemetry.incr('parse_bytes', os.path.getsize(file_path))
     return df
@@ -0,0 +1,140 @@
+import logging
+from datetime import datetime
+from db.manifest import filter_pending
+from pipeline.nav_pipeline import run_pipeline
+from pipeline.yearly_loader import run_year_shards
+from analytics.metrics import refresh_metrics
+from telemetry.instruments import get_telemetry
+from config.settings import (
+    INSERT_ENGINE,
+    DOWNLOAD_RANGE_FETCH,
+    ARCHIVE_ENABLED,
+    METRICS_REFRESH,
+    PIPELINE_DOWNLOAD_WORKERS,
+    PIPELINE_PARSE_WORKERS,
+    PIPELINE_LOAD_WORKERS,
+    YEARLY_WORKERS,
+)
+
+# 'pipeline': overlapping download/parse/load stages in one process
+# 'sharded': one worker process per year (partition), for long backfills
+EXECUTORS = ('pipeline', 'sharded')
+
+# Per-day statuses that need no further work
+DONE_STATUSES = ('loaded', 'unchanged', 'skipped', 'empty', 'planned')
+
+
+def run_job(name: str,
+            dates,
+            executor: str = 'pipeline',
+            engine: str = INSERT_ENGINE,
+            range_fetch: bool = DOWNLOAD_RANGE_FETCH,
+            force: bool = False,
+            delta: bool = False,
+            archive: bool = ARCHIVE_ENABLED,
+            dry_run: bool = False,
+            download_workers: int = PIPELINE_DOWNLOAD_WORKERS,
+            parse_workers: int = PIPELINE_PARSE_WORKERS,
+            load_workers: int = PIPELINE_LOAD_WORKERS,
+            shard_workers: int = YEARLY_WORKERS,
+            metrics: bool = METRICS_REFRESH) -> dict:
+    """
+    Download, validate and load a set of dates; the one engine behind every CLI mode.
+
+    Planners decide which dates a mode needs; this function skips dates
+    the manifest marks as done (unless force; in delta mode only holidays
+    are skipped, so loaded days are re-checked), runs the rest on the chosen
+    executor, refreshes nav_metrics for the days loaded and logs one summary.
+
+    Args:
+        name (str): Job name for logs and telemetry (daily, monthly, ...)
+        dates (iterable): Dates (date or datetime) to process
+        executor (str): 'pipeline' or 'sharded'
+        engine (str): Insert engine passed to insert_nav
+        range_fetch (bool): Download multi-day windows instead of one request per day
+        force (bool): Process dates the manifest marks as loaded or holidays
+        delta (bool): Download days again and send only new or changed
+            rows to the database
+        archive (bool): Write validated days to the Parquet archive (and,
+            on the pipeline executor outside delta mode, load archived days
+            from it)
+        dry_run (bool): Only plan: report which dates would be processed
+        download_workers (int): Download threads (pipeline)
+        parse_workers (int): Parse/validate processes (pipeline)
+        load_workers (int): Database load threads (pipeline)
+        shard_workers (int): Worker processes, one year each (sharded)
+        metrics (bool): Refresh nav_metrics for the days loaded
+
+    Returns:
+        dict: {'job', 'dates', 'results', 'statuses', 'failed', 'duration', 'dry_run'}
+            where results maps each date to {'status', 'error', 'counts'}
+    """
+    if executor not in EXECUTORS:
+        raise ValueError(f"Unknown executor '{executor}'. Expected one of {EXECUTORS}")
+    start_time = datetime.now()
+    dates = sorted(set(dates), reverse=True)
+    logging.info(f"Starting {name} job: {len(dates)} dates, executor: {executor}, engine: {engine}"
+                 + (", dry run" if dry_run else ""))
+
+    results = {}
+    pending = dates if force else filter_pending(dates, skip_loaded=not delta)
+    pending_set = set(pending)
+    for date in dates:
+        if date not in pending_set:
+            results[date] = {'status': 'skipped', 'error': None, 'counts': None}
+
+    if dry_run:
+        for date in pending:
+            results[date] = {'status': 'planned', 'error': None, 'counts': None}
+    elif pending and executor == 'sharded':
+        results.update(run_year_shards(pending, workers=shard_workers, engine=engine,
+                                       range_fetch=range_fetch, delta=delta, archive=archive))
+    elif pending:
+        # The manifest was checked above, so the pipeline takes every pending date
+        results.update(run_pipeline(pending, engine=engine, range_fetch=range_fetch,
+                                    download_workers=download_workers, parse_workers=parse_workers,
+                                    load_workers=load_workers, force=True, delta=delta, archive=archive))
+
+    loaded_dates = [date for date, r in results.items() if r['status'] == 'loaded']
+    if metrics and loaded_dates:
+        try:
+            refresh_metrics(loaded_dates)
+        except Exception as e:
+            logging.error(f"Metrics refresh failed: {str(e)}")
+
+    statuses = {}
+    for r in results.values():
+        statuses[r['status']] = statuses.get(r['status'], 0) + 1
+    telemetry = get_telemetry()
+    for status, count in statuses.items():
+        telemetry.incr('job_days', count, job=name, status=status)
+
+    job = {
+        'job': name,
+        'dates': len(dates),
+        'results': results,
+        'statuses': statuses,
+        'failed': sorted(date for date, r in results.items() if r['status'] not in DONE_STATUSES),
+        'duration': (datetime.now() - start_time).total_seconds(),
+        'dry_run': dry_run,
+    }
+    log_summary(job)
+    return job
+
+
+def log_summary(job: dict):
+    """Log the per-status counts and failed dates of a run_job result."""
+    logging.info(f"\n{job['job'].capitalize()} Job Summary{' (dry run)' if job['dry_run'] else ''}:")
+    logging.info(f"Total days: {job['dates']}")
+    for status in sorted(job['statuses']):
+        logging.info(f"  {status}: {job['statuses'][status]}")
+    if job['failed']:
+        logging.info("Failed dates:")
+        for date in job['failed']:
+            logging.info(f"  - {date.strftime('%Y-%m-%d')}: {job['results'][date]['error'] or 'No data'}")
+    if job['dry_run']:
+        planned = sorted(date for date, r in job['results'].items() if r['status'] == 'planned')
+        if planned:
+            logging.info(f"Would process {len(planned)} days from {planned[0].strftime('%Y-%m-%d')} "
+                         f"to {planned[-1].strftime('%Y-%m-%d')}")
+    logging.info(f"Total duration: {job['duration']:.1f}s")
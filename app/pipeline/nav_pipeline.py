@@ -0,0 +1,309 @@
+import logging
+import multiprocessing
+import os
+import queue
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from downloader.download_nav import (
+    download_nav_files,
+    download_nav_files_by_range,
+    nav_file_path,
+    NoNavDataError,
+)
+from parser.parse_nav import iter_nav_batches, iter_nav_column_batches
+from db.insert_nav import insert_nav, validate_batches
+from db.models import get_connection
+from db.manifest import filter_pending, record_load, record_empty
+from db.delta import file_unchanged_since_load, mark_file_loaded
+from db.partitions import maintain_partitions
+from telemetry.instruments import get_telemetry
+from archive.nav_archive import has_day, read_day, retire_raw_file, write_day
+from config.settings import (
+    INSERT_ENGINE,
+    PIPELINE_DOWNLOAD_WORKERS,
+    PIPELINE_PARSE_WORKERS,
+    PIPELINE_LOAD_WORKERS,
+    PIPELINE_QUEUE_SIZE,
+    ARCHIVE_ENABLED,
+    PARSE_TYPED,
+)
+
+# Marks the end of a stage's input
+_DONE = object()
+
+
+def parse_and_validate(file_path: str, typed: bool = PARSE_TYPED):
+    """
+    Parse and validate a NAV file.
+
+    Both parsers are consumed batch by batch (rows of strings, or
+    PARSE_BATCH_BYTES blocks of typed columns), so only one raw batch is in
+    memory next to the validated rows, whatever the file size.
+
+    Returns:
+        DataFrame of valid rows, None if the file has no records, or
+        False if validation failed
+    """
+    if typed:
+        return validate_batches(iter_nav_column_batches(file_path))
+    return validate_batches(iter_nav_batches(file_path))
+
+
+def validation_error(df) -> str:
+    """
+    Why a parse_and_validate result cannot be loaded although the file has
+    records, or None. Such days are failures, not empty (holiday) days.
+    """
+    if df is False:
+        return "Validation failed"
+    if df is not None and df.empty:
+        return "Every row was rejected by validation"
+    return None
+
+
+def _parse_and_validate(file_path: str, date=None, archive: bool = False):
+    """
+    Runs in a worker process: parse a NAV file and validate it, or read an
+    already validated day from the archive when file_path is None.
+
+    Returns (df, telemetry) so the parent can merge the worker's timings.
+    """
+    if file_path is None:
+        df = read_day(date)
+    else:
+        df = parse_and_validate(file_path)
+        if archive and df is not None and df is not False and not df.empty:
+            write_day(date, df)
+    return df, get_telemetry().drain()
+
+
+def _process_context():
+    """
+    Start method for the parse pool. Its workers start while download and
+    load threads are running, and a forked child would inherit any module
+    lock (telemetry, manifest, HTTP session) one of them held at that
+    moment, deadlocking on first use; forkserver and spawn children start
+    from a clean interpreter.
+    """
+    methods = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context('forkserver' if 'forkserver' in methods else 'spawn')
+
+
+def _close_quietly(conn):
+    """Close conn, logging instead of raising; returns None for reassignment."""
+    if conn is not None:
+        try:
+            conn.close()
+        except Exception as e:
+            logging.warning(f"Error closing connection: {str(e)}")
+    return None
+
+
+def _run_stage(target, count: int, name: str) -> list:
+    threads = [threading.Thread(target=target, name=f"{name}-{i}", daemon=True) for i in range(count)]
+    for thread in threads:
+        thread.start()
+    return threads
+
+
+def run_pipeline(dates,
+                 engine: str = INSERT_ENGINE,
+                 range_fetch: bool = False,
+                 download_workers: int = PIPELINE_DOWNLOAD_WORKERS,
+                 parse_workers: int = PIPELINE_PARSE_WORKERS,
+                 load_workers: int = PIPELINE_LOAD_WORKERS,
+                 queue_size: int = PIPELINE_QUEUE_SIZE,
+                 force: bool = False,
+                 delta: bool = False,
+                 archive: bool = ARCHIVE_ENABLED) -> dict:
+    """
+    Download, parse/validate and load NAV data for many dates with overlapping stages.
+
+    Each stage has its own workers: the downloader's request threads
+    (download_nav_files or download_nav_files_by_range, reporting each day
+    as it finishes), parse/validate in a process pool, and load threads
+    that each hold one pooled connection.
+    Bounded queues between the stages apply backpressure, so at most
+    queue_size files or frames wait between any two stages.
+
+    Args:
+        dates (iterable): Dates (datetime or date) to process
+        engine (str): Insert engine passed to insert_nav
+        range_fetch (bool): Download adaptive multi-day windows, retrying
+            failed windows and missing days one day at a time
+        download_workers (int): Concurrent download requests
+        parse_workers (int): Parse/validate processes
+        load_workers (int): Database load threads
+        queue_size (int): Capacity of each inter-stage queue
+        force (bool): Reprocess dates the manifest marks as loaded or holidays
+        delta (bool): Download every day again, including days the
+            manifest marks as loaded (holidays are still skipped), skip
+            files identical to the last loaded version and send only new
+            or changed rows to the database
+        archive (bool): Write each validated day to the Parquet archive, and
+            (outside delta mode) load days already archived from there
+            without downloading or parsing them again; once a day is
+            loaded its downloaded file is handled per ARCHIVE_RAW_FILES
+
+    Returns:
+        dict: Maps each date to {'status': 'loaded' | 'unchanged' | 'empty' | 'failed' | 'skipped',
+            'error': str or None, 'counts': insert_nav result or None}
+    """
+    dates = list(dates)
+    results = {}
+    results_lock = threading.Lock()
+
+    if not force:
+        pending_dates = filter_pending(dates, skip_loaded=not delta)
+        for date in set(dates) - set(pending_dates):
+            results[date] = {'status': 'skipped', 'error': None, 'counts': None}
+        logging.info(f"Manifest: {len(results)} dates already complete, {len(pending_dates)} to process")
+        dates = pending_dates
+
+    if dates:
+        maintain_partitions(through=max(dates))
+
+    def _record(date, status, error=None, counts=None):
+        with results_lock:
+            results[date] = {'status': status, 'error': error, 'counts': counts}
+        if status == 'failed':
+            logging.error(f"Pipeline failed for {date.strftime('%Y-%m-%d')}: {error}")
+
+    parse_queue = queue.Queue(maxsize=queue_size)
+    load_queue = queue.Queue(maxsize=queue_size)
+
+    # Archived days and existing files skip the download stage entirely,
+    # except in delta mode, which has to compare a fresh copy from AMFI
+    existing = []
+    to_download = []
+    for date in dates:
+        file_path = nav_file_path(date)
+        if delta:
+            to_download.append(date)
+        elif archive and has_day(date):
+            existing.append((date, None))
+        elif os.path.exists(file_path):
+            existing.append((date, file_path))
+        else:
+            to_download.append(date)
+
+    # Every stage catches per-item errors so its thread keeps draining its
+    # queue; a dead consumer would leave its producers blocked on a full queue
+    def download_stage():
+        reported = set()
+
+        def downloaded(date, file_path, error):
+            # Runs on this thread as each day finishes; raising here would
+            # abort the downloader's remaining days
+            reported.add(date)
+            try:
+                if file_path:
+                    parse_queue.put((date, file_path))
+                elif isinstance(error, NoNavDataError):
+                    _record(date, 'empty')
+                else:
+                    _record(date, 'failed', f"Download failed: {str(error)}")
+            except Exception as e:
+                _record(date, 'failed', f"Download failed: {str(e)}")
+
+        download = download_nav_files_by_range if range_fetch else download_nav_files
+        try:
+            download(to_download, workers=max(1, download_workers), skip_existing=False, on_result=downloaded)
+        except Exception as e:
+            for date in to_download:
+                if date not in reported:
+                    _record(date, 'failed', f"Download failed: {str(e)}")
+
+    def feed_existing():
+        for item in existing:
+            parse_queue.put(item)
+
+    with ProcessPoolExecutor(max_workers=max(1, parse_workers), mp_context=_process_context()) as executor:
+
+        def parse_item(date, file_path):
+            if delta and file_path and file_unchanged_since_load(date, file_path):
+                _record(date, 'unchanged')
+                return
+            df, telemetry = executor.submit(_parse_and_validate, file_path, date, archive).result()
+            get_telemetry().merge(telemetry)
+            if df is None:
+                # Only a file without records may turn into a holiday
+                record_empty(date)
+                _record(date, 'empty')
+                return
+            error = validation_error(df)
+            if error:
+                record_load(date, 'failed', error=error)
+                _record(date, 'failed', error)
+                return
+            load_queue.put((date, df, file_path))
+
+        def parse_worker():
+            while True:
+                item = parse_queue.get()
+                if item is _DONE:
+                    return
+                date, file_path = item
+                try:
+                    parse_item(date, file_path)
+                except Exception as e:
+                    _record(date, 'failed', f"Parse failed: {str(e)}")
+
+        def load_item(date, df, file_path, conn):
+            counts = insert_nav(df, engine=engine, conn=conn, validated=True, delta=delta)
+            record_load(date, 'loaded', row_count=len(df))
+            if file_path:
+                mark_file_loaded(date, file_path)
+                if archive:
+                    # The archive now holds the day; the delta hash above was the last use
+                    retire_raw_file(file_path)
+            _record(date, 'loaded', counts=counts)
+
+        def load_worker():
+            conn = None
+            while True:
+                item = load_queue.get()
+                if item is _DONE:
+                    break
+                date, df, file_path = item
+                try:
+                    if conn is None:
+                        conn = get_connection(local_infile=engine == 'load_data')
+                    load_item(date, df, file_path, conn)
+                except Exception as e:
+                    _record(date, 'failed', f"Load failed: {str(e)}")
+                    try:
+                        record_load(date, 'failed', error=str(e))
+                    except Exception as manifest_error:
+                        logging.error(f"Could not record failed load of {date.strftime('%Y-%m-%d')}: "
+                                      f"{str(manifest_error)}")
+                    # Start the next item on a fresh connection
+                    conn = _close_quietly(conn)
+            _close_quietly(conn)
+
+        loaders = _run_stage(load_worker, max(1, load_workers), 'load')
+        parsers = _run_stage(parse_worker, max(1, parse_workers), 'parse')
+        downloaders = _run_stage(download_stage, 1, 'download')
+        downloaders += _run_stage(feed_existing, 1, 'existing')
+
+        # Shut stages down in order once their producers are finished
+        for thread in downloaders:
+            thread.join()
+        for _ in parsers:
+            parse_queue.put(_DONE)
+        for thread in parsers:
+            thread.join()
+        for _ in loaders:
+            load_queue.put(_DONE)
+        for thread in loaders:
+            thread.join()
+
+    loaded = sum(1 for r in results.values() if r['status'] == 'loaded')
+    failed = sum(1 for r in results.values() if r['status'] == 'failed')
+    skipped = sum(1 for r in results.values() if r['status'] in ('skipped', 'unchanged'))
+    logging.info(f"Pipeline finished. Dates: {len(results)}, Loaded: {loaded}, Failed: {failed}, "
+                 f"Skipped: {skipped}, Empty: {len(results) - loaded - failed - skipped}")
+    if delta:
+        changed = [change for r in results.values() if r['counts'] for change in r['counts'].get('changed', [])]
+        logging.info(f"Delta: {len(changed)} new or changed rows sent to the database")
+    return results
@@ -0,0 +1,163 @@
+import logging
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime, timedelta
+from downloader.download_nav import download_nav_files, download_nav_files_by_range
+from db.insert_nav import insert_nav, nav_table
+from db.models import connection_scope
+from db.manifest import record_load, record_empty
+from db.delta import mark_file_loaded
+from db.partitions import maintain_partitions
+from planner.trading_calendar import get_trading_calendar
+from telemetry.instruments import get_telemetry
+from archive.nav_archive import retire_raw_file, write_day
+from pipeline.nav_pipeline import parse_and_validate, validation_error
+from config.settings import INSERT_ENGINE, DOWNLOAD_RANGE_FETCH, YEARLY_WORKERS, ARCHIVE_ENABLED
+
+LOADED_DATES_SQL = """
+    SELECT DISTINCT nav_date
+    FROM {}
+    WHERE nav_date BETWEEN %s AND %s
+"""
+
+
+def get_loaded_dates(start_date, end_date, conn=None) -> set:
+    """NAV dates between start_date and end_date that already have rows."""
+    with connection_scope(conn) as conn:
+        cursor = conn.cursor()
+        cursor.execute(LOADED_DATES_SQL.format(nav_table()), (start_date, end_date))
+        loaded = {row[0] for row in cursor.fetchall()}
+        cursor.close()
+    return loaded
+
+
+def plan_year_shards(dates) -> dict:
+    """
+    Group dates by calendar year, matching the YEAR(nav_date) partitions of
+    nav_data, so each worker writes to a single partition.
+    """
+    shards = {}
+    for date in dates:
+        shards.setdefault(date.year, []).append(date)
+    return shards
+
+
+def load_year_shard(year: int, dates: list, engine: str = INSERT_ENGINE,
+                    range_fetch: bool = DOWNLOAD_RANGE_FETCH, delta: bool = False,
+                    archive: bool = ARCHIVE_ENABLED) -> dict:
+    """
+    Download, parse and load every day of one year in this process.
+
+    Runs in a worker process with its own HTTP session and connection.
+
+    Returns:
+        dict: Maps each date -> {'status': ..., 'error': ..., 'counts': ...}
+    """
+    logging.info(f"Loading {len(dates)} days for partition p{year}")
+    download = download_nav_files_by_range if range_fetch else download_nav_files
+    # Delta mode compares against a fresh copy, so local files are not reused
+    downloaded, download_failures = download(dates, skip_existing=not delta)
+
+    results = {}
+    with connection_scope(local_infile=engine == 'load_data') as conn:
+        for date in sorted(dates):
+            key = date
+            if date not in downloaded:
+                results[key] = {'status': 'failed', 'error': download_failures.get(date), 'counts': None}
+                continue
+            try:
+                df = parse_and_validate(downloaded[date])
+                if df is None:
+                    # Only a file without records may turn into a holiday
+                    record_empty(date)
+                    results[key] = {'status': 'empty', 'error': None, 'counts': None}
+                    continue
+                error = validation_error(df)
+                if error:
+                    record_load(date, 'failed', error=error)
+                    results[key] = {'status': 'failed', 'error': error, 'counts': None}
+                    continue
+                if archive:
+                    write_day(date, df)
+                counts = insert_nav(df, engine=engine, conn=conn, validated=True, delta=delta)
+                record_load(date, 'loaded', row_count=len(df))
+                mark_file_loaded(date, downloaded[date])
+                if archive:
+                    retire_raw_file(downloaded[date])
+                results[key] = {'status': 'loaded', 'error': None, 'counts': counts}
+            except Exception as e:
+                logging.error(f"Error processing {key.strftime('%Y-%m-%d')}: {str(e)}")
+                record_load(date, 'failed', error=str(e))
+                results[key] = {'status': 'failed', 'error': str(e), 'counts': None}
+    return results
+
+
+def _run_year_shard(year: int, dates: list, engine: str, range_fetch: bool, delta: bool, archive: bool) -> tuple:
+    """Worker entry point: load_year_shard results plus the worker's telemetry."""
+    return load_year_shard(year, dates, engine, range_fetch, delta, archive), get_telemetry().drain()
+
+
+def plan_yearly_dates(years: int = 15) -> list:
+    """
+    Trading days of the past years that have no rows in the database yet,
+    newest first. Days the manifest marks as loaded or holidays are left to
+    the job runner's manifest check.
+    """
+    end_date = datetime.now().date() - timedelta(days=1)
+    start_date = end_date - timedelta(days=years * 365)
+
+    loaded = get_loaded_dates(start_date, end_date)
+    calendar = get_trading_calendar(reload=True)
+    dates = [date for date in calendar.trading_day_list(start_date, end_date) if date not in loaded]
+    logging.info(f"Yearly plan: {len(loaded)} days already loaded, {len(dates)} days without rows")
+    return sorted(dates, reverse=True)
+
+
+def run_year_shards(dates, workers: int = YEARLY_WORKERS, engine: str = INSERT_ENGINE,
+                    range_fetch: bool = DOWNLOAD_RANGE_FETCH, delta: bool = False,
+                    archive: bool = ARCHIVE_ENABLED) -> dict:
+    """
+    Load dates with one worker process per year, newest year first.
+
+    Each worker handles whole years, so concurrent writers hit different
+    partitions.
+
+    Args:
+        dates (iterable): Dates to load
+        workers (int): Number of worker processes
+        engine (str): Insert engine passed to insert_nav
+        range_fetch (bool): Download multi-day windows instead of one request per day
+        delta (bool): Send only new or changed rows to the database
+        archive (bool): Write each validated day to the Parquet archive, then
+            handle its downloaded file per ARCHIVE_RAW_FILES once loaded
+
+    Returns:
+        dict: Maps each date -> per-day result from load_year_shard
+    """
+    dates = list(dates)
+    if not dates:
+        return {}
+
+    maintain_partitions(through=max(dates))
+    shards = plan_year_shards(dates)
+    results = {}
+    with ProcessPoolExecutor(max_workers=max(1, min(workers, len(shards)))) as executor:
+        futures = {
+            executor.submit(_run_year_shard, year, shards[year], engine, range_fetch, delta, archive): year
+            for year in sorted(shards, reverse=True)
+        }
+        for future in as_completed(futures):
+            year = futures[future]
+            try:
+                shard_results, telemetry = future.result()
+                get_telemetry().merge(telemetry)
+            except Exception as e:
+                logging.error(f"Partition p{year} failed: {str(e)}")
+                shard_results = {
+                    date: {'status': 'failed', 'error': str(e), 'counts': None}
+                    for date in shards[year]
+                }
+            results.update(shard_results)
+            loaded_days = sum(1 for r in shard_results.values() if r['status'] == 'loaded')
+            logging.info(f"Partition p{year} done: {loaded_days}/{len(shards[year])} days loaded")
+
+    return results
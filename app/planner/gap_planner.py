@@ -0,0 +1,91 @@
+import logging
+from datetime import datetime
+import numpy as np
+import pandas as pd
+from db.models import connection_scope
+from db.insert_nav import nav_table
+from planner.trading_calendar import get_trading_calendar
+from config.settings import STORAGE_MODE, GAP_BASELINE_DAYS, GAP_PARTIAL_RATIO
+
+# One pass over the nav_date index: rows per loaded day
+DAY_COUNTS_SQL = """
+    SELECT nav_date, COUNT(*)
+    FROM {}
+    WHERE nav_date BETWEEN %s AND %s
+    GROUP BY nav_date
+"""
+
+FIRST_DATE_SQL = "SELECT MIN(nav_date) FROM {}"
+
+
+def get_day_counts(start_date, end_date, conn=None, storage: str = STORAGE_MODE) -> dict:
+    """Rows stored per nav_date between start_date and end_date."""
+    with connection_scope(conn) as conn:
+        cursor = conn.cursor()
+        try:
+            cursor.execute(DAY_COUNTS_SQL.format(nav_table(storage)), (start_date, end_date))
+            return {nav_date: count for nav_date, count in cursor.fetchall()}
+        finally:
+            cursor.close()
+
+
+def _baselines(days: list, counts: dict) -> pd.Series:
+    """
+    Expected rows per day: the median count of the GAP_BASELINE_DAYS loaded
+    days around it. The number of schemes drifts slowly over the years, so
+    a local baseline works across the whole history.
+    """
+    observed = pd.Series([counts.get(day, np.nan) for day in days], index=days, dtype='float64')
+    return observed.rolling(GAP_BASELINE_DAYS, center=True, min_periods=1).median()
+
+
+def plan_gaps(start_date=None, end_date=None, conn=None, storage: str = STORAGE_MODE) -> dict:
+    """
+    Find trading days that are missing from the database or only partly loaded.
+
+    Expected days come from the trading calendar, actual days and row
+    counts from a single GROUP BY nav_date query. A day is partial when it
+    has fewer than GAP_PARTIAL_RATIO of its baseline rows.
+
+    Args:
+        start_date: First day to check; the earliest stored day by default
+        end_date: Last day to check; the latest trading day by default
+        conn: Optional open connection to reuse
+        storage (str): Storage mode whose NAV table is checked
+
+    Returns:
+        dict: 'missing' and 'partial' lists of dates (oldest first),
+            'expected' (trading days checked) and 'counts' (rows per day)
+    """
+    calendar = get_trading_calendar(reload=True)
+    with connection_scope(conn) as conn:
+        if start_date is None:
+            cursor = conn.cursor()
+            try:
+                cursor.execute(FIRST_DATE_SQL.format(nav_table(storage)))
+                (start_date,) = cursor.fetchone()
+            finally:
+                cursor.close()
+        if end_date is None:
+            end_date = calendar.previous_trading_day(datetime.now().date())
+        if start_date is None:
+            logging.warning("No NAV data in database; nothing to compare against")
+            return {'missing': [], 'partial': [], 'expected': 0, 'counts': {}}
+
+        expected = calendar.trading_day_list(start_date, end_date)
+        counts = get_day_counts(start_date, end_date, conn=conn, storage=storage)
+
+    missing = [day for day in expected if day not in counts]
+    partial = []
+    if counts:
+        baselines = _baselines(expected, counts)
+        partial = [
+            day for day in expected
+            if day in counts and counts[day] < baselines[day] * GAP_PARTIAL_RATIO
+        ]
+
+    logging.info(
+        f"Gap plan {start_date} to {end_date}: {len(expected)} trading days, "
+        f"{len(missing)} missing, {len(partial)} partial"
+    )
+    return {'missing': missing, 'partial': partial, 'expected': len(expected), 'counts': counts}
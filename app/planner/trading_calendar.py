@@ -0,0 +1,92 @@
+import logging
+import os
+import threading
+from datetime import datetime
+import numpy as np
+from db.manifest import holiday_dates
+from config.settings import TRADING_HOLIDAYS_FILE
+
+# Monday to Friday
+WEEKMASK = '1111100'
+
+
+def _to_day(date) -> np.datetime64:
+    if isinstance(date, datetime):
+        date = date.date()
+    return np.datetime64(date, 'D')
+
+
+def _read_holiday_file(path: str) -> list:
+    """'YYYY-MM-DD' dates, one per line; blank lines and # comments are ignored."""
+    if not path or not os.path.exists(path):
+        return []
+    with open(path) as f:
+        return [line.split('#', 1)[0].strip() for line in f if line.split('#', 1)[0].strip()]
+
+
+class TradingCalendar:
+    """
+    Weekdays minus known market holidays, backed by np.busdaycalendar.
+
+    Holidays come from the manifest, where days whose download came back
+    empty are recorded as holidays, plus an optional TRADING_HOLIDAYS_FILE
+    for holidays known in advance. Range queries are a single vectorized
+    np.is_busday call, so planning 15 years of days costs microseconds.
+    """
+
+    def __init__(self, holidays=()):
+        self.holidays = np.unique(np.asarray(list(holidays), dtype='datetime64[D]'))
+        self._busdaycal = np.busdaycalendar(weekmask=WEEKMASK, holidays=self.holidays)
+
+    @classmethod
+    def load(cls) -> 'TradingCalendar':
+        holidays = holiday_dates() + _read_holiday_file(TRADING_HOLIDAYS_FILE)
+        calendar = cls(holidays)
+        logging.info(f"Trading calendar: {len(calendar.holidays)} known holidays")
+        return calendar
+
+    def is_trading_day(self, dates) -> np.ndarray:
+        """Vectorized: True where a date can have NAV data."""
+        return np.is_busday(np.asarray(dates, dtype='datetime64[D]'), busdaycal=self._busdaycal)
+
+    def trading_days(self, start_date, end_date) -> np.ndarray:
+        """Trading days from start_date to end_date inclusive, oldest first, as datetime64[D]."""
+        start, end = _to_day(start_date), _to_day(end_date)
+        if end < start:
+            return np.empty(0, dtype='datetime64[D]')
+        days = np.arange(start, end + 1, dtype='datetime64[D]')
+        return days[self.is_trading_day(days)]
+
+    def trading_day_list(self, start_date, end_date, newest_first: bool = False) -> list:
+        """
+        trading_days as Python objects of the same type as start_date
+        (datetime or date), which is what the download and load code expects.
+        """
+        days = self.trading_days(start_date, end_date)
+        if newest_first:
+            days = days[::-1]
+        dates = days.astype(object).tolist()
+        if isinstance(start_date, datetime):
+            return [datetime(d.year, d.month, d.day) for d in dates]
+        return dates
+
+    def previous_trading_day(self, date):
+        """Latest trading day strictly before date, of the same type as date."""
+        day = np.busday_offset(_to_day(date) - 1, 0, roll='backward', busdaycal=self._busdaycal)
+        result = day.astype(object)
+        if isinstance(date, datetime):
+            return datetime(result.year, result.month, result.day)
+        return result
+
+
+_calendar = None
+_calendar_lock = threading.Lock()
+
+
+def get_trading_calendar(reload: bool = False) -> TradingCalendar:
+    """This process's TradingCalendar; reload=True picks up holidays recorded since it was built."""
+    global _calendar
+    with _calendar_lock:
+        if _calendar is None or reload:
+            _calendar = TradingCalendar.load()
+    return _calendar
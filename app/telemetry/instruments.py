@@ -0,0 +1,195 @@
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from config.settings import TELEMETRY_SINKS, PROFILER, PROFILE_DIR
+
+# Throughput derived from a counter and the timer measuring the same work
+RATES = {
+    'parse_rows_per_second': ('parse_rows', 'parse'),
+    'validate_rows_per_second': ('validate_rows', 'validate'),
+    'insert_rows_per_second': ('insert_rows', 'insert'),
+    'download_bytes_per_second': ('download_bytes', 'download'),
+}
+
+
+def _labels(labels: dict) -> tuple:
+    return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+
+class Telemetry:
+    """
+    Thread-safe counters, gauges and timers for the hot path.
+
+    Timers keep count, total and max seconds per (name, labels); nothing
+    is stored per observation, so instrumenting a per-chunk call costs a
+    dict lookup under a lock. Worker processes drain() their telemetry
+    and the parent merge()s it, so one flush covers the whole job.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.counters = {}
+            self.gauges = {}
+            self.timers = {}  # key -> [count, total_seconds, max_seconds]
+
+    def incr(self, name: str, value: float = 1, **labels):
+        key = (name, _labels(labels))
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def gauge(self, name: str, value: float, **labels):
+        with self._lock:
+            self.gauges[(name, _labels(labels))] = value
+
+    def observe(self, name: str, seconds: float, **labels):
+        key = (name, _labels(labels))
+        with self._lock:
+            timer = self.timers.get(key)
+            if timer is None:
+                self.timers[key] = [1, seconds, seconds]
+            else:
+                timer[0] += 1
+                timer[1] += seconds
+                timer[2] = max(timer[2], seconds)
+
+    @contextmanager
+    def timer(self, name: str, **labels):
+        """Time the block, whether or not it raises."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    def snapshot(self) -> dict:
+        """Plain, picklable copy of everything recorded so far."""
+        with self._lock:
+            return {
+                'counters': [(name, dict(labels), value) for (name, labels), value in self.counters.items()],
+                'gauges': [(name, dict(labels), value) for (name, labels), value in self.gauges.items()],
+                'timers': [(name, dict(labels), list(timer)) for (name, labels), timer in self.timers.items()],
+            }
+
+    def drain(self) -> dict:
+        """snapshot() and reset(), for handing a worker's telemetry to its parent."""
+        snapshot = self.snapshot()
+        self.reset()
+        return snapshot
+
+    def merge(self, snapshot: dict):
+        if not snapshot:
+            return
+        for name, labels, value in snapshot['counters']:
+            self.incr(name, value, **labels)
+        for name, labels, value in snapshot['gauges']:
+            self.gauge(name, value, **labels)
+        with self._lock:
+            for name, labels, (count, total, longest) in snapshot['timers']:
+                key = (name, _labels(labels))
+                timer = self.timers.setdefault(key, [0, 0.0, 0.0])
+                timer[0] += count
+                timer[1] += total
+                timer[2] = max(timer[2], longest)
+
+    def rates(self) -> dict:
+        """RATES computed over all labels, for names that have both parts recorded."""
+        with self._lock:
+            totals = {}
+            for (name, _), value in self.counters.items():
+                totals[name] = totals.get(name, 0) + value
+            seconds = {}
+            for (name, _), (_, total, _) in self.timers.items():
+                seconds[name] = seconds.get(name, 0.0) + total
+        return {
+            rate: totals[counter] / seconds[timer]
+            for rate, (counter, timer) in RATES.items()
+            if counter in totals and seconds.get(timer)
+        }
+
+
+_telemetry = None
+_telemetry_pid = None
+_telemetry_lock = threading.Lock()
+
+
+def get_telemetry() -> Telemetry:
+    """This process's Telemetry; a forked child starts from zero."""
+    global _telemetry, _telemetry_pid
+    with _telemetry_lock:
+        if _telemetry is None or _telemetry_pid != os.getpid():
+            _telemetry = Telemetry()
+            _telemetry_pid = os.getpid()
+    return _telemetry
+
+
+def flush(job: str, sinks=None) -> dict:
+    """
+    Send this process's telemetry to the configured sinks.
+
+    Args:
+        job (str): Job name attached to every exported metric
+        sinks (list): Sink objects; built from TELEMETRY_SINKS by default
+
+    Returns:
+        dict: The snapshot that was exported, with derived 'rates'
+    """
+    from telemetry.sinks import build_sinks
+
+    telemetry = get_telemetry()
+    snapshot = telemetry.snapshot()
+    snapshot['rates'] = telemetry.rates()
+    for rate, value in snapshot['rates'].items():
+        logging.info(f"Telemetry {rate}: {value:,.0f}")
+    for sink in build_sinks(TELEMETRY_SINKS) if sinks is None else sinks:
+        try:
+            sink.emit(job, snapshot)
+        except Exception as e:
+            logging.error(f"Telemetry sink {type(sink).__name__} failed: {str(e)}")
+    return snapshot
+
+
+@contextmanager
+def profile_run(job: str, profiler: str = PROFILER):
+    """
+    Profile the block with cProfile or pyinstrument ('' disables).
+
+    cProfile stats go to PROFILE_DIR/<job>_<timestamp>.prof (open with
+    pstats or snakeviz), pyinstrument output to a matching .html file.
+    """
+    if not profiler:
+        yield
+        return
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    path = os.path.join(PROFILE_DIR, f"{job}_{datetime.now().strftime('%Y%m%d_%H%M%S')}")
+    if profiler == 'cprofile':
+        import cProfile
+
+        profile = cProfile.Profile()
+        profile.enable()
+        try:
+            yield
+        finally:
+            profile.disable()
+            profile.dump_stats(f"{path}.prof")
+            logging.info(f"Profile written to {path}.prof")
+    elif profiler == 'pyinstrument':
+        from pyinstrument import Profiler
+
+        profile = Profiler()
+        profile.start()
+        try:
+            yield
+        finally:
+            profile.stop()
+            with open(f"{path}.html", 'w') as f:
+                f.write(profile.output_html())
+            logging.info(f"Profile written to {path}.html")
+    else:
+        raise ValueError(f"Unknown profiler '{profiler}'. Expected 'cprofile' or 'pyinstrument'")
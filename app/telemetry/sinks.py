@@ -0,0 +1,165 @@
+import json
+import os
+import re
+import socket
+from datetime import datetime
+from config.settings import (
+    TELEMETRY_PREFIX,
+    TELEMETRY_PROMETHEUS_PATH,
+    TELEMETRY_JSONL_PATH,
+    STATSD_HOST,
+    STATSD_PORT,
+)
+
+# Largest StatsD datagram sent; stays under common MTUs
+STATSD_MAX_PACKET = 1400
+
+
+def _metric_name(*parts) -> str:
+    return re.sub(r'[^a-zA-Z0-9_]', '_', '_'.join(part for part in parts if part))
+
+
+class PrometheusTextfileSink:
+    """
+    Writes a .prom file for node_exporter's textfile collector.
+
+    Counters become <prefix>_<name>_total, timers a summary with _count,
+    _sum and a separate _max gauge. The file is replaced atomically and
+    holds only the latest flush.
+    """
+
+    def __init__(self, path: str = TELEMETRY_PROMETHEUS_PATH, prefix: str = TELEMETRY_PREFIX):
+        self.path = path
+        self.prefix = prefix
+
+    @staticmethod
+    def _labels(job: str, labels: dict) -> str:
+        labels = dict(labels, job=job)
+        pairs = ','.join(f'{key}="{str(value).replace(chr(34), chr(39))}"' for key, value in sorted(labels.items()))
+        return '{' + pairs + '}'
+
+    def render(self, job: str, snapshot: dict) -> str:
+        lines = []
+        typed = set()
+
+        def add(name, kind, labels, value):
+            if name not in typed:
+                lines.append(f"# TYPE {name} {kind}")
+                typed.add(name)
+            lines.append(f"{name}{self._labels(job, labels)} {value}")
+
+        for name, labels, value in snapshot['counters']:
+            add(_metric_name(self.prefix, name, 'total'), 'counter', labels, value)
+        for name, labels, value in snapshot['gauges']:
+            add(_metric_name(self.prefix, name), 'gauge', labels, value)
+        for name, labels, (count, total, longest) in snapshot['timers']:
+            base = _metric_name(self.prefix, name, 'seconds')
+            add(f"{base}_count", 'counter', labels, count)
+            add(f"{base}_sum", 'counter', labels, f"{total:.6f}")
+            add(f"{base}_max", 'gauge', labels, f"{longest:.6f}")
+        for name, value in snapshot.get('rates', {}).items():
+            add(_metric_name(self.prefix, name), 'gauge', {}, f"{value:.3f}")
+        add(_metric_name(self.prefix, 'last_flush_timestamp_seconds'), 'gauge', {},
+            f"{datetime.now().timestamp():.0f}")
+        return '\n'.join(lines) + '\n'
+
+    def emit(self, job: str, snapshot: dict):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w') as f:
+            f.write(self.render(job, snapshot))
+        os.replace(tmp_path, self.path)
+
+
+class JsonLinesSink:
+    """Appends one JSON object per flush: timestamp, job, metrics and rates."""
+
+    def __init__(self, path: str = TELEMETRY_JSONL_PATH):
+        self.path = path
+
+    def emit(self, job: str, snapshot: dict):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        record = {
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'job': job,
+            'counters': [{'name': n, 'labels': l, 'value': v} for n, l, v in snapshot['counters']],
+            'gauges': [{'name': n, 'labels': l, 'value': v} for n, l, v in snapshot['gauges']],
+            'timers': [
+                {'name': n, 'labels': l, 'count': c, 'total_seconds': t, 'max_seconds': m}
+                for n, l, (c, t, m) in snapshot['timers']
+            ],
+            'rates': snapshot.get('rates', {}),
+        }
+        with open(self.path, 'a') as f:
+            f.write(json.dumps(record) + '\n')
+
+
+class StatsdSink:
+    """
+    Sends the flush to a StatsD-compatible daemon over UDP.
+
+    Label values are appended to the metric name (insert_rows.executemany).
+    Timers are sent pre-aggregated: .count and .total_ms as counters and
+    .max_ms as a gauge.
+    """
+
+    def __init__(self, host: str = STATSD_HOST, port: int = STATSD_PORT, prefix: str = TELEMETRY_PREFIX):
+        self.address = (host, port)
+        self.prefix = prefix
+
+    def _name(self, job: str, name: str, labels: dict) -> str:
+        parts = [self.prefix, job, name] + [str(labels[key]) for key in sorted(labels)]
+        return '.'.join(re.sub(r'[^a-zA-Z0-9_\-]', '_', part) for part in parts if part)
+
+    def lines(self, job: str, snapshot: dict) -> list:
+        lines = []
+        for name, labels, value in snapshot['counters']:
+            lines.append(f"{self._name(job, name, labels)}:{value}|c")
+        for name, labels, value in snapshot['gauges']:
+            lines.append(f"{self._name(job, name, labels)}:{value}|g")
+        for name, labels, (count, total, longest) in snapshot['timers']:
+            base = self._name(job, name, labels)
+            lines.append(f"{base}.count:{count}|c")
+            lines.append(f"{base}.total_ms:{total * 1000:.3f}|c")
+            lines.append(f"{base}.max_ms:{longest * 1000:.3f}|g")
+        for name, value in snapshot.get('rates', {}).items():
+            lines.append(f"{self._name(job, name, {})}:{value:.3f}|g")
+        return lines
+
+    def emit(self, job: str, snapshot: dict):
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        try:
+            packet = b''
+            for line in self.lines(job, snapshot):
+                data = line.encode('ascii', errors='replace')
+                if packet and len(packet) + 1 + len(data) > STATSD_MAX_PACKET:
+                    sock.sendto(packet, self.address)
+                    packet = b''
+                packet = data if not packet else packet + b'\n' + data
+            if packet:
+                sock.sendto(packet, self.address)
+        finally:
+            sock.close()
+
+
+SINKS = {
+    'prometheus': PrometheusTextfileSink,
+    'jsonl': JsonLinesSink,
+    'statsd': StatsdSink,
+}
+
+
+def build_sinks(spec: str) -> list:
+    """Sinks for a comma-separated spec such as 'prometheus,jsonl'."""
+    sinks = []
+    for name in (part.strip().lower() for part in (spec or '').split(',')):
+        if not name:
+            continue
+        if name not in SINKS:
+            raise ValueError(f"Unknown telemetry sink '{name}'. Expected one of {tuple(SINKS)}")
+        sinks.append(SINKS[name]())
+    return sinks
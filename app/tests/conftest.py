@@ -0,0 +1,22 @@
+import os
+import sys
+
+import pytest
+
+# Modules import each other from the app directory (PYTHONPATH=/app in the container)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Some modules attach a logs/ file handler on import, relative to the working directory
+os.makedirs('logs', exist_ok=True)
+
+
+@pytest.fixture
+def manifest_db(tmp_path, monkeypatch):
+    """The manifest module pointed at an empty SQLite file for one test."""
+    from db import manifest
+    monkeypatch.setattr(manifest, 'MANIFEST_PATH', str(tmp_path / 'manifest.sqlite3'))
+    monkeypatch.setattr(manifest, '_conn', None)
+    monkeypatch.setattr(manifest, '_conn_pid', None)
+    yield manifest
+    if manifest._conn is not None:
+        manifest._conn.close()
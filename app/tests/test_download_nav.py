@@ -0,0 +1,149 @@
+"""fetch_url against a local http.server stub: retries, backoff and connection reuse."""
+import socket
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+
+pytest.importorskip('requests')
+pytest.importorskip('numpy')
+
+from downloader import download_nav  # noqa: E402
+
+BODY = b"Scheme Code;Scheme Name;ISIN Div Payout/ISIN Growth;ISIN Div Reinvestment;" \
+       b"Net Asset Value;Repurchase Price;Sale Price;Date\r\n" \
+       b"119551;Aditya Birla Sun Life Banking & PSU Debt Fund;INF209KA12Z1;;101.2345;;;02-Apr-2025\r\n"
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """Answers each GET with the next scripted action; 'ok' once the script runs out."""
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            server.requests += 1
+            server.connections.add(self.client_address)
+            action = server.script.pop(0) if server.script else 'ok'
+
+        if action == 'ok':
+            self.send_response(200)
+            self.send_header('Content-Length', str(len(BODY)))
+            self.end_headers()
+            self.wfile.write(BODY)
+        elif action == 'broken_chunk':
+            # Promise a chunk that never arrives, then drop the connection
+            self.send_response(200)
+            self.send_header('Transfer-Encoding', 'chunked')
+            self.end_headers()
+            self.wfile.write(b"400\r\n" + BODY[:10])
+            self.wfile.flush()
+            self.connection.shutdown(socket.SHUT_RDWR)
+            self.close_connection = True
+        else:
+            self.send_response(int(action))
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def stub_server():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StubHandler)
+    server.lock = threading.Lock()
+    server.requests = 0
+    server.connections = set()
+    server.script = []
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield server
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+@pytest.fixture
+def url(stub_server):
+    return f"http://127.0.0.1:{stub_server.server_address[1]}/nav"
+
+
+@pytest.fixture(autouse=True)
+def fresh_session(monkeypatch):
+    # Each test gets its own connection pool and records backoff sleeps instead of sleeping
+    monkeypatch.setattr(download_nav, '_session', None)
+    monkeypatch.setattr(download_nav, '_host_limits', {})
+    monkeypatch.setattr(download_nav, 'DOWNLOAD_BACKOFF_BASE', 0.5)
+    monkeypatch.setattr(download_nav, 'DOWNLOAD_BACKOFF_MAX', 4)
+    sleeps = []
+    monkeypatch.setattr(download_nav.time, 'sleep', sleeps.append)
+    return sleeps
+
+
+def test_success_needs_one_request(stub_server, url, fresh_session):
+    response = download_nav.fetch_url(url, timeout=5, retries=3)
+    assert response.content == BODY
+    assert stub_server.requests == 1
+    assert fresh_session == []
+
+
+def test_retryable_status_codes_back_off_exponentially(stub_server, url, fresh_session):
+    stub_server.script = ['503', '429', '502']
+    response = download_nav.fetch_url(url, timeout=5, retries=3)
+    assert response.status_code == 200
+    assert stub_server.requests == 4
+    # Full jitter: attempt n sleeps between 0 and min(max, base * 2 ** n)
+    assert len(fresh_session) == 3
+    for attempt, delay in enumerate(fresh_session):
+        assert 0 <= delay <= min(4, 0.5 * 2 ** attempt)
+
+
+def test_broken_chunked_body_is_retried(stub_server, url, fresh_session):
+    stub_server.script = ['broken_chunk']
+    response = download_nav.fetch_url(url, timeout=5, retries=2)
+    assert response.content == BODY
+    assert stub_server.requests == 2
+    assert len(fresh_session) == 1
+
+
+def test_gives_up_after_all_retries(stub_server, url, fresh_session):
+    stub_server.script = ['500'] * 10
+    with pytest.raises(Exception, match='after 3 attempts'):
+        download_nav.fetch_url(url, timeout=5, retries=2)
+    assert stub_server.requests == 3
+    assert len(fresh_session) == 2
+
+
+def test_non_retryable_status_fails_immediately(stub_server, url, fresh_session):
+    stub_server.script = ['404']
+    with pytest.raises(Exception, match='Status code: 404'):
+        download_nav.fetch_url(url, timeout=5, retries=3)
+    assert stub_server.requests == 1
+    assert fresh_session == []
+
+
+def test_invalid_url_is_not_retried(fresh_session):
+    with pytest.raises(download_nav.requests.exceptions.MissingSchema):
+        download_nav.fetch_url('not-a-url', timeout=5, retries=3)
+    assert fresh_session == []
+
+
+def test_sequential_requests_reuse_one_connection(stub_server, url):
+    for _ in range(5):
+        download_nav.fetch_url(url, timeout=5, retries=0)
+    assert stub_server.requests == 5
+    assert len(stub_server.connections) == 1
+
+
+def test_concurrent_requests_stay_within_pool(stub_server, url, monkeypatch):
+    monkeypatch.setattr(download_nav, 'DOWNLOAD_MAX_PER_HOST', 2)
+    threads = [threading.Thread(target=download_nav.fetch_url, args=(url,), kwargs={'timeout': 5, 'retries': 0})
+               for _ in range(12)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert stub_server.requests == 12
+    # The per-host limit caps open connections; the pool keeps them alive between requests
+    assert len(stub_server.connections) <= 2
@@ -0,0 +1,58 @@
+"""Ingestion manifest: which days are skipped, holiday grace, and loaded file hashes."""
+from datetime import date, datetime, timedelta
+
+
+def test_filter_pending_skips_loaded_days_and_holidays(manifest_db):
+    manifest_db.record_load(date(2025, 4, 1), 'loaded', row_count=10)
+    manifest_db.record_load(date(2025, 4, 2), 'failed', error='boom')
+    manifest_db.record_empty(date(2025, 4, 3))
+    dates = [datetime(2025, 4, d) for d in (4, 3, 2, 1)]
+    assert manifest_db.filter_pending(dates) == [datetime(2025, 4, 4), datetime(2025, 4, 2)]
+    assert manifest_db.filter_pending([]) == []
+
+
+def test_delta_runs_keep_loaded_days(manifest_db):
+    manifest_db.record_load(date(2025, 4, 1), 'loaded', row_count=10)
+    manifest_db.record_empty(date(2025, 4, 3))
+    dates = [date(2025, 4, 1), date(2025, 4, 2), date(2025, 4, 3)]
+    assert manifest_db.filter_pending(dates, skip_loaded=False) == [date(2025, 4, 1), date(2025, 4, 2)]
+
+
+def test_recent_empty_days_are_not_holidays(manifest_db, monkeypatch):
+    monkeypatch.setattr(manifest_db, 'MANIFEST_HOLIDAY_GRACE_DAYS', 3)
+    today = datetime.now().date()
+    recent, old = today - timedelta(days=3), today - timedelta(days=4)
+    manifest_db.record_empty(recent)
+    manifest_db.record_empty(datetime.combine(old, datetime.min.time()))
+
+    assert manifest_db.get_entry(recent)['is_holiday'] == 0
+    assert manifest_db.get_entry(old)['is_holiday'] == 1
+    assert manifest_db.holiday_dates() == [old.strftime('%Y-%m-%d')]
+    # A recent empty day may not be published yet, so it is retried
+    assert manifest_db.filter_pending([recent, old]) == [recent]
+
+
+def test_download_after_empty_clears_holiday(manifest_db, tmp_path):
+    manifest_db.record_empty('2025-01-01')
+    assert manifest_db.holiday_dates() == ['2025-01-01']
+
+    path = tmp_path / 'navall_2025-01-01.txt'
+    path.write_bytes(b'some nav data')
+    manifest_db.record_download(date(2025, 1, 1), str(path))
+    entry = manifest_db.get_entry('2025-01-01')
+    assert entry['is_holiday'] == 0
+    assert entry['download_status'] == 'downloaded'
+    assert entry['file_size'] == len(b'some nav data')
+    assert entry['content_hash'] == manifest_db.file_hash(str(path))
+
+
+def test_loaded_hash_and_fingerprints_round_trip(manifest_db):
+    assert manifest_db.get_loaded_hash(date(2025, 4, 1)) is None
+    assert manifest_db.get_fingerprints(date(2025, 4, 1)) is None
+
+    manifest_db.set_loaded_hash(date(2025, 4, 1), 'abc')
+    manifest_db.save_fingerprints(date(2025, 4, 1), ['100001', '100002'], b'\x01' * 16)
+    manifest_db.set_loaded_hash(date(2025, 4, 1), 'def')
+
+    assert manifest_db.get_loaded_hash(date(2025, 4, 1)) == 'def'
+    assert manifest_db.get_fingerprints(date(2025, 4, 1)) == (['100001', '100002'], b'\x01' * 16)
@@ -0,0 +1,167 @@
+"""compute_metrics and metrics_frame on small hand-built NAV histories."""
+import numpy as np
+import pytest
+
+pytest.importorskip('pandas')
+
+from analytics.metrics import (  # noqa: E402
+    CAGR_PERIODS,
+    DRAWDOWN_MONTHS,
+    METRIC_COLUMNS,
+    RETURN_PERIODS,
+    business_calendar,
+    compute_metrics,
+    history_windows,
+    metrics_frame,
+    months_back,
+)
+from config.settings import METRICS_MAX_FILL_DAYS  # noqa: E402
+from analytics.nav_store import NavStore  # noqa: E402
+
+
+def flat_history(navs_by_scheme: dict, start='2019-01-01', end='2025-06-30'):
+    """NavStore with one NAV per business day per scheme, from a callable of the day index."""
+    calendar = business_calendar(np.datetime64(start), np.datetime64(end))
+    codes, dates, navs = [], [], []
+    for code, nav_of in navs_by_scheme.items():
+        codes.extend([code] * len(calendar))
+        dates.extend(calendar)
+        navs.extend(nav_of(i) for i in range(len(calendar)))
+    return NavStore.from_arrays(codes, np.array(dates, dtype='datetime64[D]'), navs), calendar
+
+
+def test_zero_nav_never_produces_inf_or_full_drawdown():
+    as_of = np.datetime64('2025-06-27')
+    calendar = business_calendar(np.datetime64('2019-01-01'), as_of)
+    one_year_ago = np.searchsorted(calendar, np.datetime64('2024-06-27'))
+    six_months_ago = np.searchsorted(calendar, np.datetime64('2024-12-27'))
+    store, _ = flat_history({
+        # Zero NAV on the 1y base date
+        'zero_base': lambda i: 0.0 if i == one_year_ago else 100.0 + i * 0.01,
+        # Zero NAV inside the drawdown window
+        'zero_inside': lambda i: 0.0 if i == six_months_ago else 100.0 + i * 0.01,
+    }, end='2025-06-27')
+
+    df = metrics_frame(store, [as_of])
+    values = df[METRIC_COLUMNS].to_numpy(dtype=np.float64)
+    assert not np.isinf(values).any()
+
+    zero_base = df.set_index('scheme_code').loc['zero_base']
+    assert np.isnan(zero_base['return_1y'])
+    assert zero_base['return_6m'] > 0
+
+    zero_inside = df.set_index('scheme_code').loc['zero_inside']
+    assert zero_inside['max_drawdown_1y'] == pytest.approx(0.0)
+    assert zero_inside['drawdown_1y'] == pytest.approx(0.0)
+
+
+def test_zero_current_nav_has_no_metrics():
+    calendar = business_calendar(np.datetime64('2024-01-01'), np.datetime64('2025-06-27'))
+    matrix = np.full((len(calendar), 1), 100.0)
+    matrix[-1, 0] = 0.0
+    metrics = compute_metrics(matrix, calendar, [calendar[-1]])
+    for name in METRIC_COLUMNS:
+        if name != 'max_drawdown_1y':
+            assert np.isnan(metrics[name][0, 0]), name
+    # The earlier days of the window still define the maximum drawdown
+    assert metrics['max_drawdown_1y'][0, 0] == pytest.approx(0.0)
+
+
+def test_months_back_clips_to_month_end():
+    dates = np.array(['2024-03-31', '2025-03-31', '2025-05-15', '2025-01-31'], dtype='datetime64[D]')
+    assert months_back(dates, 1).tolist() == [
+        np.datetime64('2024-02-29').item(),
+        np.datetime64('2025-02-28').item(),
+        np.datetime64('2025-04-15').item(),
+        np.datetime64('2024-12-31').item(),
+    ]
+    assert months_back(dates[2:3], 12)[0] == np.datetime64('2024-05-15')
+
+
+def test_returns_and_cagr_match_constant_growth():
+    calendar = business_calendar(np.datetime64('2019-01-01'), np.datetime64('2025-06-30'))
+    years = (calendar - calendar[0]).astype(np.float64) / 365.25
+    # 10% a year, compounded continuously across calendar days
+    matrix = (100.0 * 1.1 ** years)[:, None]
+    as_of = np.datetime64('2025-06-27')
+    metrics = compute_metrics(matrix, calendar, [as_of])
+
+    def expected_return(months):
+        # Weekend base dates take the NAV of the weekday before
+        base_date = months_back([as_of], months)[0]
+        base_day = calendar[np.searchsorted(calendar, base_date, side='right') - 1]
+        return 1.1 ** ((as_of - base_day).astype(np.float64) / 365.25) - 1
+
+    for name, months in RETURN_PERIODS.items():
+        assert metrics[name][0, 0] == pytest.approx(expected_return(months)), name
+    for name, months in CAGR_PERIODS.items():
+        years = (as_of - months_back([as_of], months)[0]).astype(np.float64) / 365.25
+        assert metrics[name][0, 0] == pytest.approx((1 + expected_return(months)) ** (1 / years) - 1), name
+    assert metrics['cagr_3y'][0, 0] == pytest.approx(0.1)
+    # A rising NAV is never below its peak
+    assert metrics['drawdown_1y'][0, 0] == pytest.approx(0.0)
+    assert metrics['max_drawdown_1y'][0, 0] == pytest.approx(0.0)
+
+
+def test_drawdowns_against_trailing_peak():
+    calendar = business_calendar(np.datetime64('2024-01-01'), np.datetime64('2025-06-27'))
+    navs = np.full(len(calendar), 100.0)
+    peak_day = np.searchsorted(calendar, np.datetime64('2025-01-10'))
+    navs[peak_day] = 120.0
+    navs[peak_day + 1:] = 90.0
+    navs[-1] = 108.0
+    metrics = compute_metrics(navs[:, None], calendar, [calendar[-1]])
+    assert metrics['drawdown_1y'][0, 0] == pytest.approx(108.0 / 120.0 - 1)
+    assert metrics['max_drawdown_1y'][0, 0] == pytest.approx(90.0 / 120.0 - 1)
+
+
+def test_history_too_short_leaves_long_periods_empty():
+    calendar = business_calendar(np.datetime64('2024-01-01'), np.datetime64('2025-06-27'))
+    matrix = np.full((len(calendar), 1), 100.0)
+    metrics = compute_metrics(matrix, calendar, [calendar[-1], np.datetime64('2023-12-29')])
+    assert metrics['return_1y'][0, 0] == pytest.approx(0.0)
+    for name in ('return_3y', 'return_5y', 'cagr_3y', 'cagr_5y'):
+        assert np.isnan(metrics[name][0, 0]), name
+    # An as-of date before the calendar has no NAV and no metrics
+    assert np.isnan(metrics['nav'][1, 0])
+    assert all(np.isnan(metrics[name][1, 0]) for name in METRIC_COLUMNS)
+
+
+def test_history_windows_are_sorted_merged_and_cover_every_base():
+    as_of = [np.datetime64('2025-06-27'), np.datetime64('2025-06-30')]
+    windows = history_windows(as_of)
+    starts = [start for start, _ in windows]
+    assert starts == sorted(starts)
+    for (_, end), (next_start, _) in zip(windows, windows[1:]):
+        assert (next_start - end).days > 1
+
+    def covered(day):
+        day = day.item() if isinstance(day, np.datetime64) else day
+        return any(start <= day <= end for start, end in windows)
+
+    for day in as_of:
+        assert covered(day)
+        assert covered(months_back([day], DRAWDOWN_MONTHS)[0] - METRICS_MAX_FILL_DAYS)
+        for months in list(RETURN_PERIODS.values()) + list(CAGR_PERIODS.values()):
+            base = months_back([day], months)[0]
+            assert covered(base) and covered(base - METRICS_MAX_FILL_DAYS)
+    # The years between 3y and 5y bases are never read
+    assert not covered(np.datetime64('2021-06-27'))
+
+
+def test_metrics_frame_on_windows_matches_full_history():
+    store, _ = flat_history({
+        'A': lambda i: 100.0 + i * 0.05,
+        'B': lambda i: 50.0 + 10 * np.sin(i / 30.0),
+    })
+    as_of = [np.datetime64('2025-03-31'), np.datetime64('2025-06-27')]
+    df = metrics_frame(store, as_of)
+    assert len(df) == 4
+
+    calendar = business_calendar(np.datetime64('2019-01-01'), np.datetime64('2025-06-30'))
+    full = compute_metrics(store.align(calendar, tolerance_days=METRICS_MAX_FILL_DAYS), calendar, as_of)
+    for k, day in enumerate(as_of):
+        for j, code in enumerate(store.scheme_codes):
+            row = df[(df['scheme_code'] == code) & (df['as_of_date'] == day)].iloc[0]
+            for name in METRIC_COLUMNS:
+                assert row[name] == pytest.approx(full[name][k, j], nan_ok=True), (code, name)
@@ -0,0 +1,84 @@
+"""NavStore construction, series, as-of lookups and calendar alignment."""
+import pytest
+
+np = pytest.importorskip('numpy')
+pytest.importorskip('mysql.connector')
+
+from analytics import nav_store  # noqa: E402
+from analytics.nav_store import NavStore, from_day_offsets, to_day_offsets  # noqa: E402
+
+
+def day(value):
+    return np.datetime64(value, 'D')
+
+
+@pytest.fixture
+def store():
+    # Out of order, with a repeated (scheme, date) and a NaN NAV
+    return NavStore.from_arrays(
+        ['B', 'A', 'A', 'B', 'A', 'A', 'C'],
+        ['2025-04-02', '2025-04-03', '2025-04-01', '2025-04-01', '2025-04-03', '2025-04-07', '2025-04-02'],
+        [20.0, 11.0, 10.0, 19.0, 11.5, 12.0, np.nan],
+    )
+
+
+def test_from_arrays_sorts_dedupes_and_drops_nan(store):
+    # C had only a NaN NAV, so it never becomes a scheme
+    assert store.scheme_codes.tolist() == ['A', 'B']
+    assert store.starts.tolist() == [0, 3, 5]
+    assert len(store) == 5
+    assert store.nbytes == 5 * 4 + 5 * 8 + 3 * 8
+
+    dates, navs = store.series('A')
+    assert dates.tolist() == [day('2025-04-01'), day('2025-04-03'), day('2025-04-07')]
+    # The later of the two 2025-04-03 rows wins
+    assert navs.tolist() == [10.0, 11.5, 12.0]
+    assert store.series('C')[0].size == 0
+
+
+def test_day_offsets_round_trip():
+    offsets = to_day_offsets(['1970-01-01', '2025-04-01'])
+    assert offsets.dtype == np.int32
+    assert offsets[0] == 0
+    assert from_day_offsets(offsets)[1] == day('2025-04-01')
+
+
+def test_asof_takes_latest_nav_on_or_before_date(store):
+    navs, matched = store.asof(['A', 'A', 'A', 'B', 'X'],
+                               ['2025-03-31', '2025-04-02', '2025-04-10', '2025-04-05', '2025-04-02'])
+    np.testing.assert_array_equal(navs, [np.nan, 10.0, 12.0, 20.0, np.nan])
+    assert matched[1] == day('2025-04-01')
+    assert np.isnat(matched[0]) and np.isnat(matched[4])
+
+    # One code for many dates; a tolerance bounds how stale a match may be
+    navs, _ = store.asof('A', ['2025-04-04', '2025-04-06'], tolerance_days=2)
+    np.testing.assert_array_equal(navs, [11.5, np.nan])
+
+
+def test_lookup_matches_exact_dates_only(store):
+    np.testing.assert_array_equal(store.lookup(['A', 'A', 'B'], ['2025-04-03', '2025-04-04', '2025-04-01']),
+                                  [11.5, np.nan, 19.0])
+
+
+def test_align_fills_forward_on_a_calendar(store, monkeypatch):
+    # Force several search blocks to cover the block loop
+    monkeypatch.setattr(nav_store, 'ALIGN_BATCH_CELLS', 2)
+    calendar = np.arange(day('2025-04-01'), day('2025-04-08'))
+    matrix = store.align(calendar)
+    assert matrix.shape == (7, 2)
+    np.testing.assert_array_equal(matrix[:, 0], [10.0, 10.0, 11.5, 11.5, 11.5, 11.5, 12.0])
+    np.testing.assert_array_equal(matrix[:, 1], [19.0, 20.0, 20.0, 20.0, 20.0, 20.0, 20.0])
+
+    exact = store.align(calendar, scheme_codes=['B', 'X'], fill=False)
+    np.testing.assert_array_equal(exact[:, 0], [19.0, 20.0] + [np.nan] * 5)
+    assert np.isnan(exact[:, 1]).all()
+
+    bounded = store.align(calendar, scheme_codes=['B'], tolerance_days=2)
+    np.testing.assert_array_equal(bounded[:, 0], [19.0, 20.0, 20.0, 20.0] + [np.nan] * 3)
+
+
+def test_empty_store():
+    empty = NavStore.from_arrays([], np.empty(0, dtype='datetime64[D]'), [])
+    assert len(empty) == 0
+    assert np.isnan(empty.lookup(['A'], ['2025-04-01'])).all()
+    assert empty.align(['2025-04-01'], scheme_codes=['A']).shape == (1, 1)
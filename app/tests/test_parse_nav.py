@@ -0,0 +1,170 @@
+"""Streaming, mmap and typed NAV parsers on a small hand-written report, and split_nav_range."""
+import numpy as np
+import pytest
+
+pd = pytest.importorskip('pandas')
+pytest.importorskip('pyarrow')
+pytest.importorskip('chardet')
+pytest.importorskip('requests')
+
+from parser.parse_nav import (  # noqa: E402
+    COLUMNS,
+    iter_nav_batches,
+    iter_nav_column_batches,
+    iter_nav_records,
+    parse_nav_file,
+)
+from downloader.download_nav import split_nav_range  # noqa: E402
+
+HEADER = "Scheme Code;Scheme Name;ISIN Div Payout/ISIN Growth;ISIN Div Reinvestment;" \
+         "Net Asset Value;Repurchase Price;Sale Price;Date"
+
+REPORT = f"""{HEADER}
+
+Open Ended Schemes(Debt Scheme - Banking and PSU Fund)
+
+Aditya Birla Sun Life Mutual Fund
+
+119551;Aditya Birla Sun Life Banking & PSU Debt Fund - Direct;INF209KA12Z1;INF209KA13Z9;101.2345;;;02-Apr-2025
+119552;Aditya Birla Sun Life Banking & PSU Debt Fund - Regular;INF209KA14Z7;;99.5;;;02-Apr-2025
+
+Axis Mutual Fund
+
+120437;Axis Banking & PSU Debt Fund - Direct;INF846K01DP8;;N.A.;;;02-Apr-2025
+
+Close Ended Schemes(Income)
+
+Axis Mutual Fund
+
+130001;Axis Fixed Term Plan - Series 1;INF846K01ZZ1;;10.75;;;02-Apr-2025
+"""
+
+# Scheme code -> (scheme type, fund house) the parsers should attach
+EXPECTED_CONTEXT = {
+    '119551': ('Open Ended Schemes(Debt Scheme - Banking and PSU Fund)', 'Aditya Birla Sun Life Mutual Fund'),
+    '119552': ('Open Ended Schemes(Debt Scheme - Banking and PSU Fund)', 'Aditya Birla Sun Life Mutual Fund'),
+    '120437': ('Open Ended Schemes(Debt Scheme - Banking and PSU Fund)', 'Axis Mutual Fund'),
+    '130001': ('Close Ended Schemes(Income)', 'Axis Mutual Fund'),
+}
+
+
+@pytest.fixture
+def report(tmp_path):
+    path = tmp_path / 'navall_2025-04-02.txt'
+    path.write_text(REPORT, encoding='utf-8')
+    return str(path)
+
+
+def records_only(df):
+    """Drop the column header, which has eight fields like a record."""
+    df = df[df['Scheme Code'].astype(str) != 'Scheme Code']
+    return df.reset_index(drop=True)
+
+
+def as_strings(df):
+    return {
+        row['Scheme Code']: (row['Scheme Type'], row['Fund Structure'])
+        for row in records_only(df).astype({c: str for c in ('Scheme Code', 'Scheme Type', 'Fund Structure')})
+        .to_dict('records')
+    }
+
+
+@pytest.mark.parametrize('use_mmap', [False, True])
+def test_streaming_records_carry_section_and_fund_house(report, use_mmap):
+    records = [r for r in iter_nav_records(report, use_mmap=use_mmap) if r[3] != 'Scheme Code']
+    assert [r[3] for r in records] == list(EXPECTED_CONTEXT)
+    for r in records:
+        assert (r[0], r[9]) == EXPECTED_CONTEXT[r[3]]
+        assert r[1] == r[2] == ''
+    assert records[0][7] == '101.2345'
+    assert records[0][8] == '02-Apr-2025'
+
+
+def test_batches_cover_every_record_once(report):
+    batches = list(iter_nav_batches(report, batch_size=2))
+    assert [len(b) for b in batches] == [2, 2, 1]
+    df = pd.concat(batches, ignore_index=True)
+    assert list(df.columns) == COLUMNS
+    assert as_strings(df) == EXPECTED_CONTEXT
+
+
+def test_mmap_and_buffered_scans_agree(report):
+    assert list(iter_nav_records(report, use_mmap=True)) == list(iter_nav_records(report, use_mmap=False))
+
+
+def test_typed_parse_types_columns(report):
+    df = records_only(parse_nav_file(report, typed=True))
+    assert isinstance(df['Scheme Name'].dtype, pd.CategoricalDtype)
+    assert df['Date'].dtype == 'datetime64[ns]'
+    assert df['Net Asset Value'].tolist()[:2] == [101.2345, 99.5]
+    # Non-numeric NAVs become NaN rather than failing the file
+    assert np.isnan(df['Net Asset Value'].iloc[2])
+    assert (df['Date'] == pd.Timestamp('2025-04-02')).all()
+
+
+@pytest.mark.parametrize('use_mmap', [False, True])
+def test_typed_and_text_parsers_agree(report, use_mmap):
+    text = records_only(parse_nav_file(report, typed=False))
+    typed = records_only(parse_nav_file(report, typed=True, use_mmap=use_mmap))
+    assert list(typed.columns) == list(text.columns) == COLUMNS
+    for column in COLUMNS:
+        if column in ('Net Asset Value', 'Date'):
+            continue
+        assert typed[column].astype(str).tolist() == text[column].tolist(), column
+    np.testing.assert_array_equal(typed['Net Asset Value'].to_numpy(),
+                                  pd.to_numeric(text['Net Asset Value'], errors='coerce').to_numpy())
+    assert (typed['Date'] == pd.to_datetime(text['Date'], format='%d-%b-%Y')).all()
+
+
+@pytest.mark.parametrize('batch_bytes', [16, 128, 1 << 20])
+def test_typed_batches_match_whole_file(report, batch_bytes):
+    whole = parse_nav_file(report, typed=True)
+    batches = list(iter_nav_column_batches(report, batch_bytes=batch_bytes))
+    assert all(len(b) for b in batches)
+    df = pd.concat(batches, ignore_index=True)
+    assert len(df) == len(whole)
+    for column in COLUMNS:
+        assert df[column].astype(str).tolist() == whole[column].astype(str).tolist(), column
+    assert as_strings(df) == EXPECTED_CONTEXT
+
+
+def test_empty_file_parses_to_no_rows(tmp_path):
+    path = tmp_path / 'empty.txt'
+    path.write_bytes(b'')
+    assert parse_nav_file(str(path), typed=False).empty
+    assert parse_nav_file(str(path), typed=True).empty
+    assert list(iter_nav_column_batches(str(path))) == []
+
+
+def test_split_nav_range_repeats_context_per_day():
+    content = (
+        f"{HEADER}\r\n"
+        "Open Ended Schemes(Debt Scheme - Banking and PSU Fund)\r\n"
+        "Axis Mutual Fund\r\n"
+        "120437;Axis Banking & PSU Debt Fund;INF846K01DP8;;101.0;;;02-Apr-2025\r\n"
+        "120437;Axis Banking & PSU Debt Fund;INF846K01DP8;;101.5;;;03-Apr-2025\r\n"
+        "Close Ended Schemes(Income)\r\n"
+        "130001;Axis Fixed Term Plan;INF846K01ZZ1;;10.75;;;03-Apr-2025\r\n"
+        "130002;Unparseable date;INF846K01ZZ2;;10.0;;;someday\r\n"
+    ).encode()
+    days = split_nav_range(content)
+    assert sorted(days) == ['2025-04-02', '2025-04-03']
+    second = days['2025-04-03'].decode().splitlines()
+    assert second == [
+        HEADER,
+        'Open Ended Schemes(Debt Scheme - Banking and PSU Fund)',
+        'Axis Mutual Fund',
+        '120437;Axis Banking & PSU Debt Fund;INF846K01DP8;;101.5;;;03-Apr-2025',
+        'Close Ended Schemes(Income)',
+        '130001;Axis Fixed Term Plan;INF846K01ZZ1;;10.75;;;03-Apr-2025',
+    ]
+    assert '03-Apr-2025' not in days['2025-04-02'].decode()
+
+
+def test_split_days_parse_like_single_day_files(tmp_path):
+    content = (REPORT + REPORT.replace('02-Apr-2025', '03-Apr-2025').split('\n', 1)[1]).encode()
+    days = split_nav_range(content)
+    for key, body in days.items():
+        path = tmp_path / f'navall_{key}.txt'
+        path.write_bytes(body)
+        assert as_strings(parse_nav_file(str(path), typed=False)) == EXPECTED_CONTEXT
@@ -0,0 +1,46 @@
+"""TradingCalendar over weekends, manifest holidays and the holidays file."""
+from datetime import date, datetime
+
+import pytest
+
+np = pytest.importorskip('numpy')
+
+from planner import trading_calendar  # noqa: E402
+from planner.trading_calendar import TradingCalendar  # noqa: E402
+
+# 2025-03-14 (Fri) was Holi
+CALENDAR = TradingCalendar(['2025-03-14'])
+
+
+def test_trading_days_skip_weekends_and_holidays():
+    days = CALENDAR.trading_days(date(2025, 3, 12), date(2025, 3, 18))
+    assert days.tolist() == [date(2025, 3, 12), date(2025, 3, 13), date(2025, 3, 17), date(2025, 3, 18)]
+    assert CALENDAR.trading_days(date(2025, 3, 18), date(2025, 3, 12)).size == 0
+    assert CALENDAR.is_trading_day(['2025-03-13', '2025-03-14', '2025-03-15']).tolist() == [True, False, False]
+
+
+def test_trading_day_list_keeps_input_type():
+    newest_first = CALENDAR.trading_day_list(datetime(2025, 3, 13), datetime(2025, 3, 17), newest_first=True)
+    assert newest_first == [datetime(2025, 3, 17), datetime(2025, 3, 13)]
+    assert CALENDAR.trading_day_list(date(2025, 3, 13), date(2025, 3, 17)) == [date(2025, 3, 13), date(2025, 3, 17)]
+
+
+def test_previous_trading_day_steps_over_weekend_and_holiday():
+    assert CALENDAR.previous_trading_day(date(2025, 3, 17)) == date(2025, 3, 13)
+    assert CALENDAR.previous_trading_day(datetime(2025, 3, 18, 9, 30)) == datetime(2025, 3, 17)
+
+
+def test_load_combines_manifest_and_holiday_file(manifest_db, tmp_path, monkeypatch):
+    manifest_db.record_empty('2025-03-14')
+    holidays_file = tmp_path / 'holidays.txt'
+    holidays_file.write_text("# NSE holidays\n2025-03-31  # Id-ul-Fitr\n\n2025-03-14\n")
+    monkeypatch.setattr(trading_calendar, 'TRADING_HOLIDAYS_FILE', str(holidays_file))
+
+    calendar = TradingCalendar.load()
+    assert calendar.holidays.tolist() == [date(2025, 3, 14), date(2025, 3, 31)]
+    assert calendar.previous_trading_day(date(2025, 4, 1)) == date(2025, 3, 28)
+
+
+def test_missing_holiday_file_is_ignored(manifest_db, monkeypatch):
+    monkeypatch.setattr(trading_calendar, 'TRADING_HOLIDAYS_FILE', '/nonexistent/holidays.txt')
+    assert TradingCalendar.load().holidays.size == 0
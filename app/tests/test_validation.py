@@ -0,0 +1,148 @@
+"""validate_data rejects and quarantine, validate_batches, and the insert batching helpers."""
+import pytest
+
+pd = pytest.importorskip('pandas')
+pytest.importorskip('mysql.connector')
+
+from db import insert_nav  # noqa: E402
+from db.batching import ChunkSizer, dedupe_rows, estimate_row_bytes, split_upsert_counts  # noqa: E402
+from db.insert_nav import MAX_NAV, validate_batches, validate_data  # noqa: E402
+
+
+def nav_frame(rows):
+    """All-string frame like iter_nav_batches yields, from (code, nav, date) tuples."""
+    return pd.DataFrame({
+        'Scheme Type': 'Open Ended Schemes(Debt Scheme - Banking and PSU Fund)',
+        'Scheme Category': '',
+        'Scheme Sub-Category': '',
+        'Scheme Code': [r[0] for r in rows],
+        'ISIN Div Payout/ISIN Growth': '',
+        'ISIN Div Reinvestment': '',
+        'Scheme Name': [f"Scheme {r[0]}" for r in rows],
+        'Net Asset Value': [r[1] for r in rows],
+        'Date': [r[2] for r in rows],
+        'Fund Structure': 'Axis Mutual Fund',
+    })
+
+
+MIXED = [
+    ('Scheme Code', 'Net Asset Value', 'Date'),
+    ('100001', '101.23456', '02-Apr-2025'),
+    ('100002', 'N.A.', '02-Apr-2025'),
+    ('100003', '99.5', '31-Feb-2025'),
+    ('100004', str(MAX_NAV * 10), '02-Apr-2025'),
+    ('100005', '10', '02-Apr-2025'),
+]
+
+
+@pytest.fixture
+def quarantine_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(insert_nav, 'QUARANTINE_DIR', str(tmp_path / 'quarantine'))
+    return tmp_path / 'quarantine'
+
+
+def test_validate_drops_rejects_and_header(quarantine_dir):
+    df = validate_data(nav_frame(MIXED), quarantine=False)
+    assert df['Scheme Code'].tolist() == ['100001', '100005']
+    assert df['Net Asset Value'].tolist() == [101.2346, 10.0]
+    assert (df['Date'] == pd.Timestamp('2025-04-02')).all()
+    assert not quarantine_dir.exists()
+
+
+def test_rejected_rows_are_quarantined_with_reason(quarantine_dir):
+    validate_data(nav_frame(MIXED), quarantine=True)
+    files = list(quarantine_dir.iterdir())
+    assert len(files) == 1
+    rejects = pd.read_csv(files[0], dtype=str)
+    # The column header line is dropped, never quarantined
+    assert dict(zip(rejects['Scheme Code'], rejects['reject_reason'])) == {
+        '100002': 'invalid_nav',
+        '100003': 'invalid_date',
+        '100004': 'nav_out_of_range',
+    }
+
+    # Later rejects of the same day append below one header
+    validate_data(nav_frame(MIXED), quarantine=True)
+    assert len(pd.read_csv(files[0], dtype=str)) == 6
+
+
+def test_validate_accepts_typed_columns(quarantine_dir):
+    df = nav_frame(MIXED[1:])
+    df['Net Asset Value'] = pd.to_numeric(df['Net Asset Value'], errors='coerce')
+    df['Date'] = pd.to_datetime(df['Date'], format='%d-%b-%Y', errors='coerce')
+    df['Scheme Code'] = df['Scheme Code'].astype('category')
+    valid = validate_data(df, quarantine=False)
+    assert valid['Scheme Code'].astype(str).tolist() == ['100001', '100005']
+
+
+def test_validate_rejects_empty_and_incomplete_frames():
+    with pytest.raises(ValueError):
+        validate_data(pd.DataFrame())
+    with pytest.raises(ValueError):
+        validate_data(nav_frame(MIXED).drop(columns=['Date']))
+
+
+def test_validate_batches_concatenates_valid_rows(quarantine_dir):
+    batches = [nav_frame(MIXED[:3]), nav_frame(MIXED[3:])]
+    df = validate_batches(iter(batches), quarantine=False)
+    assert df['Scheme Code'].tolist() == ['100001', '100005']
+    assert validate_batches(iter([]), quarantine=False) is None
+    # Every row rejected: an empty frame, which callers report as a failure
+    assert validate_batches(iter([nav_frame(MIXED[2:4])]), quarantine=False).empty
+
+
+def test_validate_batches_keeps_categories_across_batches(quarantine_dir):
+    first = nav_frame(MIXED[1:2]).astype({'Scheme Name': 'category'})
+    second = nav_frame(MIXED[5:]).astype({'Scheme Name': 'category'})
+    df = validate_batches(iter([first, second]), quarantine=False)
+    assert isinstance(df['Scheme Name'].dtype, pd.CategoricalDtype)
+    assert df['Scheme Name'].tolist() == ['Scheme 100001', 'Scheme 100005']
+
+
+@pytest.mark.parametrize('rows, existing, affected, expected', [
+    (10, 0, 10, (10, 0, 0)),   # all new
+    (10, 10, 20, (0, 10, 0)),  # all changed
+    (10, 10, 0, (0, 0, 10)),   # all identical
+    (10, 4, 6 + 2 * 3, (6, 3, 1)),
+])
+def test_split_upsert_counts(rows, existing, affected, expected):
+    assert split_upsert_counts(rows, existing, affected) == expected
+
+
+def test_dedupe_rows_keeps_last_row_per_key_in_order():
+    rows = [('a', 1, 'x'), ('b', 1, 'y'), ('a', 1, 'z'), ('a', 2, 'w')]
+    assert dedupe_rows(rows, (0, 1)) == [('b', 1, 'y'), ('a', 1, 'z'), ('a', 2, 'w')]
+    unique = rows[1:]
+    assert dedupe_rows(unique, (0, 1)) is unique
+
+
+def test_chunk_sizer_respects_byte_budget():
+    rows = [('x' * 100,)] * 50
+    row_bytes = estimate_row_bytes(rows[0])
+    sizer = ChunkSizer(max_bytes=row_bytes * 10, initial_rows=1000, min_rows=1, max_rows=1000)
+    assert sizer.next_chunk(rows, 0) == 10
+    assert sizer.next_chunk(rows, 45) == 50
+    # A single row over the budget still makes a chunk
+    assert ChunkSizer(max_bytes=1, initial_rows=10, min_rows=1, max_rows=10).next_chunk(rows, 0) == 1
+
+
+def test_chunk_sizer_caps_at_max_allowed_packet():
+    sizer = ChunkSizer(max_allowed_packet=1000, max_bytes=10 ** 6)
+    assert sizer.max_bytes == 900
+
+
+def test_chunk_sizer_moves_towards_target_latency():
+    sizer = ChunkSizer(max_bytes=10 ** 9, initial_rows=1000, min_rows=100, max_rows=100000, target_seconds=1.0)
+    # Fast commits grow the limit, at most doubling per step
+    sizer.record(1000, 0.01)
+    assert sizer.rows_limit == 2000
+    # Slow commits shrink it halfway towards the ideal size
+    sizer.record(2000, 4.0)
+    assert sizer.rows_limit == (2000 + 500) // 2
+    # Never below min_rows, however slow; empty or instant commits change nothing
+    for _ in range(10):
+        sizer.record(sizer.rows_limit, 1000.0)
+    assert sizer.rows_limit == 100
+    sizer.record(0, 1.0)
+    sizer.record(10, 0.0)
+    assert sizer.rows_limit == 100